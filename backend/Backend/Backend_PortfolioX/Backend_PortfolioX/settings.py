@@ -43,18 +43,25 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'utilisateur.Utilisateur'
 
 MIDDLEWARE = [
+    # En tête : le temps `total` couvre les autres middlewares
+    'portfolio.chronometrage.ServerTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Après l'authentification de session : profilage des requêtes du staff
+    'portfolio.profilage.ProfilageMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'Backend_PortfolioX.urls'
 
+# Réglages propres à la suite de tests (voir test_runner.py)
+TEST_RUNNER = 'Backend_PortfolioX.test_runner.LanceurTests'
+
 # =============================================================================
 # CONFIGURATION CORS (Configuration backend uniquement)
 # =============================================================================
@@ -111,6 +118,110 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Médias nommés par SHA-256 et rangés dans media/cas/ab/cd/ (voir portfolio/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'portfolio.storage.StockageContenu',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+# Délai (secondes) avant la suppression d'un blob qui n'est plus référencé
+PORTFOLIO_BLOBS_DELAI_PURGE = 24 * 3600
+
+# Envoi des médias par le serveur frontal : None (Django sert les fichiers),
+# 'x-accel-redirect' (nginx, location internal sur PORTFOLIO_MEDIA_ACCEL_PREFIX)
+# ou 'x-sendfile' (Apache mod_xsendfile, lighttpd)
+PORTFOLIO_MEDIA_SENDFILE = None
+PORTFOLIO_MEDIA_ACCEL_PREFIX = '/protected-media/'
+# Durée de cache (secondes) des médias qui ne sont pas adressés par contenu
+PORTFOLIO_MEDIA_MAX_AGE = 3600
+
+# =============================================================================
+# COMPTEUR DE VUES (écriture différée)
+# =============================================================================
+# Intervalle en secondes entre deux écritures des vues cumulées (0 = immédiat)
+PORTFOLIO_VUES_FLUSH_INTERVAL = 10
+
+# =============================================================================
+# STATISTIQUES DE LA PLATEFORME
+# =============================================================================
+# Âge maximal (secondes) des statistiques servies par /public/platform-stats/
+PORTFOLIO_STATS_MAX_AGE = 300
+
+# =============================================================================
+# CACHE DES RÉPONSES PUBLIQUES
+# =============================================================================
+# LocMemCache est propre à chaque processus : les versions d'invalidation et
+# les compteurs de admin/cache-stats/ ne sont alors valables qu'avec un seul
+# worker. En production multi-processus, utiliser un cache partagé (Redis,
+# Memcached, DatabaseCache), sinon un worker qui n'a pas traité une
+# modification sert l'ancienne réponse jusqu'à PORTFOLIO_CACHE_TIMEOUT.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'portfolio',
+    }
+}
+PORTFOLIO_CACHE_ALIAS = 'default'
+# Durée de vie (secondes) d'une réponse publique en cache
+PORTFOLIO_CACHE_TIMEOUT = 300
+
+# =============================================================================
+# VARIANTES DES IMAGES
+# =============================================================================
+# Largeurs (px) générées pour chaque image envoyée, sans agrandissement
+PORTFOLIO_IMAGE_LARGEURS = [320, 640, 1280]
+# Formats générés (ignorés si Pillow ne sait pas les encoder)
+PORTFOLIO_IMAGE_FORMATS = ['webp', 'avif']
+PORTFOLIO_IMAGE_QUALITE = 80
+# Threads de traitement des images (0 = synchrone, après le commit)
+PORTFOLIO_IMAGE_WORKERS = 2
+
+# =============================================================================
+# TÉLÉVERSEMENTS FRAGMENTÉS
+# =============================================================================
+# Dossier des fichiers en cours d'assemblage (défaut : dossier temporaire du système)
+# PORTFOLIO_UPLOAD_DIR = BASE_DIR / 'televersements'
+PORTFOLIO_UPLOAD_TAILLE_MAX = 20 * 1024 * 1024
+PORTFOLIO_UPLOAD_TAILLE_FRAGMENT_MAX = 5 * 1024 * 1024
+# Durée (secondes) après laquelle une session non finalisée est supprimée
+PORTFOLIO_UPLOAD_EXPIRATION = 24 * 3600
+
+# =============================================================================
+# EXPORT STATIQUE (voir portfolio/export_statique.py)
+# =============================================================================
+PORTFOLIO_EXPORT_DIR = BASE_DIR / 'export'
+# Réexporter les portfolios modifiés après chaque commit, dans le processus
+# de la requête (sinon : manage.py export_static_site, par cron)
+PORTFOLIO_EXPORT_AUTO = False
+
+# =============================================================================
+# CHRONOMÉTRAGE DES REQUÊTES (voir portfolio/chronometrage.py)
+# =============================================================================
+# Part des requêtes mesurées (en-tête Server-Timing et ligne de journal JSON) ;
+# 1 pour mesurer toutes les requêtes, 0 pour désactiver
+PORTFOLIO_TIMING_TAUX = 0.01
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'portfolio.chronometrage': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# =============================================================================
+# PROFILAGE À LA DEMANDE (voir portfolio/profilage.py)
+# =============================================================================
+PORTFOLIO_PROFILS_DIR = BASE_DIR / 'profils'
+# Nombre de profils conservés (les plus anciens sont supprimés)
+PORTFOLIO_PROFILS_MAX = 50
+
 # =============================================================================
 # TEMPLATES (Configuration minimale)
 # =============================================================================
@@ -0,0 +1,30 @@
+"""
+Lanceur des tests : réglages appliqués à toute la suite.
+
+Les traitements en arrière-plan (minuterie du compteur de vues, threads de
+traitement des images) écriraient dans la base de test hors de la
+transaction des tests : ils sont rendus synchrones. Le chronométrage
+échantillonné écrirait des lignes de journal au hasard dans la sortie : il
+est désactivé. Les tests qui vérifient ces comportements les réactivent
+explicitement.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+REGLAGES_TESTS = {
+    'PORTFOLIO_VUES_FLUSH_INTERVAL': 0,
+    'PORTFOLIO_TIMING_TAUX': 0,
+    'PORTFOLIO_IMAGE_WORKERS': 0,
+}
+
+
+class LanceurTests(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.reglages = override_settings(**REGLAGES_TESTS)
+        self.reglages.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.reglages.disable()
+        super().teardown_test_environment(**kwargs)
@@ -3,13 +3,15 @@ URL configuration for Backend_PortfolioX project.
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenVerifyView
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from portfolio.medias import servir_media
+
 # Vue racine de l'API - remplace api_root.urls
 @api_view(['GET'])
 def api_root(request):
@@ -200,8 +202,12 @@ urlpatterns = [
     path('api/', api_root, name='api_root'),
 ]
 
-# Servir les fichiers médias en développement
+# Fichiers médias : ETag, Range, cache immutable pour les fichiers adressés
+# par contenu, transfert délégué au serveur frontal si PORTFOLIO_MEDIA_SENDFILE
+urlpatterns += [
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<chemin>.+)$', servir_media, name='media'),
+]
+
 # Ajouter les fichiers statiques seulement en mode DEBUG
 if settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
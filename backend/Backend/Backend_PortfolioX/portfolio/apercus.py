@@ -0,0 +1,76 @@
+"""
+Chargement groupé des aperçus (top-N contacts/compétences/projets) d'une page de portfolios.
+
+Une requête par relation : les lignes de la table de liaison sont classées par
+portfolio avec ROW_NUMBER() puis filtrées sur le rang, au lieu d'un SELECT
+tronqué par portfolio.
+"""
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Portfolio
+
+# relation -> (filtre sur l'élément, nombre d'éléments par portfolio)
+APERCUS = {
+    'contacts': ({'est_principal': True}, 3),
+    'competences': ({'est_visible': True}, 5),
+    'projets': ({'est_public': True}, 3),
+}
+
+
+def _ordre_element(through, champ):
+    """Ordre par défaut du modèle lié, exprimé depuis la table de liaison"""
+    modele = through._meta.get_field(champ).related_model
+    expressions = []
+    for nom in modele._meta.ordering:
+        if nom.startswith('-'):
+            expressions.append(F(f'{champ}__{nom[1:]}').desc())
+        else:
+            expressions.append(F(f'{champ}__{nom}').asc())
+    # Départager les ex aequo de façon stable
+    expressions.append(F(f'{champ}_id').asc())
+    return expressions
+
+
+def charger_elements(portfolio_ids, relation, filtres=None, limite=None):
+    """
+    Retourner {portfolio_id: [éléments]} pour une relation M2M de Portfolio,
+    limité aux `limite` premiers éléments de chaque portfolio
+    """
+    through = getattr(Portfolio, relation).through
+    champ = getattr(Portfolio, relation).field.m2m_reverse_field_name()
+
+    liens = through.objects.filter(portfolio_id__in=portfolio_ids).select_related(champ)
+    if filtres:
+        liens = liens.filter(**{f'{champ}__{cle}': valeur for cle, valeur in filtres.items()})
+    if limite is not None:
+        liens = liens.annotate(
+            rang=Window(
+                expression=RowNumber(),
+                partition_by=[F('portfolio_id')],
+                order_by=_ordre_element(through, champ),
+            )
+        ).filter(rang__lte=limite).order_by('portfolio_id', 'rang')
+    else:
+        liens = liens.order_by('portfolio_id', *_ordre_element(through, champ))
+
+    resultat = defaultdict(list)
+    for lien in liens:
+        resultat[lien.portfolio_id].append(getattr(lien, champ))
+    return resultat
+
+
+def charger_apercus(portfolios):
+    """
+    Charger les aperçus de tous les portfolios d'une page.
+    Retourne {relation: {portfolio_id: [éléments]}}, une requête par relation.
+    """
+    portfolio_ids = [portfolio.pk for portfolio in portfolios]
+    if not portfolio_ids:
+        return {relation: {} for relation in APERCUS}
+    return {
+        relation: charger_elements(portfolio_ids, relation, filtres, limite)
+        for relation, (filtres, limite) in APERCUS.items()
+    }
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PortfolioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'portfolio'
+    
+    def ready(self):
+        # Enregistrement des signaux (snapshots publics, etc.)
+        from . import signals  # noqa: F401
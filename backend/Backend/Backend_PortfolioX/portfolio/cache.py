@@ -0,0 +1,206 @@
+"""
+Cache des réponses publiques pour les visiteurs anonymes.
+
+Les GET anonymes (sans en-tête Authorization ni cookie de session) des vues
+utilisant CacheReponsePubliqueMixin sont servis depuis le cache Django, avant
+toute authentification ou requête SQL. La clé combine le chemin, la query
+string triée, l'en-tête Accept et un numéro de version :
+- version globale pour les listes et les détails d'éléments ;
+- version du portfolio pour les vues liées à un portfolio (kwarg portfolio_id ou pk).
+
+Les versions sont incrémentées après chaque commit modifiant un portfolio ou
+ses éléments (voir signals.py) : les anciennes entrées ne sont plus jamais
+lues et expirent d'elles-mêmes. La version globale n'avance que si l'un des
+portfolios modifiés est publié ou l'était au passage précédent : modifier un
+brouillon ne vide pas les listes publiques.
+
+Versions et compteurs vivent dans le cache PORTFOLIO_CACHE_ALIAS : avec
+plusieurs processus, il doit être partagé (Redis, Memcached, base de données).
+Avec LocMemCache, chaque processus a ses propres versions et continue de
+servir ses réponses jusqu'à PORTFOLIO_CACHE_TIMEOUT après une modification
+traitée par un autre.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+PREFIXE = 'portfolio:reponses'
+CLE_VERSION_GLOBALE = f'{PREFIXE}:version'
+CLE_HITS = f'{PREFIXE}:hits'
+CLE_MISSES = f'{PREFIXE}:misses'
+# Portfolio publié au dernier passage de invalider_reponses (présent dans les listes)
+CLE_PUBLIE = f'{PREFIXE}:publie'
+
+# En-têtes de la réponse d'origine rejoués sur un hit
+ENTETES_CONSERVES = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+
+def _cache():
+    return caches[getattr(settings, 'PORTFOLIO_CACHE_ALIAS', 'default')]
+
+
+def _duree():
+    return getattr(settings, 'PORTFOLIO_CACHE_TIMEOUT', 300)
+
+
+def _cle_version(portfolio_id=None):
+    if portfolio_id is None:
+        return CLE_VERSION_GLOBALE
+    return f'{CLE_VERSION_GLOBALE}:{portfolio_id}'
+
+
+def _nouvelle_version():
+    # Valeur initiale horodatée : une version évincée du cache ne revient
+    # jamais à une valeur déjà utilisée par des entrées encore présentes
+    return time.time_ns()
+
+
+def _incrementer(cle):
+    cache = _cache()
+    try:
+        cache.incr(cle)
+    except ValueError:
+        cache.set(cle, _nouvelle_version(), None)
+
+
+def _cle_publie(portfolio_id):
+    return f'{CLE_PUBLIE}:{portfolio_id}'
+
+
+def invalider_reponses(portfolio_ids):
+    """
+    Invalider les réponses des portfolios modifiés, et les listes publiques
+    si l'un d'eux y figure ou y figurait
+    """
+    from .models import Portfolio
+
+    portfolio_ids = set(portfolio_ids)
+    cache = _cache()
+    publies = set(
+        Portfolio.objects.filter(id_portfolio__in=portfolio_ids, statut='publie').values_list('pk', flat=True)
+    )
+    etats = cache.get_many([_cle_publie(pk) for pk in portfolio_ids])
+    # État inconnu (premier passage, entrée évincée) : le portfolio a pu être publié
+    listes_concernees = any(
+        pk in publies or etats.get(_cle_publie(pk), True) for pk in portfolio_ids
+    )
+    cache.set_many({_cle_publie(pk): pk in publies for pk in portfolio_ids}, None)
+
+    if listes_concernees:
+        _incrementer(CLE_VERSION_GLOBALE)
+    for portfolio_id in portfolio_ids:
+        _incrementer(_cle_version(portfolio_id))
+
+
+def _compter(cle):
+    cache = _cache()
+    if not cache.add(cle, 1, None):
+        try:
+            cache.incr(cle)
+        except ValueError:
+            cache.set(cle, 1, None)
+
+
+def statistiques_cache():
+    """Compteurs de hits/misses depuis le dernier reset"""
+    valeurs = _cache().get_many([CLE_HITS, CLE_MISSES])
+    hits = valeurs.get(CLE_HITS, 0)
+    misses = valeurs.get(CLE_MISSES, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'taux_hits': round(hits / total, 4) if total else None,
+    }
+
+
+def reinitialiser_statistiques():
+    _cache().delete_many([CLE_HITS, CLE_MISSES])
+
+
+class CacheReponsePubliqueMixin:
+    """
+    Mixin pour les vues publiques en lecture seule (APIView ou ViewSet).
+
+    Sur un ViewSet, seules les actions listées dans `cache_actions` sont mises
+    en cache ; sur une APIView, toutes les requêtes GET le sont.
+    """
+    cache_actions = None
+    cache_kwargs_portfolio = ('portfolio_id', 'pk')
+
+    def requete_cachable(self, request):
+        if request.method != 'GET':
+            return False
+        if 'HTTP_AUTHORIZATION' in request.META or settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return False
+        if self.cache_actions is not None:
+            action = getattr(self, 'action_map', {}).get('get')
+            return action in self.cache_actions
+        return True
+
+    def cle_cache(self, request, kwargs):
+        portfolio_id = next(
+            (kwargs[nom] for nom in self.cache_kwargs_portfolio if nom in kwargs), None
+        )
+        cle_version = _cle_version(portfolio_id)
+        cache = _cache()
+        version = cache.get(cle_version)
+        if version is None:
+            version = _nouvelle_version()
+            if not cache.add(cle_version, version, None):
+                version = cache.get(cle_version, version)
+
+        parametres = urlencode(sorted(request.GET.lists()), doseq=True)
+        empreinte = hashlib.md5(
+            f"{request.path}?{parametres}|{request.META.get('HTTP_ACCEPT', '')}".encode()
+        ).hexdigest()
+        return f'{PREFIXE}:{portfolio_id or "*"}:{version}:{empreinte}'
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.requete_cachable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = _cache()
+        cle = self.cle_cache(request, kwargs)
+        en_cache = cache.get(cle)
+        if en_cache is not None:
+            _compter(CLE_HITS)
+            statut, entetes, contenu = en_cache
+            response = None
+            if statut == 200 and ('ETag' in entetes or 'Last-Modified' in entetes):
+                response = get_conditional_response(
+                    request,
+                    etag=entetes.get('ETag'),
+                    last_modified=parse_http_date_safe(entetes.get('Last-Modified', '')),
+                )
+            if response is None:
+                response = HttpResponse(contenu, status=statut)
+            for nom, valeur in entetes.items():
+                if nom != 'Content-Type' or response.status_code != 304:
+                    response[nom] = valeur
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _compter(CLE_MISSES)
+        response = super().dispatch(request, *args, **kwargs)
+        response['X-Cache'] = 'MISS'
+
+        # Une réponse 304 dépend des validateurs du client : elle n'est jamais conservée
+        if response.status_code in (200, 404):
+            def enregistrer(reponse_rendue):
+                entetes = {
+                    nom: reponse_rendue[nom] for nom in ENTETES_CONSERVES if reponse_rendue.has_header(nom)
+                }
+                cache.set(cle, (reponse_rendue.status_code, entetes, reponse_rendue.content), _duree())
+
+            if hasattr(response, 'add_post_render_callback') and not response.is_rendered:
+                response.add_post_render_callback(enregistrer)
+            else:
+                enregistrer(response)
+        return response
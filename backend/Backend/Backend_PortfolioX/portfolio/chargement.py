@@ -0,0 +1,447 @@
+"""
+Chargement en masse de données (utilisateurs, contacts, compétences, projets, portfolios).
+
+Formats acceptés, lus par blocs (la mémoire ne dépend pas de la taille du fichier) :
+- JSON : objet {section: [enregistrements]} (ex. fixtures/data_initial.json) ;
+- JSON : tableau d'enregistrements typés [{"type": "projet", ...}, ...] ;
+- NDJSON : un enregistrement typé par ligne.
+
+Les enregistrements sont accumulés par section et écrits par lots de
+bulk_create(update_conflicts=True) : un enregistrement dont la clé existe déjà
+(email de l'utilisateur, id de l'élément, utilisateur du portfolio) est mis à
+jour avec les champs fournis ; un élément existant ne change pas
+d'utilisateur. Avant d'écrire un lot, les lots en attente des sections dont il
+dépend sont écrits (utilisateurs, puis éléments, puis portfolios) : les
+sections peuvent être entrelacées.
+
+Le champ `utilisateur` d'un enregistrement est un id ou un email ; à défaut,
+l'utilisateur par défaut du chargeur est utilisé. Les listes `contacts`,
+`competences` et `projets` d'un portfolio remplacent ses liaisons et ne
+peuvent désigner que des éléments de son utilisateur. Les données ne sont pas
+validées par les serializers : les valeurs sont écrites telles quelles. Les
+champs image sont ignorés (à envoyer par l'API de téléversement).
+Les compteurs et l'index de recherche des portfolios touchés sont mis à jour
+à chaque lot (voir signals.py). Leurs snapshots sont supprimés plutôt que
+reconstruits (le plus coûteux du chargement) : obtenir_snapshot les régénère
+à la première lecture, sauf si le chargeur est créé avec snapshots=True.
+"""
+import json
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from utilisateur.models import Utilisateur
+from .images import CHAMPS_IMAGES
+from .models import Contact, Competence, Projet, Portfolio, PortfolioSnapshot
+from .signals import contenu_modifie, portfolios_lies, traitements_suspendus
+from .snapshots import reconstruire_snapshots
+from .slugs import allouer_slugs
+
+# Sections dans l'ordre d'écriture
+SECTIONS = {
+    'utilisateurs': Utilisateur,
+    'contacts': Contact,
+    'competences': Competence,
+    'projets': Projet,
+    'portfolios': Portfolio,
+}
+# Sections écrites avant une section donnée
+DEPENDANCES = {
+    'utilisateurs': (),
+    'contacts': ('utilisateurs',),
+    'competences': ('utilisateurs',),
+    'projets': ('utilisateurs',),
+    'portfolios': ('utilisateurs', 'contacts', 'competences', 'projets'),
+}
+RELATIONS = ('contacts', 'competences', 'projets')
+
+TAILLE_BLOC = 1024 * 1024
+# Au-delà, un enregistrement qui ne se décode pas est considéré comme invalide
+TAILLE_MAX_ENREGISTREMENT = 16 * 1024 * 1024
+TAILLE_LOT_PAR_DEFAUT = 1000
+
+BLANCS = re.compile(r'\s*')
+
+
+class ChargementInvalide(Exception):
+    pass
+
+
+def nom_section(nom):
+    """Nom de section d'un enregistrement typé ('projet' ou 'projets')"""
+    if nom in SECTIONS:
+        return nom
+    return nom + 's' if nom and nom + 's' in SECTIONS else nom
+
+
+# ============================================================================
+# LECTURE
+# ============================================================================
+
+class LecteurJSON:
+    """Lecture incrémentale de valeurs JSON (raw_decode sur un tampon rempli par blocs)"""
+
+    def __init__(self, fichier):
+        self.fichier = fichier
+        self.tampon = ''
+        self.position = 0
+        self.decodeur = json.JSONDecoder()
+
+    def _remplir(self):
+        bloc = self.fichier.read(TAILLE_BLOC)
+        if not bloc:
+            return False
+        self.tampon = self.tampon[self.position:] + bloc
+        self.position = 0
+        return True
+
+    def caractere(self):
+        """Prochain caractère significatif, sans le consommer ('' en fin de fichier)"""
+        while True:
+            self.position = BLANCS.match(self.tampon, self.position).end()
+            if self.position < len(self.tampon):
+                return self.tampon[self.position]
+            if not self._remplir():
+                return ''
+
+    def consommer(self, attendus):
+        caractere = self.caractere()
+        if not caractere or caractere not in attendus:
+            raise ChargementInvalide(
+                f"JSON invalide : {' ou '.join(attendus)} attendu, {caractere or 'fin du fichier'} trouvé"
+            )
+        self.position += 1
+        return caractere
+
+    def valeur(self):
+        self.caractere()
+        while True:
+            try:
+                valeur, fin = self.decodeur.raw_decode(self.tampon, self.position)
+            except json.JSONDecodeError as e:
+                if len(self.tampon) - self.position > TAILLE_MAX_ENREGISTREMENT or not self._remplir():
+                    raise ChargementInvalide(f"JSON invalide : {e}")
+                continue
+            # Un nombre ou un littéral peut être coupé par la fin du tampon
+            if fin == len(self.tampon) and not isinstance(valeur, (dict, list, str)) and self._remplir():
+                continue
+            self.position = fin
+            return valeur
+
+    def tableau(self):
+        """Valeurs successives d'un tableau JSON"""
+        self.consommer('[')
+        if self.caractere() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self.valeur()
+            if self.consommer(',]') == ']':
+                return
+
+
+def _enregistrement_type(valeur):
+    if not isinstance(valeur, dict) or 'type' not in valeur:
+        raise ChargementInvalide(f"Enregistrement sans type : {str(valeur)[:100]}")
+    valeur = dict(valeur)
+    return nom_section(valeur.pop('type')), valeur
+
+
+def lire_enregistrements(fichier, format_='json'):
+    """Générer les couples (section, enregistrement) d'un fichier texte"""
+    lecteur = LecteurJSON(fichier)
+
+    if format_ == 'ndjson':
+        while lecteur.caractere():
+            yield _enregistrement_type(lecteur.valeur())
+        return
+
+    premier = lecteur.caractere()
+    if premier == '[':
+        for valeur in lecteur.tableau():
+            yield _enregistrement_type(valeur)
+        return
+
+    lecteur.consommer('{')
+    if lecteur.caractere() == '}':
+        return
+    while True:
+        section = lecteur.valeur()
+        lecteur.consommer(':')
+        if lecteur.caractere() == '[':
+            for valeur in lecteur.tableau():
+                yield section, valeur
+        else:
+            lecteur.valeur()
+        if lecteur.consommer(',}') == '}':
+            return
+
+
+# ============================================================================
+# ÉCRITURE
+# ============================================================================
+
+@lru_cache(maxsize=None)
+def champs_importables(modele):
+    """
+    Champs acceptés dans un enregistrement, hors utilisateur (résolu à part) et
+    images : bulk_create ne compterait pas les références aux blobs (voir
+    storage.py) ni ne produirait les variantes
+    """
+    exclus = {'utilisateur', *CHAMPS_IMAGES.get(modele, ())}
+    return {
+        champ.name: champ for champ in modele._meta.concrete_fields
+        if (champ.editable or champ.primary_key) and champ.name not in exclus
+    }
+
+
+class Chargeur:
+    """
+    Accumule les enregistrements par section et les écrit par lots ;
+    `progression(section, total)` est appelé après chaque lot
+    """
+
+    def __init__(self, utilisateur_defaut=None, taille_lot=TAILLE_LOT_PAR_DEFAUT, progression=None,
+                 snapshots=False):
+        self.utilisateur_defaut = utilisateur_defaut
+        self.snapshots = snapshots
+        self.taille_lot = taille_lot
+        self.progression = progression
+        self.lots = defaultdict(list)
+        self.ecrits = Counter()
+        self.ignores = Counter()
+
+    def ajouter(self, section, enregistrement):
+        if section not in SECTIONS or not isinstance(enregistrement, dict):
+            self.ignores[section] += 1
+            return
+        self.lots[section].append(enregistrement)
+        if len(self.lots[section]) >= self.taille_lot:
+            self.ecrire(section)
+
+    def charger(self, enregistrements):
+        for section, enregistrement in enregistrements:
+            self.ajouter(section, enregistrement)
+        return self.terminer()
+
+    def terminer(self):
+        """Écrire les lots restants ; retourne le nombre d'enregistrements écrits par section"""
+        for section in SECTIONS:
+            if self.lots[section]:
+                self.ecrire(section)
+        self._reinitialiser_sequences()
+        return self.ecrits
+
+    def ecrire(self, section):
+        for dependance in DEPENDANCES[section]:
+            if self.lots[dependance]:
+                self.ecrire(dependance)
+        lot, self.lots[section] = self.lots[section], []
+        suspendus = () if self.snapshots else (reconstruire_snapshots,)
+        with traitements_suspendus(*suspendus), transaction.atomic():
+            getattr(self, f'_ecrire_{section}')(lot)
+        self.ecrits[section] += len(lot)
+        if self.progression:
+            self.progression(section, self.ecrits[section])
+
+    def _reinitialiser_sequences(self):
+        # Des clés primaires explicites ont pu dépasser la séquence (PostgreSQL)
+        modeles = [SECTIONS[section] for section in self.ecrits]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), modeles):
+                cursor.execute(sql)
+
+    def _contenu_modifie(self, portfolio_ids, elements=()):
+        portfolio_ids = list(portfolio_ids)
+        if not self.snapshots:
+            PortfolioSnapshot.objects.filter(portfolio_id__in=portfolio_ids).delete()
+        contenu_modifie(portfolio_ids, elements)
+
+    # ------------------------------------------------------------------------
+
+    def _reference(self, enregistrement):
+        reference = enregistrement.get('utilisateur', self.utilisateur_defaut)
+        if isinstance(reference, str):
+            return Utilisateur.objects.normalize_email(reference)
+        return reference
+
+    def _utilisateurs(self, lot):
+        """{id ou email: Utilisateur} des utilisateurs référencés par le lot (une requête)"""
+        references = {self._reference(enregistrement) for enregistrement in lot}
+        if None in references:
+            raise ChargementInvalide("Enregistrement sans utilisateur (indiquer un utilisateur par défaut)")
+        emails = {reference for reference in references if isinstance(reference, str)}
+        utilisateurs = {}
+        for utilisateur in Utilisateur.objects.filter(
+            Q(email__in=emails) | Q(pk__in=references - emails)
+        ).only('id_utilisateur', 'email', 'nom', 'prenom'):
+            utilisateurs[utilisateur.pk] = utilisateurs[utilisateur.email] = utilisateur
+        manquants = references - utilisateurs.keys()
+        if manquants:
+            raise ChargementInvalide(
+                f"Utilisateurs introuvables : {', '.join(sorted(map(str, manquants))[:10])}"
+            )
+        return utilisateurs
+
+    def _valeurs(self, modele, enregistrement):
+        champs = champs_importables(modele)
+        return {nom: valeur for nom, valeur in enregistrement.items() if nom in champs}
+
+    def _ecrire_utilisateurs(self, lot):
+        par_email = {}
+        for enregistrement in lot:
+            email = Utilisateur.objects.normalize_email(enregistrement['email'])
+            par_email[email] = Utilisateur(
+                email=email,
+                nom=enregistrement.get('nom', ''),
+                prenom=enregistrement.get('prenom', ''),
+                # Mot de passe déjà haché, sinon inutilisable
+                password=enregistrement.get('password') or make_password(None),
+            )
+        Utilisateur.objects.bulk_create(
+            par_email.values(),
+            update_conflicts=True,
+            unique_fields=['email'],
+            update_fields=['nom', 'prenom'],
+        )
+
+    def _ecrire_elements(self, modele, lot):
+        utilisateurs = self._utilisateurs(lot)
+        cle = modele._meta.pk.name
+        # Un bulk_create par ensemble de champs fournis : les champs absents ne sont pas écrasés
+        existants = defaultdict(dict)
+        nouveaux = []
+        for enregistrement in lot:
+            valeurs = self._valeurs(modele, enregistrement)
+            instance = modele(utilisateur=utilisateurs[self._reference(enregistrement)], **valeurs)
+            if valeurs.get(cle) is None:
+                nouveaux.append(instance)
+            else:
+                existants[frozenset(valeurs)][valeurs[cle]] = instance
+
+        self._verifier_proprietaires(modele, existants)
+        modele.objects.bulk_create(nouveaux)
+        for champs, instances in existants.items():
+            a_mettre_a_jour = sorted(champs - {cle})
+            if not a_mettre_a_jour:
+                modele.objects.bulk_create(instances.values(), ignore_conflicts=True)
+                continue
+            modele.objects.bulk_create(
+                instances.values(),
+                update_conflicts=True,
+                unique_fields=[cle],
+                update_fields=a_mettre_a_jour,
+            )
+
+        ids = [pk for instances in existants.values() for pk in instances]
+        if ids:
+            self._contenu_modifie(portfolios_lies(modele, ids), [(modele, pk) for pk in ids])
+
+    def _verifier_proprietaires(self, modele, existants):
+        """
+        Refuser de changer l'utilisateur d'un élément existant : il resterait lié
+        aux portfolios de son ancien utilisateur
+        """
+        instances = {pk: instance for par_pk in existants.values() for pk, instance in par_pk.items()}
+        if not instances:
+            return
+        proprietaires = modele.objects.filter(pk__in=instances).values_list(modele._meta.pk.name, 'utilisateur_id')
+        invalides = sorted(
+            pk for pk, utilisateur_id in proprietaires if instances[pk].utilisateur_id != utilisateur_id
+        )
+        if invalides:
+            raise ChargementInvalide(
+                f"{modele._meta.verbose_name_plural.capitalize()} appartenant à un autre utilisateur : "
+                f"{', '.join(map(str, invalides[:10]))}"
+            )
+
+    def _ecrire_contacts(self, lot):
+        self._ecrire_elements(Contact, lot)
+
+    def _ecrire_competences(self, lot):
+        self._ecrire_elements(Competence, lot)
+
+    def _ecrire_projets(self, lot):
+        self._ecrire_elements(Projet, lot)
+
+    def _ecrire_portfolios(self, lot):
+        utilisateurs = self._utilisateurs(lot)
+        # Dates de publication existantes, conservées comme le fait Portfolio.save
+        publications = dict(Portfolio.objects.filter(
+            utilisateur_id__in={utilisateur.pk for utilisateur in utilisateurs.values()}
+        ).values_list('utilisateur_id', 'date_publication'))
+        par_champs = defaultdict(dict)
+        liaisons = {}
+        for enregistrement in lot:
+            utilisateur = utilisateurs[self._reference(enregistrement)]
+            valeurs = self._valeurs(Portfolio, enregistrement)
+            portfolio = Portfolio(utilisateur=utilisateur, **valeurs)
+            champs = set(valeurs)
+            # Le statut fourni fixe aussi la date de publication (écrite avec lui)
+            if 'statut' in valeurs:
+                champs.add('date_publication')
+                if portfolio.statut != 'publie':
+                    portfolio.date_publication = None
+                elif not portfolio.date_publication:
+                    portfolio.date_publication = publications.get(utilisateur.pk) or timezone.now()
+            par_champs[frozenset(champs)][utilisateur.pk] = portfolio
+            liaisons[utilisateur.pk] = {
+                relation: enregistrement[relation] for relation in RELATIONS if relation in enregistrement
+            }
+
+        allouer_slugs([portfolio for portfolios in par_champs.values() for portfolio in portfolios.values()])
+        for champs, portfolios in par_champs.items():
+            a_mettre_a_jour = sorted(champs - {'id_portfolio'})
+            if not a_mettre_a_jour:
+                Portfolio.objects.bulk_create(portfolios.values(), ignore_conflicts=True)
+                continue
+            Portfolio.objects.bulk_create(
+                portfolios.values(),
+                update_conflicts=True,
+                unique_fields=['utilisateur'],
+                update_fields=a_mettre_a_jour,
+            )
+
+        ids = dict(
+            Portfolio.objects.filter(utilisateur_id__in=liaisons).values_list('utilisateur_id', 'id_portfolio')
+        )
+        for relation in RELATIONS:
+            self._remplacer_liaisons(relation, {
+                ids[utilisateur_id]: (utilisateur_id, set(relations[relation]))
+                for utilisateur_id, relations in liaisons.items() if relation in relations
+            })
+        self._contenu_modifie(ids.values())
+
+    def _remplacer_liaisons(self, relation, par_portfolio):
+        """Remplacer les liaisons `relation` des portfolios ({id: (utilisateur, ids d'éléments)})"""
+        if not par_portfolio:
+            return
+        modele = Portfolio._meta.get_field(relation).related_model
+        demandes = set().union(*(elements for _, elements in par_portfolio.values()))
+        proprietaires = dict(
+            modele.objects.filter(pk__in=demandes).values_list(modele._meta.pk.name, 'utilisateur_id')
+        )
+        invalides = sorted(
+            pk for utilisateur_id, elements in par_portfolio.values()
+            for pk in elements if proprietaires.get(pk) != utilisateur_id
+        )
+        if invalides:
+            raise ChargementInvalide(
+                f"{relation.capitalize()} introuvables ou n'appartenant pas à l'utilisateur du portfolio : "
+                f"{', '.join(map(str, invalides[:10]))}"
+            )
+
+        through = getattr(Portfolio, relation).through
+        colonne = through._meta.get_field(modele._meta.model_name).attname
+        through.objects.filter(portfolio_id__in=par_portfolio).delete()
+        through.objects.bulk_create([
+            through(portfolio_id=portfolio_id, **{colonne: pk})
+            for portfolio_id, (_, elements) in par_portfolio.items()
+            for pk in elements
+        ], batch_size=self.taille_lot)
@@ -0,0 +1,175 @@
+"""
+Chronométrage des requêtes : en-tête Server-Timing et ligne de journal JSON.
+
+ServerTimingMiddleware mesure une requête sur PORTFOLIO_TIMING_TAUX ; les
+autres ne paient qu'un tirage aléatoire et, dans les mixins, une lecture de
+ContextVar par authentification ou objet sérialisé. Pour une requête
+échantillonnée :
+- sql : temps et nombre des requêtes SQL (connection.execute_wrapper) ;
+- auth : authentification DRF (AuthentificationMesureeMixin sur les vues) ;
+- serialisation : to_representation des serializers (SerialisationMesureeMixin) ;
+- vue : du début de la vue au retour de sa réponse ;
+- rendu : rendu de la réponse DRF (JSONRenderer) ;
+- total : la requête entière, middlewares compris.
+
+Les étapes se recouvrent (le SQL d'une vue compte aussi dans `vue`), comme
+le permet Server-Timing. Les navigateurs les affichent dans l'onglet réseau
+(Timing) ; en cross-origin, Timing-Allow-Origin est envoyé aux origines CORS.
+"""
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('portfolio.chronometrage')
+
+# Mesure de la requête en cours (None si elle n'est pas échantillonnée)
+_mesure = ContextVar('portfolio_mesure', default=None)
+
+# Ordre des étapes dans l'en-tête et le journal
+ETAPES = ('total', 'vue', 'auth', 'sql', 'serialisation', 'rendu')
+
+
+class Mesure:
+    def __init__(self):
+        self.durees = defaultdict(float)
+        self.requetes_sql = 0
+        self.en_cours = set()
+        self.debut_vue = None
+
+    def ajouter(self, etape, duree):
+        self.durees[etape] += duree
+
+    def chronometrer_sql(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.ajouter('sql', time.perf_counter() - debut)
+            self.requetes_sql += 1
+
+    def terminer_vue(self):
+        if self.debut_vue is not None:
+            self.ajouter('vue', time.perf_counter() - self.debut_vue)
+            self.debut_vue = None
+
+    def millisecondes(self):
+        return {etape: round(self.durees[etape] * 1000, 3) for etape in ETAPES if etape in self.durees}
+
+    def server_timing(self):
+        entrees = []
+        for etape, duree in self.millisecondes().items():
+            description = f';desc="{self.requetes_sql} requetes"' if etape == 'sql' else ''
+            entrees.append(f'{etape}{description};dur={duree}')
+        return ', '.join(entrees)
+
+
+def mesure_courante():
+    return _mesure.get()
+
+
+@contextmanager
+def chronometrer(etape):
+    """Ajouter la durée du bloc à `etape` (sans effet hors échantillon, appels imbriqués comptés une fois)"""
+    mesure = _mesure.get()
+    if mesure is None or etape in mesure.en_cours:
+        yield
+        return
+    mesure.en_cours.add(etape)
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        mesure.ajouter(etape, time.perf_counter() - debut)
+        mesure.en_cours.discard(etape)
+
+
+class AuthentificationMesureeMixin:
+    """Mixin de vue DRF : temps d'authentification compté dans `auth`"""
+
+    def perform_authentication(self, request):
+        if _mesure.get() is None:
+            super().perform_authentication(request)
+            return
+        with chronometrer('auth'):
+            super().perform_authentication(request)
+
+
+class SerialisationMesureeMixin:
+    """Mixin de serializer : temps de représentation compté dans `serialisation`"""
+
+    def to_representation(self, instance):
+        # Appelé pour chaque objet, imbriqués compris : rien à construire hors échantillon
+        if _mesure.get() is None:
+            return super().to_representation(instance)
+        with chronometrer('serialisation'):
+            return super().to_representation(instance)
+
+
+def _echantillonnee():
+    taux = getattr(settings, 'PORTFOLIO_TIMING_TAUX', 0)
+    return taux >= 1 or (taux > 0 and random.random() < taux)
+
+
+class ServerTimingMiddleware:
+    """À placer en tête de MIDDLEWARE pour que `total` couvre les autres middlewares"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _echantillonnee():
+            return self.get_response(request)
+
+        mesure = Mesure()
+        jeton = _mesure.set(mesure)
+        debut = time.perf_counter()
+        try:
+            with ExitStack() as pile:
+                for connexion in connections.all():
+                    pile.enter_context(connexion.execute_wrapper(mesure.chronometrer_sql))
+                response = self.get_response(request)
+        finally:
+            _mesure.reset(jeton)
+        # Réponse sans rendu DRF (HttpResponse, fichier) : la vue se termine ici
+        mesure.terminer_vue()
+        mesure.ajouter('total', time.perf_counter() - debut)
+
+        response['Server-Timing'] = mesure.server_timing()
+        origine = request.headers.get('Origin')
+        if origine and origine in getattr(settings, 'CORS_ALLOWED_ORIGINS', ()):
+            response['Timing-Allow-Origin'] = origine
+
+        logger.info(json.dumps({
+            'methode': request.method,
+            'chemin': request.path,
+            'vue': getattr(request.resolver_match, 'view_name', None),
+            'statut': response.status_code,
+            'requetes_sql': mesure.requetes_sql,
+            **{f'{etape}_ms': duree for etape, duree in mesure.millisecondes().items()},
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mesure = _mesure.get()
+        if mesure is not None:
+            mesure.debut_vue = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        mesure = _mesure.get()
+        if mesure is None:
+            return response
+        mesure.terminer_vue()
+        debut = time.perf_counter()
+
+        def fin_rendu(reponse_rendue):
+            mesure.ajouter('rendu', time.perf_counter() - debut)
+
+        response.add_post_render_callback(fin_rendu)
+        return response
@@ -0,0 +1,111 @@
+"""
+Compteur de vues en écriture différée.
+
+Les vues sont cumulées en mémoire par portfolio puis appliquées périodiquement
+par un UPDATE ... SET vue_count = vue_count + n, ce qui évite une écriture
+(et un verrou SQLite) par consultation et ne perd pas d'incréments concurrents.
+L'intervalle se règle avec le setting PORTFOLIO_VUES_FLUSH_INTERVAL (secondes,
+0 pour écrire immédiatement).
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+INTERVALLE_PAR_DEFAUT = 10
+
+
+class CompteurVues:
+    def __init__(self, intervalle=None):
+        self._intervalle = intervalle
+        self._verrou = threading.Lock()
+        self._en_attente = Counter()
+        self._minuterie = None
+    
+    @property
+    def intervalle(self):
+        """Intervalle d'écriture en secondes (réglable à chaud)"""
+        if self._intervalle is not None:
+            return self._intervalle
+        return getattr(settings, 'PORTFOLIO_VUES_FLUSH_INTERVAL', INTERVALLE_PAR_DEFAUT)
+    
+    @intervalle.setter
+    def intervalle(self, valeur):
+        self._intervalle = valeur
+    
+    def incrementer(self, portfolio_id, nombre=1):
+        """Comptabiliser `nombre` vues pour un portfolio"""
+        if self.intervalle <= 0:
+            self._appliquer({portfolio_id: nombre})
+            return
+        
+        with self._verrou:
+            self._en_attente[portfolio_id] += nombre
+            self._armer()
+    
+    def en_attente(self, portfolio_id):
+        """Nombre de vues pas encore écrites en base pour un portfolio"""
+        with self._verrou:
+            return self._en_attente.get(portfolio_id, 0)
+    
+    def vider(self):
+        """Écrire en base toutes les vues en attente"""
+        with self._verrou:
+            increments = dict(self._en_attente)
+            self._en_attente.clear()
+        if not increments:
+            return
+        
+        try:
+            self._appliquer(increments)
+        except Exception:
+            # Remettre les vues en attente plutôt que de les perdre
+            with self._verrou:
+                self._en_attente.update(increments)
+            raise
+    
+    def _appliquer(self, increments):
+        from .models import Portfolio
+        
+        # Un UPDATE par valeur d'incrément distincte
+        par_increment = defaultdict(list)
+        for portfolio_id, nombre in increments.items():
+            par_increment[nombre].append(portfolio_id)
+        
+        for nombre, portfolio_ids in par_increment.items():
+            Portfolio.objects.filter(id_portfolio__in=portfolio_ids).update(
+                vue_count=F('vue_count') + nombre
+            )
+    
+    def _armer(self):
+        # Appelé avec le verrou
+        if self._minuterie is None:
+            self._minuterie = threading.Timer(self.intervalle, self._flush_periodique)
+            self._minuterie.daemon = True
+            self._minuterie.start()
+    
+    def _flush_periodique(self):
+        with self._verrou:
+            self._minuterie = None
+        try:
+            self.vider()
+        except Exception:
+            logger.exception("Échec de l'écriture des vues en attente")
+        finally:
+            # La connexion ouverte par ce thread ne sera pas réutilisée
+            connections.close_all()
+            # Vues remises en attente après un échec : réessayer au prochain intervalle
+            with self._verrou:
+                if self._en_attente:
+                    self._armer()
+
+
+compteur_vues = CompteurVues()
+
+atexit.register(compteur_vues.vider)
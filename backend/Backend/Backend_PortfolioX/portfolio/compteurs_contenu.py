@@ -0,0 +1,63 @@
+"""
+Compteurs de contenu dénormalisés sur Portfolio (nb_contacts, nb_projets_publics, ...).
+
+Ils sont recalculés par un seul UPDATE à sous-requêtes sur les tables de
+liaison, appelé par les signaux à chaque modification d'un élément ou d'une
+liaison (voir signals.contenu_modifie). Les modifications faites par
+queryset.update() sur les éléments ne passent pas par les signaux :
+la commande repair_portfolio_counters recalcule alors tous les compteurs.
+"""
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Portfolio
+
+# colonne -> (relation, filtre sur l'élément)
+COMPTEURS = {
+    'nb_contacts': ('contacts', {}),
+    'nb_contacts_principaux': ('contacts', {'est_principal': True}),
+    'nb_competences': ('competences', {}),
+    'nb_competences_visibles': ('competences', {'est_visible': True}),
+    'nb_projets': ('projets', {}),
+    'nb_projets_publics': ('projets', {'est_public': True}),
+}
+
+TAILLE_LOT = 1000
+
+
+def expressions_compteurs():
+    """{colonne: sous-requête COUNT} à utiliser dans un update() de Portfolio"""
+    expressions = {}
+    for colonne, (relation, filtres) in COMPTEURS.items():
+        through = getattr(Portfolio, relation).through
+        champ = getattr(Portfolio, relation).field.m2m_reverse_field_name()
+        liens = through.objects.filter(portfolio_id=OuterRef('pk'))
+        if filtres:
+            liens = liens.filter(**{f'{champ}__{cle}': valeur for cle, valeur in filtres.items()})
+        compte = liens.values('portfolio_id').annotate(total=Count('*')).values('total')
+        expressions[colonne] = Coalesce(Subquery(compte), 0)
+    return expressions
+
+
+def recalculer_compteurs(portfolio_ids, **autres_champs):
+    """Recalculer les compteurs des portfolios donnés (un seul UPDATE)"""
+    portfolio_ids = list(portfolio_ids)
+    if not portfolio_ids:
+        return 0
+    return Portfolio.objects.filter(pk__in=portfolio_ids).update(
+        **expressions_compteurs(), **autres_champs
+    )
+
+
+def recalculer_tous_les_compteurs(taille_lot=TAILLE_LOT):
+    """Recalculer les compteurs de tous les portfolios, par lots ; retourne le nombre traité"""
+    total = 0
+    dernier = 0
+    while True:
+        ids = list(
+            Portfolio.objects.filter(pk__gt=dernier).order_by('pk').values_list('pk', flat=True)[:taille_lot]
+        )
+        if not ids:
+            return total
+        total += recalculer_compteurs(ids)
+        dernier = ids[-1]
@@ -0,0 +1,67 @@
+"""
+Requêtes conditionnelles (ETag / Last-Modified) et politique Cache-Control.
+
+Les validateurs sont calculés à partir d'un horodatage lu avec une requête
+values() (date_modification du portfolio, date_generation du snapshot), sans
+charger le portfolio ni ses éléments. Si le client possède déjà la version
+courante, la vue répond 304 sans sérialiser.
+
+date_modification est mise à jour par les signaux lorsqu'un contact, une
+compétence ou un projet du portfolio change (voir signals.py). Le compteur de
+vues ne fait pas partie des validateurs.
+"""
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def etag(*parties):
+    """ETag faible construit à partir d'identifiants et d'horodatages"""
+    valeurs = [
+        str(int(partie.timestamp() * 1_000_000)) if hasattr(partie, 'timestamp') else str(partie)
+        for partie in parties
+    ]
+    return 'W/"%s"' % '-'.join(valeurs)
+
+
+class ReponseConditionnelleMixin:
+    """
+    Mixin pour les vues servant des GET conditionnels.
+
+    `cache_control` : directives Cache-Control appliquées aux réponses GET
+    réussies (200 et 304) de la vue, ex. {'public': True, 'max_age': 60}.
+    Sur un ViewSet, `cache_control_actions` ({action: directives}) remplace
+    `cache_control` ; les actions absentes n'ont pas de directive.
+    """
+    cache_control = {}
+    cache_control_actions = None
+
+    def get_cache_control(self):
+        if self.cache_control_actions is not None:
+            return self.cache_control_actions.get(getattr(self, 'action', None), {})
+        return self.cache_control
+
+    def reponse_non_modifiee(self, request, etag=None, derniere_modification=None):
+        """Réponse 304 si les validateurs du client sont à jour, sinon None"""
+        timestamp = int(derniere_modification.timestamp()) if derniere_modification else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            return None
+        self.appliquer_validateurs(response, etag, derniere_modification)
+        return response
+
+    def appliquer_validateurs(self, response, etag=None, derniere_modification=None):
+        if response.status_code not in (200, 304):
+            return response
+        if etag:
+            response['ETag'] = etag
+        if derniere_modification:
+            response['Last-Modified'] = http_date(derniere_modification.timestamp())
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+            directives = self.get_cache_control()
+            if directives:
+                patch_cache_control(response, **directives)
+        return response
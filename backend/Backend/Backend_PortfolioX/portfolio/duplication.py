@@ -0,0 +1,94 @@
+"""
+Duplication d'un portfolio pour un autre utilisateur.
+
+Les contacts, compétences et projets sont copiés avec bulk_create, puis les
+lignes des tables de liaison en un bulk_create par relation : le nombre de
+requêtes ne dépend pas du nombre d'éléments. Les fichiers (photos, images de
+projet) sont partagés par référence : la copie pointe vers le même fichier
+stocké (ainsi que ses variantes), rien n'est ré-uploadé ni régénéré ; la
+copie ajoute une référence à chaque blob partagé (voir storage.py).
+
+bulk_create n'émet ni post_save ni m2m_changed : les compteurs, le snapshot
+et l'index sont mis à jour explicitement via signals.contenu_modifie.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from .images import CHAMPS_IMAGES
+from .models import Contact, Competence, Projet, Portfolio
+from .signals import contenu_modifie
+from .storage import ajuster_references
+
+CHAMPS_PORTFOLIO = [
+    'description', 'titre_professionnel', 'biographie', 'photo_profil', 'photo_template', 'variantes_images',
+    'theme_couleur', 'layout_type', 'meta_description', 'meta_keywords',
+    'afficher_photo', 'afficher_competences', 'afficher_projets', 'afficher_contacts',
+    'afficher_formations', 'afficher_experiences',
+    'formations', 'experiences', 'langues', 'certifications', 'interets',
+]
+
+# relation -> (modèle, champs copiés)
+ELEMENTS = {
+    'contacts': (Contact, [
+        'type_contact', 'valeur_contact', 'est_principal', 'ordre',
+    ]),
+    'competences': (Competence, [
+        'nom_competence', 'niveau_competence', 'categorie', 'annees_experience',
+        'description', 'est_visible', 'ordre',
+    ]),
+    'projets': (Projet, [
+        'titre_projet', 'description_projet', 'langage_projet', 'lien_projet', 'lien_github',
+        'image_projet', 'variantes_images', 'technologies', 'date_realisation', 'est_public', 'est_termine', 'ordre',
+    ]),
+}
+
+TAILLE_LOT = 500
+
+
+def _copier(source, champs, **valeurs):
+    # Pour un FileField, getattr renvoie le FieldFile : on ne garde que son nom
+    # (référence au fichier existant)
+    for champ in champs:
+        valeur = getattr(source, champ)
+        valeurs[champ] = getattr(valeur, 'name', valeur) if hasattr(valeur, 'storage') else valeur
+    return type(source)(**valeurs)
+
+
+@transaction.atomic
+def dupliquer_portfolio(portfolio, utilisateur):
+    """Créer pour `utilisateur` une copie brouillon de `portfolio` et de ses éléments"""
+    copie = _copier(
+        portfolio, CHAMPS_PORTFOLIO,
+        utilisateur=utilisateur,
+        titre=f"{portfolio.titre} (Copie)",
+        statut='brouillon',
+    )
+    copie.save()
+
+    # bulk_create n'émet pas post_save : les références aux fichiers partagés
+    # par les éléments copiés sont comptées ici
+    fichiers = Counter()
+    for relation, (modele, champs) in ELEMENTS.items():
+        originaux = list(getattr(portfolio, relation).all())
+        if not originaux:
+            continue
+        copies = modele.objects.bulk_create(
+            [_copier(original, champs, utilisateur=utilisateur) for original in originaux],
+            batch_size=TAILLE_LOT,
+        )
+        for element in copies:
+            for champ in CHAMPS_IMAGES.get(modele, ()):
+                fichiers[getattr(element, champ).name] += 1
+
+        through = getattr(Portfolio, relation).through
+        champ = getattr(Portfolio, relation).field.m2m_reverse_field_name()
+        through.objects.bulk_create(
+            [through(**{'portfolio_id': copie.pk, f'{champ}_id': element.pk}) for element in copies],
+            batch_size=TAILLE_LOT,
+        )
+
+    ajuster_references(fichiers)
+    contenu_modifie([copie.pk])
+    copie.refresh_from_db()
+    return copie
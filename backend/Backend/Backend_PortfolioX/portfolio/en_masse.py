@@ -0,0 +1,206 @@
+"""
+Opérations en masse sur les contacts, compétences et projets.
+
+POST   /<elements>/bulk/  [{...}, ...]                  - créer
+PATCH  /<elements>/bulk/  [{"<clé primaire>": id, ...}]  - modifier partiellement
+DELETE /<elements>/bulk/  [id, ...]                     - supprimer
+
+Tout le lot est validé avant d'écrire (tout ou rien) : les éléments sont
+validés un par un sans requête, puis les contrôles portant sur l'ensemble
+(limites, unicité) sont faits en une requête par le hook `valider_lot` du
+serializer. L'écriture se fait en un bulk_create / bulk_update / DELETE dans
+une transaction, et la réponse donne un résultat par élément, dans l'ordre
+du lot.
+"""
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .signals import contenu_modifie, portfolios_lies, signaux_elements_suspendus
+
+TAILLE_MAX_LOT = 500
+
+
+def _identifiants(valeurs):
+    """Garder les identifiants entiers, None pour toute autre valeur"""
+    return [
+        valeur if isinstance(valeur, int) and not isinstance(valeur, bool) else None
+        for valeur in valeurs
+    ]
+
+
+class OperationsEnMasseMixin:
+    """Action `bulk` pour un ModelViewSet d'éléments appartenant à l'utilisateur"""
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get('ids' if request.method == 'DELETE' else 'items')
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Le corps de la requête doit être une liste non vide"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > TAILLE_MAX_LOT:
+            return Response(
+                {"error": f"Au plus {TAILLE_MAX_LOT} éléments par requête"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.method == 'POST':
+            return self.creer_en_masse(items)
+        if request.method == 'PATCH':
+            return self.modifier_en_masse(items)
+        return self.supprimer_en_masse(items)
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    def valider_en_masse(self, items, instances=None):
+        """Retourne (serializers, {index: erreurs})"""
+        serializer_class = self.get_serializer_class()
+        context = {**self.get_serializer_context(), 'en_masse': True}
+        serializers = [
+            serializer_class(
+                instance=instances[index] if instances else None,
+                data=item,
+                partial=instances is not None,
+                context=context,
+            )
+            for index, item in enumerate(items)
+        ]
+        erreurs = {
+            index: serializer.errors
+            for index, serializer in enumerate(serializers)
+            if not serializer.is_valid()
+        }
+        if not erreurs and hasattr(serializer_class, 'valider_lot'):
+            erreurs = serializer_class.valider_lot(
+                [serializer.validated_data for serializer in serializers],
+                self.request.user,
+                instances,
+            )
+        return serializers, erreurs
+
+    def reponse_erreurs(self, nombre, erreurs):
+        resultats = [
+            {'index': index, 'statut': 'invalide', 'erreurs': erreurs[index]}
+            if index in erreurs else {'index': index, 'statut': 'valide'}
+            for index in range(nombre)
+        ]
+        return Response({'resultats': resultats}, status=status.HTTP_400_BAD_REQUEST)
+
+    def reponse_succes(self, statut_element, objets, code):
+        donnees = self.get_serializer(objets, many=True).data
+        return Response({
+            'resultats': [
+                {'index': index, 'statut': statut_element, 'objet': objet}
+                for index, objet in enumerate(donnees)
+            ]
+        }, status=code)
+
+    def preparer(self, objets):
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'preparer_lot'):
+            serializer_class.preparer_lot(objets, self.request.user)
+
+    def conflit(self):
+        return Response(
+            {"error": "Le lot entre en conflit avec des données existantes, rien n'a été enregistré"},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    # ------------------------------------------------------------------
+    # Opérations
+    # ------------------------------------------------------------------
+
+    def creer_en_masse(self, items):
+        serializers, erreurs = self.valider_en_masse(items)
+        if erreurs:
+            return self.reponse_erreurs(len(items), erreurs)
+
+        modele = self.get_queryset().model
+        objets = [
+            modele(**{**serializer.validated_data, 'utilisateur': self.request.user})
+            for serializer in serializers
+        ]
+        try:
+            with transaction.atomic():
+                self.preparer(objets)
+                # Les éléments créés ne sont liés à aucun portfolio : pas de signal à propager
+                modele.objects.bulk_create(objets)
+        except IntegrityError:
+            return self.conflit()
+        return self.reponse_succes('cree', objets, status.HTTP_201_CREATED)
+
+    def modifier_en_masse(self, items):
+        modele = self.get_queryset().model
+        cle = modele._meta.pk.name
+        ids = _identifiants([item.get(cle) if isinstance(item, dict) else None for item in items])
+        fournis = [pk for pk in ids if pk is not None]
+        if len(set(fournis)) != len(fournis):
+            return Response(
+                {"error": "Un même élément apparaît plusieurs fois dans le lot"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Seuls les éléments de l'utilisateur sont trouvés (get_queryset)
+        trouves = self.get_queryset().in_bulk(fournis)
+        introuvables = {
+            index: {cle: ["Élément introuvable"]}
+            for index, pk in enumerate(ids) if pk not in trouves
+        }
+        if introuvables:
+            return self.reponse_erreurs(len(items), introuvables)
+
+        instances = [trouves[pk] for pk in ids]
+        serializers, erreurs = self.valider_en_masse(items, instances)
+        if erreurs:
+            return self.reponse_erreurs(len(items), erreurs)
+
+        champs = set()
+        for instance, serializer in zip(instances, serializers):
+            for champ, valeur in serializer.validated_data.items():
+                setattr(instance, champ, valeur)
+                champs.add(champ)
+
+        try:
+            with transaction.atomic():
+                self.preparer(instances)
+                if champs:
+                    modele.objects.bulk_update(instances, sorted(champs))
+                # bulk_update n'émet pas de signal
+                contenu_modifie(portfolios_lies(modele, ids), [(modele, pk) for pk in ids])
+        except IntegrityError:
+            return self.conflit()
+        return self.reponse_succes('modifie', instances, status.HTTP_200_OK)
+
+    def supprimer_en_masse(self, ids):
+        modele = self.get_queryset().model
+        ids = _identifiants(ids)
+        existants = set(
+            self.get_queryset().filter(pk__in=[pk for pk in ids if pk is not None])
+            .values_list('pk', flat=True)
+        )
+        introuvables = {
+            index: {'id': ["Élément introuvable"]}
+            for index, pk in enumerate(ids) if pk not in existants
+        }
+        if introuvables:
+            return self.reponse_erreurs(len(ids), introuvables)
+
+        with transaction.atomic():
+            portfolio_ids = portfolios_lies(modele, existants)
+            with signaux_elements_suspendus():
+                modele.objects.filter(pk__in=existants).delete()
+            contenu_modifie(portfolio_ids, [(modele, pk) for pk in existants])
+
+        return Response({
+            'resultats': [
+                {'index': index, 'statut': 'supprime', 'id': pk}
+                for index, pk in enumerate(ids)
+            ]
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,215 @@
+"""
+Export statique des portfolios publiés.
+
+Chaque portfolio publié est exporté dans PORTFOLIO_EXPORT_DIR/<slug>/ :
+- index.html : page rendue depuis le document public (templates/portfolio/export/) ;
+- data.json  : le document de PortfolioPublicDataAPIView (snapshot, voir snapshots.py) ;
+- media/     : les images et leurs variantes référencées par le document ;
+- export.json : date_modification du portfolio au moment de l'export.
+
+Un portfolio dont date_modification n'a pas changé depuis son dernier export
+n'est pas reconstruit. Les médias sont liés en dur (os.link) depuis
+MEDIA_ROOT quand c'est possible, copiés sinon. Un export est construit dans
+un dossier temporaire puis mis en place par renommage : un serveur statique
+ne voit jamais un export à moitié écrit.
+
+export_static_site reconstruit les exports dans un pool de processus ;
+avec PORTFOLIO_EXPORT_AUTO, les portfolios modifiés sont aussi réexportés
+après chaque commit (voir signals.py).
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils._os import safe_join
+
+from .models import Portfolio
+from .snapshots import obtenir_snapshot
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE = 'portfolio/export/index.html'
+DOSSIER_MEDIAS = 'media'
+METADONNEES = 'export.json'
+# Dossier des correspondances id de portfolio -> slug exporté
+DOSSIER_IDS = '.ids'
+
+
+def dossier_export():
+    chemin = Path(getattr(settings, 'PORTFOLIO_EXPORT_DIR', settings.BASE_DIR / 'export'))
+    (chemin / DOSSIER_IDS).mkdir(parents=True, exist_ok=True)
+    return chemin
+
+
+def export_automatique():
+    return getattr(settings, 'PORTFOLIO_EXPORT_AUTO', False)
+
+
+def _slug_exporte(racine, portfolio_id):
+    try:
+        return (racine / DOSSIER_IDS / str(portfolio_id)).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def date_exportee(portfolio_id):
+    """date_modification (ISO) du portfolio lors de son dernier export, ou None"""
+    racine = dossier_export()
+    slug = _slug_exporte(racine, portfolio_id)
+    if slug is None:
+        return None
+    try:
+        return json.loads((racine / slug / METADONNEES).read_text())['date_modification']
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+# ============================================================================
+# MÉDIAS
+# ============================================================================
+
+def _motif_medias():
+    # URL d'un média dans le document : jusqu'au prochain guillemet, espace ou virgule (srcset)
+    return re.compile(re.escape(settings.MEDIA_URL) + r'([^\s",\\]+)')
+
+
+def _fichier_media(nom):
+    try:
+        chemin = safe_join(settings.MEDIA_ROOT, nom)
+    except SuspiciousFileOperation:
+        return None
+    return chemin if os.path.isfile(chemin) else None
+
+
+def _lier(source, destination):
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        # Autre système de fichiers, ou liens durs non pris en charge
+        shutil.copy2(source, destination)
+
+
+def localiser_medias(contenu, dossier):
+    """
+    Lier dans `dossier`/media les fichiers référencés par le document JSON et
+    retourner le document dont les URL pointent vers ces copies (relatives)
+    """
+    def remplacer(correspondance):
+        nom = correspondance.group(1)
+        source = _fichier_media(nom)
+        if source is None:
+            return correspondance.group(0)
+        destination = dossier / DOSSIER_MEDIAS / nom
+        if not destination.exists():
+            _lier(source, destination)
+        return f'{DOSSIER_MEDIAS}/{nom}'
+
+    return _motif_medias().sub(remplacer, contenu)
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def _mettre_en_place(construction, cible):
+    """Remplacer `cible` par `construction` par renommages"""
+    ancien = None
+    if cible.exists():
+        ancien = Path(tempfile.mkdtemp(dir=cible.parent, prefix='.ancien-'))
+        cible.rename(ancien / cible.name)
+    construction.rename(cible)
+    if ancien is not None:
+        shutil.rmtree(ancien, ignore_errors=True)
+
+
+def retirer_export(portfolio_id):
+    """Supprimer l'export d'un portfolio ; retourne True s'il existait"""
+    racine = dossier_export()
+    slug = _slug_exporte(racine, portfolio_id)
+    if slug is None:
+        return False
+    shutil.rmtree(racine / slug, ignore_errors=True)
+    (racine / DOSSIER_IDS / str(portfolio_id)).unlink(missing_ok=True)
+    return True
+
+
+def exporter_portfolio(portfolio_id, forcer=False):
+    """
+    Exporter un portfolio ; retourne 'exporte', 'a_jour' (export déjà à jour)
+    ou 'retire' (portfolio supprimé ou non publié)
+    """
+    portfolio = Portfolio.objects.filter(
+        id_portfolio=portfolio_id, statut='publie'
+    ).values('slug', 'date_modification').first()
+    if portfolio is None:
+        retirer_export(portfolio_id)
+        return 'retire'
+
+    racine = dossier_export()
+    date_modification = portfolio['date_modification'].isoformat()
+    ancien_slug = _slug_exporte(racine, portfolio_id)
+    if (not forcer and ancien_slug == portfolio['slug']
+            and date_exportee(portfolio_id) == date_modification):
+        return 'a_jour'
+
+    contenu = obtenir_snapshot(portfolio_id)
+    if contenu is None:
+        retirer_export(portfolio_id)
+        return 'retire'
+
+    construction = Path(tempfile.mkdtemp(dir=racine, prefix='.construction-'))
+    try:
+        document = localiser_medias(contenu.decode('utf-8'), construction)
+        donnees = json.loads(document)
+        (construction / 'data.json').write_text(document, encoding='utf-8')
+        (construction / 'index.html').write_text(render_to_string(TEMPLATE, donnees), encoding='utf-8')
+        (construction / METADONNEES).write_text(json.dumps({
+            'portfolio_id': portfolio_id,
+            'slug': portfolio['slug'],
+            'date_modification': date_modification,
+            'date_export': timezone.now().isoformat(),
+        }), encoding='utf-8')
+        construction.chmod(0o755)
+        _mettre_en_place(construction, racine / portfolio['slug'])
+    except BaseException:
+        shutil.rmtree(construction, ignore_errors=True)
+        raise
+
+    if ancien_slug and ancien_slug != portfolio['slug']:
+        shutil.rmtree(racine / ancien_slug, ignore_errors=True)
+    (racine / DOSSIER_IDS / str(portfolio_id)).write_text(portfolio['slug'])
+    return 'exporte'
+
+
+def exporter_portfolios(portfolio_ids):
+    """
+    Réexporter les portfolios modifiés (après le commit, si PORTFOLIO_EXPORT_AUTO).
+    Une erreur d'export (disque, gabarit) est journalisée sans interrompre les
+    autres exports ni les traitements suivants : export_static_site rattrape
+    les exports manqués.
+    """
+    if not export_automatique():
+        return
+    for portfolio_id in portfolio_ids:
+        try:
+            exporter_portfolio(portfolio_id)
+        except Exception:
+            logger.exception("Échec de l'export statique du portfolio %s", portfolio_id)
+
+
+def initialiser_processus():
+    """Initialisation d'un processus du pool d'export"""
+    import django
+    django.setup()
+    # Ne pas réutiliser les connexions héritées du processus parent
+    connections.close_all()
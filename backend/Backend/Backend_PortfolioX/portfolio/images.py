@@ -0,0 +1,234 @@
+"""
+Variantes des images envoyées (photos de portfolio, images de projet).
+
+Après l'enregistrement d'une image, des versions redimensionnées aux largeurs
+PORTFOLIO_IMAGE_LARGEURS sont générées dans chacun des formats
+PORTFOLIO_IMAGE_FORMATS (WebP, AVIF si Pillow sait l'encoder), à côté du
+fichier d'origine : <dossier>/variantes/<nom>-<largeur>w.<format>. Le
+traitement tourne dans un pool de PORTFOLIO_IMAGE_WORKERS threads, hors du
+thread de la requête (0 = synchrone, après le commit).
+
+Les noms des variantes sont stockés dans le champ JSON `variantes_images` du
+modèle, avec le nom du fichier source : une variante dont la source ne
+correspond plus à l'image actuelle est ignorée jusqu'à sa régénération.
+Les variantes d'un blob adressé par contenu (voir storage.py) sont partagées
+par tous les enregistrements qui le référencent et ne sont générées qu'une fois.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from PIL import Image, ImageOps, features
+
+from .models import Projet, Portfolio
+from .storage import adresse_par_contenu
+
+logger = logging.getLogger(__name__)
+
+# Modèle -> champs image traités
+CHAMPS_IMAGES = {
+    Projet: ('image_projet',),
+    Portfolio: ('photo_profil', 'photo_template'),
+}
+
+LARGEURS_PAR_DEFAUT = [320, 640, 1280]
+FORMATS_PAR_DEFAUT = ['webp', 'avif']
+QUALITE_PAR_DEFAUT = 80
+WORKERS_PAR_DEFAUT = 2
+
+_pool = None
+_verrou_pool = threading.Lock()
+
+
+def largeurs():
+    return sorted(getattr(settings, 'PORTFOLIO_IMAGE_LARGEURS', LARGEURS_PAR_DEFAUT))
+
+
+def formats():
+    """Formats demandés que Pillow sait encoder ici"""
+    demandes = getattr(settings, 'PORTFOLIO_IMAGE_FORMATS', FORMATS_PAR_DEFAUT)
+    return [format_ for format_ in demandes if features.check(format_)]
+
+
+def largeurs_cibles(largeur_originale):
+    """Largeurs à produire pour une image, sans jamais l'agrandir"""
+    cibles = [largeur for largeur in largeurs() if largeur < largeur_originale]
+    if len(cibles) < len(largeurs()):
+        cibles.append(largeur_originale)
+    return cibles
+
+
+def nom_variante(nom_source, largeur, format_):
+    dossier, fichier = os.path.split(nom_source)
+    racine = os.path.splitext(fichier)[0]
+    return os.path.join(dossier, 'variantes', f'{racine}-{largeur}w.{format_}')
+
+
+# ============================================================================
+# GÉNÉRATION
+# ============================================================================
+
+# Orientations EXIF qui échangent largeur et hauteur
+ORIENTATIONS_PIVOTEES = {5, 6, 7, 8}
+
+
+def _charger(fichier):
+    """Décoder l'image source, orientée et en RGB(A)"""
+    with fichier.storage.open(fichier.name, 'rb') as contenu:
+        image = Image.open(contenu)
+        # JPEG : décoder directement à une échelle réduite quand c'est possible
+        # (carré : l'orientation EXIF peut encore échanger les dimensions)
+        image.draft('RGB', (largeurs()[-1], largeurs()[-1]))
+        image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    return image
+
+
+def generer_variantes(fichier, forcer=False):
+    """
+    Produire les variantes d'un FieldFile ; retourne la description stockée
+    dans variantes_images ({'source', 'largeur', 'formats': {format: {largeur: nom}}})
+    """
+    storage = fichier.storage
+    # Un blob adressé par contenu est partagé : ses variantes existantes sont à jour
+    reutilisables = adresse_par_contenu(fichier.name) and not forcer
+
+    with storage.open(fichier.name, 'rb') as contenu:
+        with Image.open(contenu) as entete:
+            pivotee = entete.getexif().get(0x0112) in ORIENTATIONS_PIVOTEES
+            largeur_originale = entete.height if pivotee else entete.width
+    image = None
+
+    resultat = {}
+    for largeur in largeurs_cibles(largeur_originale):
+        redimensionnee = None
+        for format_ in formats():
+            nom = nom_variante(fichier.name, largeur, format_)
+            if storage.exists(nom):
+                if reutilisables:
+                    resultat.setdefault(format_, {})[str(largeur)] = nom
+                    continue
+                storage.delete(nom)
+
+            if image is None:
+                image = _charger(fichier)
+            if redimensionnee is None:
+                hauteur = max(1, round(image.height * largeur / image.width))
+                redimensionnee = image if (largeur, hauteur) == image.size else image.resize(
+                    (largeur, hauteur), Image.Resampling.LANCZOS
+                )
+            tampon = BytesIO()
+            redimensionnee.save(tampon, format=format_.upper(), quality=getattr(
+                settings, 'PORTFOLIO_IMAGE_QUALITE', QUALITE_PAR_DEFAUT
+            ))
+            resultat.setdefault(format_, {})[str(largeur)] = storage.save(nom, ContentFile(tampon.getvalue()))
+
+    return {'source': fichier.name, 'largeur': largeur_originale, 'formats': resultat}
+
+
+def champs_a_traiter(instance, forcer=False):
+    """Champs image dont les variantes manquent ou ne correspondent plus au fichier"""
+    variantes = instance.variantes_images or {}
+    return [
+        champ for champ in CHAMPS_IMAGES[type(instance)]
+        if forcer and getattr(instance, champ)
+        or variantes.get(champ, {}).get('source') != (getattr(instance, champ).name or None)
+    ]
+
+
+def traiter_images(modele, pk, forcer=False):
+    """Générer les variantes manquantes d'une instance ; retourne le nombre d'images traitées"""
+    from .signals import contenu_modifie, portfolios_lies
+
+    instance = modele.objects.filter(pk=pk).first()
+    if instance is None:
+        return 0
+
+    variantes = dict(instance.variantes_images or {})
+    traitees = 0
+    for champ in champs_a_traiter(instance, forcer):
+        fichier = getattr(instance, champ)
+        if not fichier:
+            variantes.pop(champ, None)
+            continue
+        try:
+            variantes[champ] = generer_variantes(fichier, forcer)
+            traitees += 1
+        except Exception:
+            logger.exception("Échec de la génération des variantes de %s", fichier.name)
+
+    # Ne rien écrire si une image a été remplacée entre-temps : son propre
+    # traitement est déjà planifié
+    sources = {champ: getattr(instance, champ).name for champ in CHAMPS_IMAGES[modele]}
+    if modele.objects.filter(pk=pk, **sources).update(variantes_images=variantes):
+        if modele is Projet:
+            contenu_modifie(portfolios_lies(Projet, [pk]), [(Projet, pk)])
+        else:
+            contenu_modifie([pk])
+    return traitees
+
+
+# ============================================================================
+# POOL DE TRAITEMENT
+# ============================================================================
+
+def _pool_images():
+    global _pool
+    with _verrou_pool:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PORTFOLIO_IMAGE_WORKERS', WORKERS_PAR_DEFAUT),
+                thread_name_prefix='portfolio-images',
+            )
+        return _pool
+
+
+def _tache(modele, pk):
+    try:
+        traiter_images(modele, pk)
+    except Exception:
+        logger.exception("Échec du traitement des images de %s %s", modele.__name__, pk)
+    finally:
+        # La connexion ouverte par ce thread ne sera pas réutilisée
+        connections.close_all()
+
+
+def planifier_traitement(modele, pk):
+    """Traiter les images d'une instance hors du thread de la requête"""
+    if getattr(settings, 'PORTFOLIO_IMAGE_WORKERS', WORKERS_PAR_DEFAUT) <= 0:
+        traiter_images(modele, pk)
+        return
+    _pool_images().submit(_tache, modele, pk)
+
+
+# ============================================================================
+# REPRÉSENTATION
+# ============================================================================
+
+def srcset(instance, champ, request=None):
+    """
+    {format: "url 320w, url 640w, ..."} des variantes à jour d'un champ image,
+    None si elles ne sont pas (encore) générées
+    """
+    fichier = getattr(instance, champ)
+    description = (instance.variantes_images or {}).get(champ)
+    if not fichier or not description or description.get('source') != fichier.name:
+        return None
+
+    def url(nom):
+        adresse = fichier.storage.url(nom)
+        return request.build_absolute_uri(adresse) if request else adresse
+
+    return {
+        format_: ', '.join(
+            f'{url(nom)} {largeur}w'
+            for largeur, nom in sorted(par_largeur.items(), key=lambda item: int(item[0]))
+        )
+        for format_, par_largeur in description['formats'].items()
+    }
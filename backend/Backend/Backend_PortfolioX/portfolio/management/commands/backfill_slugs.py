@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+
+from portfolio.models import Portfolio
+from portfolio.signals import planifier_mise_a_jour
+from portfolio.slugs import TENTATIVES, allouer_slugs
+
+class Command(BaseCommand):
+    help = 'Attribue un slug aux portfolios qui n\'en ont pas (portfolios importés)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre de portfolios traités par lot (défaut : 500)'
+        )
+
+    def handle(self, *args, **options):
+        taille_lot = options['batch_size']
+        total = 0
+
+        while True:
+            ids = list(
+                Portfolio.objects.filter(slug='').order_by('pk').values_list('pk', flat=True)[:taille_lot]
+            )
+            if not ids:
+                break
+            total += self.traiter_lot(ids)
+            self.stdout.write(f"  {total} slugs attribués...")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} slugs attribués"))
+
+    def traiter_lot(self, ids):
+        """Une requête de collisions et un bulk_update par lot ; réessayer si un slug a été pris entre-temps"""
+        for tentative in range(TENTATIVES):
+            portfolios = list(Portfolio.objects.select_related('utilisateur').filter(pk__in=ids, slug=''))
+            try:
+                with transaction.atomic():
+                    allouer_slugs(portfolios)
+                    Portfolio.objects.bulk_update(portfolios, ['slug'])
+                    planifier_mise_a_jour([portfolio.pk for portfolio in portfolios])
+                return len(portfolios)
+            except IntegrityError:
+                if tentative == TENTATIVES - 1:
+                    raise
+        return 0
@@ -0,0 +1,102 @@
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from portfolio.compteurs_contenu import recalculer_compteurs
+from portfolio.duplication import dupliquer_portfolio
+from portfolio.models import Contact, Competence, Projet, Portfolio
+from utilisateur.models import Utilisateur
+
+
+class AnnulerTransaction(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = 'Mesure la duplication d\'un portfolio selon le nombre d\'éléments (données jetables, transaction annulée)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tailles',
+            type=int,
+            nargs='+',
+            default=[10, 100, 1000],
+            help='Nombres de contacts, compétences et projets du portfolio source (défaut : 10 100 1000)'
+        )
+        parser.add_argument(
+            '--repetitions',
+            type=int,
+            default=3,
+            help='Nombre de duplications mesurées par taille (défaut : 3)'
+        )
+
+    def handle(self, *args, **options):
+        for taille in options['tailles']:
+            try:
+                with transaction.atomic():
+                    durees, requetes = self.mesurer(taille, options['repetitions'])
+                    raise AnnulerTransaction
+            except AnnulerTransaction:
+                pass
+
+            self.stdout.write(
+                f"  {taille:>5} éléments par relation : "
+                f"médiane {statistics.median(durees) * 1000:.1f} ms, "
+                f"max {max(durees) * 1000:.1f} ms, {requetes} requêtes"
+            )
+
+        self.stdout.write(self.style.SUCCESS('✅ Mesures terminées (aucune donnée conservée)'))
+
+    def creer_utilisateur(self):
+        return Utilisateur.objects.create(
+            email=f'benchmark-{uuid.uuid4().hex}@exemple.fr',
+            nom='Benchmark',
+            prenom='Duplication',
+        )
+
+    def creer_source(self, taille):
+        utilisateur = self.creer_utilisateur()
+        portfolio = Portfolio.objects.create(utilisateur=utilisateur, titre='Source', statut='publie')
+        elements = {
+            'contacts': [
+                Contact(type_contact='email', valeur_contact=f'contact{i}@exemple.fr',
+                        utilisateur=utilisateur, ordre=i)
+                for i in range(taille)
+            ],
+            'competences': [
+                Competence(nom_competence=f'Compétence {i}', niveau_competence='avance',
+                           utilisateur=utilisateur, ordre=i)
+                for i in range(taille)
+            ],
+            'projets': [
+                Projet(titre_projet=f'Projet {i}', description_projet='Description',
+                       langage_projet='Python', utilisateur=utilisateur,
+                       image_projet='projets/exemple.png', ordre=i)
+                for i in range(taille)
+            ],
+        }
+        for relation, objets in elements.items():
+            crees = type(objets[0]).objects.bulk_create(objets)
+            getattr(portfolio, relation).through.objects.bulk_create([
+                getattr(portfolio, relation).through(
+                    **{'portfolio_id': portfolio.pk,
+                       f'{getattr(Portfolio, relation).field.m2m_reverse_field_name()}_id': objet.pk}
+                )
+                for objet in crees
+            ])
+        recalculer_compteurs([portfolio.pk])
+        return portfolio
+
+    def mesurer(self, taille, repetitions):
+        source = self.creer_source(taille)
+        durees = []
+        for _ in range(repetitions):
+            utilisateur = self.creer_utilisateur()
+            with CaptureQueriesContext(connection) as contexte:
+                debut = time.perf_counter()
+                dupliquer_portfolio(source, utilisateur)
+                durees.append(time.perf_counter() - debut)
+        return durees, len(contexte.captured_queries)
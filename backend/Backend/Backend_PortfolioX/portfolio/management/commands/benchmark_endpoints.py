@@ -0,0 +1,187 @@
+import json
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from portfolio import urls as urls_portfolio
+from portfolio.models import Portfolio
+from portfolio.routes import PARAMETRES_REQUETE, parametres_route, routes_get
+
+
+def percentile(valeurs, rang):
+    if len(valeurs) == 1:
+        return valeurs[0]
+    return statistics.quantiles(valeurs, n=100, method='inclusive')[rang - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mesure les endpoints GET de portfolio/urls.py en processus (latence p50/p95/p99, '
+        'requêtes SQL, taille des réponses) et écrit les résultats en JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repetitions',
+            type=int,
+            default=20,
+            help='Nombre de requêtes mesurées par endpoint et par accès (défaut : 20)'
+        )
+        parser.add_argument(
+            '--echauffement',
+            type=int,
+            default=2,
+            help='Requêtes non mesurées avant chaque série (défaut : 2)'
+        )
+        parser.add_argument(
+            '--portfolio',
+            type=int,
+            help='Portfolio publié utilisé pour les routes paramétrées (défaut : le plus fourni)'
+        )
+        parser.add_argument(
+            '--routes',
+            nargs='+',
+            help='Mesurer seulement ces routes (noms d\'URL)'
+        )
+        parser.add_argument(
+            '--sans-cache',
+            action='store_true',
+            help='Désactiver le cache des réponses publiques (mesurer les vues elles-mêmes)'
+        )
+        parser.add_argument(
+            '--sortie',
+            help='Fichier JSON de résultats (défaut : sortie standard)'
+        )
+        parser.add_argument(
+            '--comparer',
+            help='Fichier JSON d\'une mesure précédente : afficher les écarts'
+        )
+
+    def handle(self, *args, **options):
+        portfolio = self.portfolio_de_reference(options['portfolio'])
+        valeurs = {
+            'portfolio': portfolio.pk,
+            'contact': portfolio.contacts.values_list('pk', flat=True).first(),
+            'competence': portfolio.competences.filter(est_visible=True).values_list('pk', flat=True).first(),
+            'projet': portfolio.projets.filter(est_public=True).values_list('pk', flat=True).first(),
+        }
+
+        reglages = {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver']}
+        if options['sans_cache']:
+            reglages['PORTFOLIO_CACHE_TIMEOUT'] = 0
+
+        resultats = []
+        with override_settings(**reglages):
+            for nom, parametres in routes_get(urls_portfolio.urlpatterns):
+                if options['routes'] and nom not in options['routes']:
+                    continue
+                kwargs = parametres_route(nom, parametres, valeurs)
+                try:
+                    url = reverse(f'{urls_portfolio.app_name}:{nom}', kwargs=kwargs)
+                except NoReverseMatch:
+                    # Paramètre non entier (uuid d'un téléversement) ou élément absent
+                    url = None
+                if kwargs is None or url is None:
+                    self.stderr.write(f'  {nom} ignorée (paramètres non disponibles)')
+                    continue
+                for acces in ('anonyme', 'authentifie'):
+                    client = APIClient(raise_request_exception=False)
+                    if acces == 'authentifie':
+                        client.force_authenticate(portfolio.utilisateur)
+                    resultats.append({
+                        'route': nom, 'url': url, 'acces': acces,
+                        **self.mesurer(client, url, PARAMETRES_REQUETE.get(nom, {}), options),
+                    })
+
+        rapport = {
+            'commit': self.commit(),
+            'date': timezone.now().isoformat(),
+            'base': connection.vendor,
+            'donnees': {
+                'portfolios': Portfolio.objects.count(),
+                'portfolio_de_reference': portfolio.pk,
+            },
+            'repetitions': options['repetitions'],
+            'cache': not options['sans_cache'],
+            'resultats': resultats,
+        }
+        document = json.dumps(rapport, indent=2, ensure_ascii=False)
+        if options['sortie']:
+            with open(options['sortie'], 'w', encoding='utf-8') as fichier:
+                fichier.write(document)
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {len(resultats)} mesures écrites dans {options['sortie']}"
+            ))
+        else:
+            self.stdout.write(document)
+
+        if options['comparer']:
+            self.comparer(options['comparer'], resultats)
+
+    def portfolio_de_reference(self, portfolio_id):
+        publies = Portfolio.objects.select_related('utilisateur').filter(statut='publie')
+        if portfolio_id:
+            portfolio = publies.filter(pk=portfolio_id).first()
+        else:
+            portfolio = publies.order_by('-nb_projets', '-nb_competences', 'pk').first()
+        if portfolio is None:
+            raise CommandError(
+                'Aucun portfolio publié à mesurer (voir manage.py generate_synthetic_data)'
+            )
+        return portfolio
+
+    def mesurer(self, client, url, donnees, options):
+        for _ in range(options['echauffement']):
+            client.get(url, donnees)
+
+        durees, requetes = [], []
+        for _ in range(max(1, options['repetitions'])):
+            with CaptureQueriesContext(connection) as contexte:
+                debut = time.perf_counter()
+                reponse = client.get(url, donnees)
+                contenu = b''.join(reponse.streaming_content) if reponse.streaming else reponse.content
+                durees.append((time.perf_counter() - debut) * 1000)
+            requetes.append(len(contexte.captured_queries))
+
+        return {
+            'statut': reponse.status_code,
+            'p50_ms': round(percentile(durees, 50), 3),
+            'p95_ms': round(percentile(durees, 95), 3),
+            'p99_ms': round(percentile(durees, 99), 3),
+            'requetes': max(requetes),
+            'octets': len(contenu),
+        }
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def comparer(self, chemin, resultats):
+        with open(chemin, encoding='utf-8') as fichier:
+            precedents = {
+                (mesure['route'], mesure['acces']): mesure for mesure in json.load(fichier)['resultats']
+            }
+        self.stderr.write('Écarts avec la mesure précédente (p50, requêtes) :')
+        for mesure in resultats:
+            ancienne = precedents.get((mesure['route'], mesure['acces']))
+            if ancienne is None:
+                continue
+            ecart = (mesure['p50_ms'] - ancienne['p50_ms']) / ancienne['p50_ms'] * 100 if ancienne['p50_ms'] else 0
+            self.stderr.write(
+                f"  {mesure['route']:<35} {mesure['acces']:<12} "
+                f"p50 {ancienne['p50_ms']:.2f} → {mesure['p50_ms']:.2f} ms ({ecart:+.0f} %), "
+                f"requêtes {ancienne['requetes']} → {mesure['requetes']}"
+            )
@@ -0,0 +1,95 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from portfolio.export_statique import (
+    DOSSIER_IDS, date_exportee, dossier_export, exporter_portfolio,
+    initialiser_processus, retirer_export,
+)
+from portfolio.models import Portfolio
+
+class Command(BaseCommand):
+    help = 'Exporte les portfolios publiés en site statique (HTML, JSON, médias), en parallèle'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Nombre de processus de construction (défaut : nombre de CPU, 0 ou 1 = sans pool)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Reconstruire aussi les exports déjà à jour'
+        )
+        parser.add_argument(
+            '--portfolio',
+            type=int,
+            nargs='+',
+            dest='portfolios',
+            help='Exporter seulement ces portfolios (ids)'
+        )
+
+    def handle(self, *args, **options):
+        publies = Portfolio.objects.filter(statut='publie')
+        if options['portfolios']:
+            publies = publies.filter(id_portfolio__in=options['portfolios'])
+        dates = {
+            pk: date_modification.isoformat()
+            for pk, date_modification in publies.values_list('id_portfolio', 'date_modification').iterator()
+        }
+
+        # Exports de portfolios dépubliés ou supprimés
+        retires = 0
+        exportes = [int(nom) for nom in os.listdir(dossier_export() / DOSSIER_IDS) if nom.isdigit()]
+        if options['portfolios']:
+            exportes = [pk for pk in exportes if pk in options['portfolios']]
+        for pk in exportes:
+            if pk not in dates:
+                retires += retirer_export(pk)
+
+        # Ne confier au pool que les exports à reconstruire
+        taches = [
+            pk for pk, date_modification in dates.items()
+            if options['force'] or date_exportee(pk) != date_modification
+        ]
+        if not taches:
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Tous les exports sont à jour ({retires} retirés)'
+            ))
+            return
+
+        self.stdout.write(f"{len(taches)} portfolios à exporter avec {options['workers']} processus")
+        resultats = {'exporte': 0, 'a_jour': 0, 'retire': 0}
+        erreurs = 0
+
+        if options['workers'] <= 1:
+            for pk in taches:
+                try:
+                    resultats[exporter_portfolio(pk, options['force'])] += 1
+                except Exception as e:
+                    erreurs += 1
+                    self.stderr.write(f"  Erreur (portfolio {pk}) : {e}")
+        else:
+            # Les processus ouvrent leurs propres connexions
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options['workers'], initializer=initialiser_processus
+            ) as pool:
+                futures = {pool.submit(exporter_portfolio, pk, options['force']): pk for pk in taches}
+                for numero, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        resultats[future.result()] += 1
+                    except Exception as e:
+                        erreurs += 1
+                        self.stderr.write(f"  Erreur (portfolio {futures[future]}) : {e}")
+                    if numero % 100 == 0 or numero == len(futures):
+                        self.stdout.write(f"  {numero}/{len(futures)} portfolios traités")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {resultats['exporte']} exportés, {resultats['a_jour']} à jour, "
+            f"{resultats['retire'] + retires} retirés ({erreurs} erreurs)"
+        ))
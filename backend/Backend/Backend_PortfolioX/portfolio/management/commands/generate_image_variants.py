@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from portfolio.images import CHAMPS_IMAGES, champs_a_traiter, traiter_images
+
+class Command(BaseCommand):
+    help = 'Génère les variantes (tailles, WebP/AVIF) des images existantes, en parallèle'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Nombre de threads de traitement (défaut : 4)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Régénérer aussi les variantes déjà à jour'
+        )
+
+    def handle(self, *args, **options):
+        taches = []
+        for modele, champs in CHAMPS_IMAGES.items():
+            avec_image = Q()
+            for champ in champs:
+                avec_image |= Q(**{f'{champ}__gt': ''})
+            instances = modele.objects.filter(avec_image).only(
+                modele._meta.pk.name, 'variantes_images', *champs
+            )
+            taches += [
+                (modele, instance.pk) for instance in instances.iterator()
+                if champs_a_traiter(instance, options['force'])
+            ]
+
+        if not taches:
+            self.stdout.write(self.style.SUCCESS('✅ Toutes les variantes sont à jour'))
+            return
+
+        self.stdout.write(f"{len(taches)} enregistrements à traiter avec {options['workers']} threads")
+        images = erreurs = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            futures = [
+                pool.submit(self.traiter, modele, pk, options['force'])
+                for modele, pk in taches
+            ]
+            for numero, future in enumerate(as_completed(futures), start=1):
+                try:
+                    images += future.result()
+                except Exception as e:
+                    erreurs += 1
+                    self.stderr.write(f"  Erreur : {e}")
+                if numero % 100 == 0 or numero == len(futures):
+                    self.stdout.write(f"  {numero}/{len(futures)} enregistrements traités")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {images} images traitées ({erreurs} erreurs)"
+        ))
+
+    def traiter(self, modele, pk, forcer):
+        try:
+            return traiter_images(modele, pk, forcer)
+        finally:
+            connections.close_all()
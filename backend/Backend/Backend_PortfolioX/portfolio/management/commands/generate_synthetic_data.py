@@ -0,0 +1,201 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils.text import slugify
+
+from portfolio.chargement import TAILLE_LOT_PAR_DEFAUT, Chargeur
+from portfolio.models import Contact, Competence, Projet
+from utilisateur.models import Utilisateur
+
+PRENOMS = [
+    'Camille', 'Léa', 'Manon', 'Chloé', 'Inès', 'Sarah', 'Emma', 'Jade', 'Louise', 'Alice',
+    'Lucas', 'Hugo', 'Louis', 'Nathan', 'Gabriel', 'Jules', 'Arthur', 'Adam', 'Raphaël', 'Yanis',
+    'Awa', 'Fatou', 'Moussa', 'Koffi', 'Aminata', 'Ibrahim', 'Mariam', 'Olivier', 'Kevin', 'Grace',
+]
+NOMS = [
+    'Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand', 'Leroy', 'Moreau',
+    'Simon', 'Laurent', 'Lefebvre', 'Michel', 'Garcia', 'David', 'Bertrand', 'Roux', 'Vincent', 'Fournier',
+    'Diallo', 'Traoré', 'Koné', 'Kouassi', 'Mensah', 'Ndiaye', 'Kalash', 'Yao', 'Bamba', 'Diop',
+]
+METIERS = [
+    'Développeur full-stack', 'Développeuse backend', 'Ingénieur DevOps', 'Designer UI/UX',
+    'Développeur mobile', 'Data engineer', 'Architecte logiciel', 'Intégratrice web',
+]
+# (nom, catégorie)
+COMPETENCES = [
+    ('Python', 'backend'), ('Django', 'backend'), ('Node.js', 'backend'), ('Java', 'backend'),
+    ('Go', 'backend'), ('PHP', 'backend'), ('JavaScript', 'frontend'), ('TypeScript', 'frontend'),
+    ('React', 'frontend'), ('Vue.js', 'frontend'), ('Angular', 'frontend'), ('CSS', 'frontend'),
+    ('Flutter', 'mobile'), ('Kotlin', 'mobile'), ('Swift', 'mobile'), ('React Native', 'mobile'),
+    ('Docker', 'devops'), ('Kubernetes', 'devops'), ('GitLab CI', 'devops'), ('Terraform', 'devops'),
+    ('PostgreSQL', 'base_donnees'), ('MySQL', 'base_donnees'), ('MongoDB', 'base_donnees'),
+    ('Redis', 'base_donnees'), ('Figma', 'design'), ('Photoshop', 'design'), ('Scrum', 'autres'),
+]
+NIVEAUX = ['debutant', 'intermediaire', 'avance', 'expert']
+LANGAGES = ['Python', 'JavaScript', 'TypeScript', 'Java', 'PHP', 'Go', 'Dart', 'Kotlin', 'C#']
+SUJETS = [
+    'Site e-commerce', 'Application de gestion de tâches', 'API de réservation', 'Tableau de bord analytique',
+    'Blog personnel', 'Application de messagerie', 'Plateforme de formation', 'Outil de facturation',
+    'Application météo', 'Réseau social étudiant', 'Jeu de quiz', 'Gestion de bibliothèque',
+]
+PHRASES = [
+    'Conception et développement de bout en bout.',
+    'Authentification par jetons et gestion des rôles.',
+    'Interface responsive et accessible.',
+    'Tests automatisés et intégration continue.',
+    'Déploiement conteneurisé sur un serveur Linux.',
+    'Optimisation des requêtes et mise en cache.',
+    'Travail en équipe avec une méthode agile.',
+]
+COULEURS = ['#2563eb', '#16a34a', '#dc2626', '#9333ea', '#ea580c', '#0891b2', '#111827']
+
+# Échelles nommées : nombre d'utilisateurs (un portfolio chacun)
+ECHELLES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+
+def nombre_utilisateurs(echelle):
+    echelle = echelle.lower()
+    if echelle in ECHELLES:
+        return ECHELLES[echelle]
+    try:
+        return int(echelle)
+    except ValueError:
+        raise CommandError(f"Échelle invalide : {echelle} (1k, 100k, 1m ou un nombre)")
+
+
+class Command(BaseCommand):
+    help = (
+        'Génère des données synthétiques réalistes (utilisateurs, portfolios, contacts, '
+        'compétences, projets) par insertions en masse'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--echelle',
+            default='1k',
+            help='Nombre d\'utilisateurs et de portfolios : 1k, 100k, 1m ou un nombre (défaut : 1k)'
+        )
+        parser.add_argument(
+            '--elements',
+            type=int,
+            default=4,
+            help='Nombre moyen de contacts, compétences et projets par portfolio (défaut : 4)'
+        )
+        parser.add_argument(
+            '--graine',
+            type=int,
+            default=42,
+            help='Graine du générateur aléatoire, pour des jeux de données reproductibles (défaut : 42)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=TAILLE_LOT_PAR_DEFAUT,
+            help=f'Nombre d\'enregistrements écrits par lot (défaut : {TAILLE_LOT_PAR_DEFAUT})'
+        )
+
+    def handle(self, *args, **options):
+        nombre = nombre_utilisateurs(options['echelle'])
+        self.aleatoire = random.Random(options['graine'])
+        self.elements = max(1, options['elements'])
+
+        # Numéroter à la suite des données existantes : la commande peut être relancée
+        self.prochains = {
+            modele: (modele.objects.aggregate(dernier=Max('pk'))['dernier'] or 0) + 1
+            for modele in (Utilisateur, Contact, Competence, Projet)
+        }
+
+        self.debut = self.derniere_progression = time.monotonic()
+        chargeur = Chargeur(taille_lot=options['batch_size'], progression=self.progression)
+        ecrits = chargeur.charger(
+            enregistrement for _ in range(nombre) for enregistrement in self.generer_utilisateur()
+        )
+
+        for section, total in ecrits.items():
+            self.stdout.write(f'  {section} : {total}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {sum(ecrits.values())} enregistrements générés en {time.monotonic() - self.debut:.1f} s'
+        ))
+
+    def progression(self, section, total):
+        maintenant = time.monotonic()
+        if maintenant - self.derniere_progression < 1:
+            return
+        self.derniere_progression = maintenant
+        self.stdout.write(f'  {section} : {total} enregistrements')
+
+    def identifiant(self, modele):
+        valeur = self.prochains[modele]
+        self.prochains[modele] += 1
+        return valeur
+
+    def nombre(self):
+        """Nombre d'éléments d'une relation, autour de la moyenne demandée"""
+        return self.aleatoire.randint(max(0, self.elements // 2), self.elements * 3 // 2)
+
+    def generer_utilisateur(self):
+        """Enregistrements (section, données) d'un utilisateur et de son portfolio"""
+        hasard = self.aleatoire
+        numero = self.identifiant(Utilisateur)
+        prenom, nom = hasard.choice(PRENOMS), hasard.choice(NOMS)
+        identite = slugify(f'{prenom}.{nom}').replace('-', '.')
+        email = f'{identite}.{numero}@exemple.fr'
+        yield 'utilisateurs', {'email': email, 'nom': nom, 'prenom': prenom}
+
+        contacts = []
+        for ordre in range(self.nombre()):
+            type_contact, valeur = hasard.choice([
+                ('email', email),
+                ('telephone', f'+33 6 {hasard.randint(10, 99)} {hasard.randint(10, 99)} {hasard.randint(10, 99)} {hasard.randint(10, 99)}'),
+                ('linkedin', f'https://www.linkedin.com/in/{identite}-{numero}'),
+                ('github', f'https://github.com/{identite}{numero}'),
+            ])
+            contacts.append(self.identifiant(Contact))
+            yield 'contacts', {
+                'id_contact': contacts[-1], 'utilisateur': email, 'type_contact': type_contact,
+                'valeur_contact': valeur, 'est_principal': ordre == 0, 'ordre': ordre,
+            }
+
+        competences = []
+        for ordre, (nom_competence, categorie) in enumerate(
+            hasard.sample(COMPETENCES, min(self.nombre(), len(COMPETENCES)))
+        ):
+            competences.append(self.identifiant(Competence))
+            yield 'competences', {
+                'id_competence': competences[-1], 'utilisateur': email, 'nom_competence': nom_competence,
+                'categorie': categorie, 'niveau_competence': hasard.choice(NIVEAUX),
+                'annees_experience': hasard.randint(0, 12), 'est_visible': hasard.random() < 0.9,
+                'ordre': ordre,
+            }
+
+        projets = []
+        for ordre in range(self.nombre()):
+            sujet = hasard.choice(SUJETS)
+            langage = hasard.choice(LANGAGES)
+            projets.append(self.identifiant(Projet))
+            yield 'projets', {
+                'id_projet': projets[-1], 'utilisateur': email, 'titre_projet': sujet,
+                'description_projet': ' '.join(hasard.sample(PHRASES, 3)), 'langage_projet': langage,
+                'technologies': [langage] + [nom for nom, _ in hasard.sample(COMPETENCES, 2)],
+                'lien_github': f'https://github.com/{identite}{numero}/{slugify(sujet)}',
+                'date_realisation': (date(2018, 1, 1) + timedelta(days=hasard.randint(0, 2500))).isoformat(),
+                'est_public': hasard.random() < 0.8, 'est_termine': hasard.random() < 0.7, 'ordre': ordre,
+            }
+
+        metier = hasard.choice(METIERS)
+        yield 'portfolios', {
+            'utilisateur': email,
+            'titre': f'Portfolio de {prenom} {nom}',
+            'titre_professionnel': metier,
+            'description': f'{metier} passionné(e) par les projets utiles.',
+            'biographie': ' '.join(hasard.sample(PHRASES, 4)),
+            'statut': hasard.choices(['publie', 'brouillon', 'archive'], weights=[7, 2, 1])[0],
+            'theme_couleur': hasard.choice(COULEURS),
+            'vue_count': int(hasard.paretovariate(1.5) * 10),
+            'contacts': contacts,
+            'competences': competences,
+            'projets': projets,
+        }
@@ -1,98 +1,84 @@
-import json
 import os
-from django.core.management.base import BaseCommand
+import sys
+import time
+
 from django.conf import settings
-from portfolio.models import Competence, Template, Projet, Contact
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio.chargement import TAILLE_LOT_PAR_DEFAUT, ChargementInvalide, Chargeur, lire_enregistrements
 
 class Command(BaseCommand):
-    help = 'Charge les données initiales depuis un fichier JSON'
-    
+    help = (
+        'Charge des données en masse depuis un fichier JSON ou NDJSON '
+        '(lecture par blocs, écriture par lots, voir portfolio/chargement.py)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fichier',
+            nargs='?',
+            default=os.path.join(settings.BASE_DIR, 'portfolio', 'fixtures', 'data_initial.json'),
+            help='Fichier à charger, « - » pour l\'entrée standard (défaut : fixtures/data_initial.json)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['auto', 'json', 'ndjson'],
+            default='auto',
+            help='Format du fichier (défaut : d\'après l\'extension, .ndjson/.jsonl = NDJSON)'
+        )
+        parser.add_argument(
+            '--utilisateur',
+            help='Email ou id de l\'utilisateur des enregistrements qui n\'en indiquent pas'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=TAILLE_LOT_PAR_DEFAUT,
+            help=f'Nombre d\'enregistrements écrits par lot (défaut : {TAILLE_LOT_PAR_DEFAUT})'
+        )
+        parser.add_argument(
+            '--snapshots',
+            action='store_true',
+            help='Reconstruire les snapshots publics à chaque lot (défaut : à la première lecture)'
+        )
+
     def handle(self, *args, **options):
-        # Chemin vers le fichier JSON
-        json_file = os.path.join(settings.BASE_DIR, 'portfolio', 'fixtures', 'data_initial.json')
-        
+        format_ = options['format']
+        if format_ == 'auto':
+            format_ = 'ndjson' if options['fichier'].endswith(('.ndjson', '.jsonl')) else 'json'
+        utilisateur = options['utilisateur']
+        if utilisateur and utilisateur.isdigit():
+            utilisateur = int(utilisateur)
+
+        self.debut = self.derniere_progression = time.monotonic()
+        chargeur = Chargeur(utilisateur, options['batch_size'], self.progression, options['snapshots'])
         try:
-            with open(json_file, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-            
-            # Charger les compétences
-            self.load_competences(data.get('competences', []))
-            
-            # Charger les templates
-            self.load_templates(data.get('templates', []))
-            
-            # Charger les projets
-            self.load_projets(data.get('projets', []))
-            
-            # Charger les contacts
-            self.load_contacts(data.get('contacts', []))
-            
-            self.stdout.write(
-                self.style.SUCCESS('✅ Données initiales chargées avec succès !')
-            )
-            
+            if options['fichier'] == '-':
+                ecrits = chargeur.charger(lire_enregistrements(sys.stdin, format_))
+            else:
+                with open(options['fichier'], encoding='utf-8') as fichier:
+                    ecrits = chargeur.charger(lire_enregistrements(fichier, format_))
         except FileNotFoundError:
-            self.stdout.write(
-                self.style.ERROR('❌ Fichier JSON non trouvé')
-            )
-        except json.JSONDecodeError:
-            self.stdout.write(
-                self.style.ERROR('❌ Erreur de décodage JSON')
-            )
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'❌ Erreur lors du chargement: {str(e)}')
-            )
-    
-    def load_competences(self, competences_data):
-        """Charge les compétences depuis les données JSON"""
-        for comp_data in competences_data:
-            Competence.objects.get_or_create(
-                id_competence=comp_data['id_competence'],
-                defaults={
-                    'nom_competence': comp_data['nom_competence'],
-                    'niveau_competence': comp_data['niveau_competence']
-                }
-            )
-        self.stdout.write(f'✅ {len(competences_data)} compétences chargées')
-    
-    def load_templates(self, templates_data):
-        """Charge les templates depuis les données JSON"""
-        for template_data in templates_data:
-            Template.objects.get_or_create(
-                id_template=template_data['id_template'],
-                defaults={
-                    'nom_template': template_data['nom_template'],
-                    'description_template': template_data['description_template'],
-                    'fichier_html': template_data['fichier_html'],
-                    'image_template': template_data.get('image_template', '')
-                }
-            )
-        self.stdout.write(f'✅ {len(templates_data)} templates chargés')
-    
-    def load_projets(self, projets_data):
-        """Charge les projets depuis les données JSON"""
-        for projet_data in projets_data:
-            Projet.objects.get_or_create(
-                id_projet=projet_data['id_projet'],
-                defaults={
-                    'titre_projet': projet_data['titre_projet'],
-                    'description_projet': projet_data['description_projet'],
-                    'langage_projet': projet_data['langage_projet'],
-                    'lien_projet': projet_data.get('lien_projet', ''),
-                    'image_projet': projet_data.get('image_projet', '')
-                }
-            )
-        self.stdout.write(f'✅ {len(projets_data)} projets chargés')
-    
-    def load_contacts(self, contacts_data):
-        """Charge les contacts depuis les données JSON"""
-        for contact_data in contacts_data:
-            Contact.objects.get_or_create(
-                id_contact=contact_data['id_contact'],
-                defaults={
-                    'type_contact': contact_data['type_contact'],
-                    'valeur_contact': contact_data['valeur_contact']
-                }
-            )
-        self.stdout.write(f'✅ {len(contacts_data)} contacts chargés')
\ No newline at end of file
+            raise CommandError(f"❌ Fichier introuvable : {options['fichier']}")
+        except ChargementInvalide as e:
+            raise CommandError(f"❌ {e} ({sum(chargeur.ecrits.values())} enregistrements déjà écrits)")
+
+        for section, nombre in ecrits.items():
+            self.stdout.write(f'  {section} : {nombre}')
+        for section, nombre in chargeur.ignores.items():
+            self.stdout.write(self.style.WARNING(f'  {section} : {nombre} enregistrements ignorés (section inconnue)'))
+        total = sum(ecrits.values())
+        duree = time.monotonic() - self.debut
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total} enregistrements chargés en {duree:.1f} s'
+        ))
+
+    def progression(self, section, total):
+        # Au plus une ligne par seconde
+        maintenant = time.monotonic()
+        if maintenant - self.derniere_progression < 1:
+            return
+        self.derniere_progression = maintenant
+        self.stdout.write(
+            f'  {section} : {total} enregistrements ({total / (maintenant - self.debut):.0f}/s)'
+        )
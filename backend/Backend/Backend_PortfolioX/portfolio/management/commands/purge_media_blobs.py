@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from portfolio.models import BlobMedia
+
+class Command(BaseCommand):
+    help = 'Supprime les blobs médias qui ne sont plus référencés (et leurs variantes) après le délai de grâce'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delai',
+            type=int,
+            default=settings.PORTFOLIO_BLOBS_DELAI_PURGE,
+            help='Âge minimal (secondes) d\'un blob non référencé avant suppression'
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(seconds=options['delai'])
+        orphelins = BlobMedia.objects.filter(references__lte=0, date_modification__lt=limite)
+
+        supprimes = octets = 0
+        for blob in list(orphelins):
+            # Conditionnel : le blob a pu être réutilisé depuis la sélection.
+            # La ligne supprimée reste verrouillée jusqu'à la suppression du
+            # fichier : un envoi identique concurrent (StockageContenu.save)
+            # attend le commit puis réécrit le fichier au lieu de le croire présent
+            with transaction.atomic():
+                if BlobMedia.objects.filter(
+                    nom=blob.nom, references__lte=0, date_modification__lt=limite
+                ).delete()[0]:
+                    default_storage.supprimer_blob(blob.nom)
+                    supprimes += 1
+                    octets += blob.taille
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {supprimes} blobs supprimés ({octets / 1024 / 1024:.1f} Mo libérés)"
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from portfolio.recherche import index_disponible, reconstruire_index
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index plein texte (FTS5) de la recherche publique"
+    
+    def handle(self, *args, **options):
+        if not index_disponible():
+            raise CommandError(
+                "Index plein texte indisponible (SQLite avec FTS5 requis, migrations appliquées)"
+            )
+        
+        total = reconstruire_index()
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} documents indexés'))
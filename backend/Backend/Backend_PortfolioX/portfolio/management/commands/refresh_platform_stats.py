@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.statistiques import rafraichir_statistiques_plateforme
+
+class Command(BaseCommand):
+    help = 'Recalcule les statistiques globales de la plateforme'
+    
+    def handle(self, *args, **options):
+        donnees = rafraichir_statistiques_plateforme()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Statistiques recalculées : {donnees['portfolios']['total']} portfolios, "
+                f"{donnees['projets']['total']} projets"
+            )
+        )
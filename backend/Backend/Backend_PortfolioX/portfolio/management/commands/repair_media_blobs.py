@@ -0,0 +1,67 @@
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from portfolio.images import CHAMPS_IMAGES
+from portfolio.models import BlobMedia, Projet
+from portfolio.signals import contenu_modifie, portfolios_lies
+from portfolio.storage import adresse_par_contenu, ajuster_references
+
+class Command(BaseCommand):
+    help = 'Recalcule les références des blobs médias ; --migrer range d\'abord les anciens fichiers par contenu'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--migrer',
+            action='store_true',
+            help='Déplacer les fichiers envoyés avant le stockage par contenu (doublons fusionnés)'
+        )
+
+    def handle(self, *args, **options):
+        if options['migrer']:
+            self.migrer()
+
+        references = Counter()
+        for modele, champs in CHAMPS_IMAGES.items():
+            for noms in modele.objects.values_list(*champs).iterator():
+                references.update(nom for nom in noms if adresse_par_contenu(nom))
+
+        with transaction.atomic():
+            BlobMedia.objects.update(references=0)
+            ajuster_references(references)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Références recalculées pour {len(references)} blobs"
+        ))
+
+    def migrer(self):
+        """Ranger chaque ancien fichier une seule fois, puis repointer les champs en un UPDATE par fichier"""
+        anciens = set()
+        for modele, champs in CHAMPS_IMAGES.items():
+            for noms in modele.objects.values_list(*champs).iterator():
+                anciens.update(nom for nom in noms if nom and not adresse_par_contenu(nom))
+
+        deplaces = manquants = 0
+        for ancien in sorted(anciens):
+            if not default_storage.exists(ancien):
+                manquants += 1
+                continue
+            with default_storage.open(ancien, 'rb') as fichier:
+                nouveau = default_storage.save(ancien, fichier)
+            with transaction.atomic():
+                for modele, champs in CHAMPS_IMAGES.items():
+                    for champ in champs:
+                        lignes = modele.objects.filter(**{champ: ancien})
+                        ids = list(lignes.values_list('pk', flat=True))
+                        lignes.update(**{champ: nouveau})
+                        # Snapshots, index et cache à régénérer avec les nouvelles URL
+                        contenu_modifie(portfolios_lies(Projet, ids) if modele is Projet else ids)
+            default_storage.delete(ancien)
+            deplaces += 1
+
+        self.stdout.write(
+            f"  {deplaces} fichiers rangés par contenu, {manquants} introuvables "
+            "(relancer generate_image_variants pour les variantes)"
+        )
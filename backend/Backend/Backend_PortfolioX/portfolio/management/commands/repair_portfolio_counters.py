@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from portfolio.compteurs_contenu import recalculer_tous_les_compteurs
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs de contenu dénormalisés de tous les portfolios'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Nombre de portfolios recalculés par UPDATE (défaut : 1000)'
+        )
+    
+    def handle(self, *args, **options):
+        total = recalculer_tous_les_compteurs(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Compteurs recalculés pour {total} portfolios"))
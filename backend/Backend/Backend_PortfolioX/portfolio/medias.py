@@ -0,0 +1,156 @@
+"""
+Distribution des fichiers médias.
+
+- PORTFOLIO_MEDIA_SENDFILE = 'x-accel-redirect' (nginx) ou 'x-sendfile'
+  (Apache, lighttpd) : Django ne fait que vérifier le chemin et poser les
+  en-têtes, le serveur frontal envoie le fichier (et gère les Range) ;
+- sinon le fichier est servi par Django : FileResponse (sendfile() du serveur
+  WSGI quand il le propose), une seule plage d'octets (Range) en 206.
+
+Les fichiers adressés par contenu (cas/, voir storage.py) ne changent jamais
+pour une URL donnée : ils sont servis avec Cache-Control immutable, un an.
+Tous les fichiers ont un ETag (taille + date) et un Last-Modified pour les
+requêtes conditionnelles.
+"""
+import mimetypes
+import os
+import re
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .storage import adresse_par_contenu
+
+TAILLE_BLOC = 64 * 1024
+DUREE_IMMUABLE = 365 * 24 * 3600
+MAX_AGE_PAR_DEFAUT = 3600
+
+PLAGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _cache_control(chemin):
+    if adresse_par_contenu(chemin):
+        return f'public, max-age={DUREE_IMMUABLE}, immutable'
+    return f"public, max-age={getattr(settings, 'PORTFOLIO_MEDIA_MAX_AGE', MAX_AGE_PAR_DEFAUT)}"
+
+
+def _non_modifie(request, etag, modification):
+    si_aucun = request.META.get('HTTP_IF_NONE_MATCH')
+    if si_aucun is not None:
+        return etag in [valeur.strip() for valeur in si_aucun.split(',')] or si_aucun.strip() == '*'
+    si_modifie = request.META.get('HTTP_IF_MODIFIED_SINCE')
+    if si_modifie:
+        try:
+            return int(modification) <= parsedate_to_datetime(si_modifie).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def plage_demandee(request, taille, etag, modification):
+    """
+    (début, fin incluse) de l'unique plage demandée, None pour le fichier
+    entier, ou False si la plage ne peut pas être satisfaite
+    """
+    entete = request.META.get('HTTP_RANGE')
+    if not entete:
+        return None
+    # If-Range : la plage ne vaut que pour la version connue du client
+    si_plage = request.META.get('HTTP_IF_RANGE')
+    if si_plage and si_plage != etag and si_plage != http_date(modification):
+        return None
+
+    correspondance = PLAGE.match(entete.strip())
+    if not correspondance or correspondance.groups() == ('', ''):
+        # Plages multiples ou syntaxe inconnue : répondre avec le fichier entier
+        return None
+    debut, fin = correspondance.groups()
+    if debut == '':
+        # Suffixe : les N derniers octets
+        longueur = int(fin)
+        if longueur == 0:
+            return False
+        return max(0, taille - longueur), taille - 1
+    debut = int(debut)
+    fin = min(int(fin), taille - 1) if fin else taille - 1
+    if debut >= taille or fin < debut:
+        return False
+    return debut, fin
+
+
+def _lire_tranche(chemin, debut, longueur):
+    with open(chemin, 'rb') as fichier:
+        fichier.seek(debut)
+        while longueur > 0:
+            bloc = fichier.read(min(TAILLE_BLOC, longueur))
+            if not bloc:
+                break
+            longueur -= len(bloc)
+            yield bloc
+
+
+@require_safe
+def servir_media(request, chemin):
+    try:
+        absolu = safe_join(settings.MEDIA_ROOT, chemin)
+        etat = os.stat(absolu)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("Fichier introuvable")
+    if not os.path.isfile(absolu):
+        raise Http404("Fichier introuvable")
+
+    taille, modification = etat.st_size, etat.st_mtime
+    etag = f'"{taille:x}-{int(modification * 1000):x}"'
+    entetes = {
+        'ETag': etag,
+        'Last-Modified': http_date(modification),
+        'Cache-Control': _cache_control(chemin),
+        'Accept-Ranges': 'bytes',
+    }
+
+    if _non_modifie(request, etag, modification):
+        reponse = HttpResponseNotModified()
+        for nom, valeur in entetes.items():
+            reponse[nom] = valeur
+        return reponse
+
+    type_contenu = mimetypes.guess_type(absolu)[0] or 'application/octet-stream'
+
+    # Transfert délégué au serveur frontal : Python ne lit pas le fichier
+    mode = getattr(settings, 'PORTFOLIO_MEDIA_SENDFILE', None)
+    if mode:
+        reponse = HttpResponse(content_type=type_contenu)
+        if mode == 'x-accel-redirect':
+            prefixe = getattr(settings, 'PORTFOLIO_MEDIA_ACCEL_PREFIX', '/protected-media/')
+            reponse['X-Accel-Redirect'] = prefixe + chemin
+        else:
+            reponse['X-Sendfile'] = absolu
+        for nom, valeur in entetes.items():
+            reponse[nom] = valeur
+        return reponse
+
+    plage = plage_demandee(request, taille, etag, modification)
+    if plage is False:
+        reponse = HttpResponse(status=416)
+        reponse['Content-Range'] = f'bytes */{taille}'
+        return reponse
+
+    if plage is None:
+        reponse = FileResponse(open(absolu, 'rb'), content_type=type_contenu)
+    else:
+        debut, fin = plage
+        reponse = StreamingHttpResponse(
+            _lire_tranche(absolu, debut, fin - debut + 1),
+            status=206,
+            content_type=type_contenu,
+        )
+        reponse['Content-Length'] = str(fin - debut + 1)
+        reponse['Content-Range'] = f'bytes {debut}-{fin}/{taille}'
+    for nom, valeur in entetes.items():
+        reponse[nom] = valeur
+    return reponse
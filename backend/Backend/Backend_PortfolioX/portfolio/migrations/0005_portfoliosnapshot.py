@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_portfolio_photo_template'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSnapshot',
+            fields=[
+                ('portfolio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='portfolio.portfolio')),
+                ('contenu', models.BinaryField(verbose_name='Contenu JSON')),
+                ('date_generation', models.DateTimeField(auto_now=True, verbose_name='Date de génération')),
+            ],
+            options={
+                'verbose_name': 'Snapshot public',
+                'verbose_name_plural': 'Snapshots publics',
+                'db_table': 'portfolio_snapshot',
+            },
+        ),
+        migrations.AlterField(
+            model_name='projet',
+            name='image_projet',
+            field=models.ImageField(blank=True, null=True, upload_to='projets/', verbose_name='Image du projet'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0005_portfoliosnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiquesPlateforme',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('donnees', models.JSONField(default=dict, verbose_name='Statistiques')),
+                ('date_calcul', models.DateTimeField(verbose_name='Date de calcul')),
+            ],
+            options={
+                'verbose_name': 'Statistiques de la plateforme',
+                'verbose_name_plural': 'Statistiques de la plateforme',
+                'db_table': 'portfolio_statistiques_plateforme',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def creer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS portfolio_recherche USING fts5("
+        "type_objet UNINDEXED, objet_id UNINDEXED, titre, contenu, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+def supprimer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS portfolio_recherche")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0006_statistiquesplateforme'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index, supprimer_index),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COMPTEURS = {
+    'nb_contacts': ('contacts', 'contact', {}),
+    'nb_contacts_principaux': ('contacts', 'contact', {'est_principal': True}),
+    'nb_competences': ('competences', 'competence', {}),
+    'nb_competences_visibles': ('competences', 'competence', {'est_visible': True}),
+    'nb_projets': ('projets', 'projet', {}),
+    'nb_projets_publics': ('projets', 'projet', {'est_public': True}),
+}
+
+
+def calculer_compteurs(apps, schema_editor):
+    Portfolio = apps.get_model('portfolio', 'Portfolio')
+    expressions = {}
+    for colonne, (relation, champ, filtres) in COMPTEURS.items():
+        liens = getattr(Portfolio, relation).through.objects.filter(portfolio_id=OuterRef('pk'))
+        if filtres:
+            liens = liens.filter(**{f'{champ}__{cle}': valeur for cle, valeur in filtres.items()})
+        compte = liens.values('portfolio_id').annotate(total=Count('*')).values('total')
+        expressions[colonne] = Coalesce(Subquery(compte), 0)
+    Portfolio.objects.update(**expressions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_recherche_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolio',
+            name='nb_competences',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de compétences'),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='nb_competences_visibles',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de compétences visibles'),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='nb_contacts',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de contacts'),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='nb_contacts_principaux',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de contacts principaux'),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='nb_projets',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de projets'),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='nb_projets_publics',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de projets publics'),
+        ),
+        migrations.RunPython(calculer_compteurs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0008_portfolio_compteurs_contenu'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolio',
+            name='variantes_images',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes des images'),
+        ),
+        migrations.AddField(
+            model_name='projet',
+            name='variantes_images',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes des images'),
+        ),
+    ]
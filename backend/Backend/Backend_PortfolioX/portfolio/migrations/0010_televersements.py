@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:58
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_variantes_images'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Televersement',
+            fields=[
+                ('id_televersement', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('cible', models.CharField(choices=[('photo_profil', 'Photo de profil'), ('photo_template', 'Photo de template'), ('image_projet', 'Image de projet')], max_length=20, verbose_name='Champ cible')),
+                ('objet_id', models.PositiveIntegerField(verbose_name="Identifiant de l'objet cible")),
+                ('nom_fichier', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('taille', models.PositiveBigIntegerField(verbose_name='Taille totale (octets)')),
+                ('recu', models.PositiveBigIntegerField(default=0, verbose_name='Octets reçus')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256 attendu')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='televersements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Téléversement',
+                'verbose_name_plural': 'Téléversements',
+                'db_table': 'portfolio_televersement',
+            },
+        ),
+    ]
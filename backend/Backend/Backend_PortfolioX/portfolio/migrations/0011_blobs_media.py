@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_televersements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobMedia',
+            fields=[
+                ('nom', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Nom stocké')),
+                ('taille', models.PositiveBigIntegerField(default=0, verbose_name='Taille (octets)')),
+                ('references', models.IntegerField(default=0, verbose_name='Nombre de références')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_modification', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+            ],
+            options={
+                'verbose_name': 'Blob média',
+                'verbose_name_plural': 'Blobs médias',
+                'db_table': 'portfolio_blob_media',
+                'indexes': [models.Index(fields=['references', 'date_modification'], name='portfolio_b_referen_250753_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0011_blobs_media'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='competence',
+            index=models.Index(fields=['categorie', 'ordre', 'nom_competence', 'id_competence'], name='portfolio_c_categor_1b0727_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['ordre', 'date_ajout', 'id_contact'], name='portfolio_c_ordre_0adc3c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolio',
+            index=models.Index(fields=['statut', '-date_publication', '-id_portfolio'], name='portfolio_p_statut_b393a8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projet',
+            index=models.Index(fields=['ordre', '-date_ajout', '-id_projet'], name='portfolio_p_ordre_29049f_idx'),
+        ),
+    ]
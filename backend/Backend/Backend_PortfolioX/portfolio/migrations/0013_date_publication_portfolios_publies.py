@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations
+from django.db.models import F
+
+
+def renseigner_date_publication(apps, schema_editor):
+    # La pagination par clé de /published/ exige une date de publication
+    # (un chargement en masse antérieur pouvait publier sans la renseigner)
+    Portfolio = apps.get_model('portfolio', 'Portfolio')
+    Portfolio.objects.filter(statut='publie', date_publication__isnull=True).update(
+        date_publication=F('date_modification')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0012_index_pagination_par_cle'),
+    ]
+
+    operations = [
+        migrations.RunPython(renseigner_date_publication, migrations.RunPython.noop),
+    ]
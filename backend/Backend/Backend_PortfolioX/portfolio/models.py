@@ -1,4 +1,6 @@
-from django.db import models
+import uuid
+
+from django.db import IntegrityError, models, transaction
 from utilisateur.models import Utilisateur
 
 class Contact(models.Model):
@@ -23,6 +25,8 @@ class Contact(models.Model):
         verbose_name = 'Contact'
         verbose_name_plural = 'Contacts'
         ordering = ['ordre', 'date_ajout']
+        # Tri de la pagination par clé (PublicContactsListAPIView.keyset_ordering)
+        indexes = [models.Index(fields=['ordre', 'date_ajout', 'id_contact'])]
         db_table = 'portfolio_contact'
     
     def __str__(self):
@@ -61,6 +65,8 @@ class Competence(models.Model):
         verbose_name = 'Compétence'
         verbose_name_plural = 'Compétences'
         ordering = ['categorie', 'ordre', 'nom_competence']
+        # Tri de la pagination par clé (PublicCompetencesListAPIView.keyset_ordering)
+        indexes = [models.Index(fields=['categorie', 'ordre', 'nom_competence', 'id_competence'])]
         unique_together = ['utilisateur', 'nom_competence']
         db_table = 'portfolio_competence'
     
@@ -83,15 +89,29 @@ class Projet(models.Model):
     est_termine = models.BooleanField(default=True, verbose_name='Terminé')
     ordre = models.PositiveIntegerField(default=0, verbose_name='Ordre d\'affichage')
     
+    # Variantes redimensionnées de l'image (voir images.py)
+    variantes_images = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Variantes des images')
     
     class Meta:
         verbose_name = 'Projet'
         verbose_name_plural = 'Projets'
         ordering = ['ordre', '-date_realisation', 'titre_projet']
+        # Tri de la pagination par clé (PublicProjetsListAPIView.keyset_ordering)
+        indexes = [models.Index(fields=['ordre', '-date_ajout', '-id_projet'])]
         db_table = 'portfolio_projet'
     
     def __str__(self):
         return self.titre_projet
+    
+    def save(self, *args, **kwargs):
+        # Les variantes sont écrites par le traitement des images : une instance
+        # chargée avant la fin du traitement ne doit pas les écraser
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                champ.name for champ in self._meta.concrete_fields
+                if not champ.primary_key and champ.name != 'variantes_images'
+            ]
+        super().save(*args, **kwargs)
 
 class Portfolio(models.Model):
     STATUT_CHOICES = [
@@ -159,6 +179,22 @@ class Portfolio(models.Model):
     
     # Métadonnées et statistiques
     vue_count = models.PositiveIntegerField(default=0, verbose_name='Nombre de vues')
+    
+    # Compteurs de contenu dénormalisés (tenus à jour par les signaux, voir compteurs_contenu.py)
+    nb_contacts = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de contacts')
+    nb_contacts_principaux = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de contacts principaux')
+    nb_competences = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de compétences')
+    nb_competences_visibles = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de compétences visibles')
+    nb_projets = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de projets')
+    nb_projets_publics = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de projets publics')
+    
+    CHAMPS_COMPTEURS = (
+        'nb_contacts', 'nb_contacts_principaux', 'nb_competences',
+        'nb_competences_visibles', 'nb_projets', 'nb_projets_publics',
+    )
+    
+    # Variantes redimensionnées des photos (voir images.py)
+    variantes_images = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Variantes des images')
     theme_couleur = models.CharField(max_length=7, default='#2563eb', verbose_name='Couleur du thème')
     layout_type = models.CharField(
         max_length=50, 
@@ -188,6 +224,8 @@ class Portfolio(models.Model):
         verbose_name_plural = 'Portfolios'
         ordering = ['-date_modification']
         db_table = 'portfolio_portfolio'
+        # Liste des portfolios publiés paginée par clé (PortfolioViewSet.published)
+        indexes = [models.Index(fields=['statut', '-date_publication', '-id_portfolio'])]
     
     def __str__(self):
         # Utiliser les attributs disponibles du modèle Utilisateur
@@ -207,18 +245,12 @@ class Portfolio(models.Model):
         return f"Portfolio de {nom_complet} - {self.titre}"
     
     def save(self, *args, **kwargs):
-        from django.utils.text import slugify
+        from .slugs import TENTATIVES, allouer_slugs, slug_deja_pris
         
-        # Générer un slug automatiquement si vide
-        if not self.slug:
-            base_slug = slugify(f"{self.utilisateur.prenom}-{self.utilisateur.nom}-{self.titre}")
-            if len(base_slug) > 200:
-                base_slug = base_slug[:200]
-            self.slug = base_slug
-            counter = 1
-            while Portfolio.objects.filter(slug=self.slug).exists():
-                self.slug = f"{base_slug}-{counter}"
-                counter += 1
+        # Générer un slug automatiquement si vide (une requête, voir slugs.py)
+        slug_genere = not self.slug
+        if slug_genere:
+            allouer_slugs([self])
         
         # Mettre à jour la date de publication si le statut change
         if self.statut == 'publie' and not self.date_publication:
@@ -226,12 +258,40 @@ class Portfolio(models.Model):
         elif self.statut != 'publie':
             self.date_publication = None
         
-        super().save(*args, **kwargs)
+        # Les compteurs, les vues et les variantes d'images sont écrits par leurs
+        # propres UPDATE : une instance chargée avant ne doit pas les écraser
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                champ.name for champ in self._meta.concrete_fields
+                if not champ.primary_key
+                and champ.name not in self.CHAMPS_COMPTEURS + ('vue_count', 'variantes_images')
+            ]
+        
+        if not slug_genere:
+            super().save(*args, **kwargs)
+            return
+        
+        # Un autre enregistrement concurrent a pu prendre le même slug : réessayer
+        for tentative in range(TENTATIVES):
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                if tentative == TENTATIVES - 1 or not slug_deja_pris(self):
+                    raise
+                self.slug = ''
+                allouer_slugs([self])
     
     def increment_vue_count(self):
-        """Incrémenter le compteur de vues"""
-        self.vue_count += 1
-        self.save(update_fields=['vue_count'])
+        """Incrémenter le compteur de vues (écriture différée, voir compteurs.py)"""
+        from .compteurs import compteur_vues
+        compteur_vues.incrementer(self.pk)
+    
+    def get_vue_count(self):
+        """Nombre de vues approximatif, vues pas encore écrites en base comprises"""
+        from .compteurs import compteur_vues
+        return self.vue_count + compteur_vues.en_attente(self.pk)
     
     def is_published(self):
         """Vérifier si le portfolio est publié"""
@@ -267,10 +327,95 @@ class Portfolio(models.Model):
         conditions = [
             self.titre.strip() != '',
             self.description.strip() != '',
-            self.competences.exists(),
-            self.projets.filter(est_public=True).exists(),
+            self.nb_competences > 0,
+            self.nb_projets_publics > 0,
         ]
         return all(conditions)
 
+class PortfolioSnapshot(models.Model):
+    """Document public pré-calculé d'un portfolio publié (JSON sérialisé)"""
+    portfolio = models.OneToOneField(
+        Portfolio,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='snapshot'
+    )
+    contenu = models.BinaryField(verbose_name='Contenu JSON')
+    date_generation = models.DateTimeField(auto_now=True, verbose_name='Date de génération')
+    
+    class Meta:
+        verbose_name = 'Snapshot public'
+        verbose_name_plural = 'Snapshots publics'
+        db_table = 'portfolio_snapshot'
+    
+    def __str__(self):
+        return f"Snapshot du portfolio {self.portfolio_id}"
+
+class StatistiquesPlateforme(models.Model):
+    """Statistiques globales pré-calculées (une seule ligne, voir statistiques.py)"""
+    donnees = models.JSONField(default=dict, verbose_name='Statistiques')
+    date_calcul = models.DateTimeField(verbose_name='Date de calcul')
+    
+    class Meta:
+        verbose_name = 'Statistiques de la plateforme'
+        verbose_name_plural = 'Statistiques de la plateforme'
+        db_table = 'portfolio_statistiques_plateforme'
+    
+    def __str__(self):
+        return f"Statistiques du {self.date_calcul:%Y-%m-%d %H:%M}"
+
+class BlobMedia(models.Model):
+    """Fichier média adressé par contenu, partagé entre les champs qui le référencent (voir storage.py)"""
+    nom = models.CharField(max_length=255, primary_key=True, verbose_name='Nom stocké')
+    taille = models.PositiveBigIntegerField(default=0, verbose_name='Taille (octets)')
+    references = models.IntegerField(default=0, verbose_name='Nombre de références')
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name='Date de création')
+    date_modification = models.DateTimeField(auto_now=True, verbose_name='Dernière modification')
+    
+    class Meta:
+        verbose_name = 'Blob média'
+        verbose_name_plural = 'Blobs médias'
+        db_table = 'portfolio_blob_media'
+        indexes = [models.Index(fields=['references', 'date_modification'])]
+    
+    def __str__(self):
+        return f"{self.nom} ({self.references} références)"
+
+class Televersement(models.Model):
+    """Téléversement fragmenté en cours (voir televersements.py)"""
+    CIBLE_CHOICES = [
+        ('photo_profil', 'Photo de profil'),
+        ('photo_template', 'Photo de template'),
+        ('image_projet', 'Image de projet'),
+    ]
+    
+    id_televersement = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    utilisateur = models.ForeignKey(Utilisateur, on_delete=models.CASCADE, related_name='televersements')
+    cible = models.CharField(max_length=20, choices=CIBLE_CHOICES, verbose_name='Champ cible')
+    objet_id = models.PositiveIntegerField(verbose_name='Identifiant de l\'objet cible')
+    nom_fichier = models.CharField(max_length=255, verbose_name='Nom du fichier')
+    taille = models.PositiveBigIntegerField(verbose_name='Taille totale (octets)')
+    recu = models.PositiveBigIntegerField(default=0, verbose_name='Octets reçus')
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name='SHA-256 attendu')
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name='Date de création')
+    
+    class Meta:
+        verbose_name = 'Téléversement'
+        verbose_name_plural = 'Téléversements'
+        db_table = 'portfolio_televersement'
+    
+    def __str__(self):
+        return f"{self.nom_fichier} ({self.recu}/{self.taille})"
+
+def lie_a_un_portfolio_publie(modele):
+    """
+    Condition EXISTS « lié à au moins un portfolio publié » pour Contact,
+    Competence ou Projet (évite la jointure + DISTINCT sur portfolios__statut)
+    """
+    through = getattr(Portfolio, modele._meta.model_name + 's').through
+    return models.Exists(through.objects.filter(
+        **{modele._meta.model_name: models.OuterRef('pk'), 'portfolio__statut': 'publie'}
+    ))
+
 # Import nécessaire pour timezone
 from django.utils import timezone
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+Profilage à la demande d'une requête (staff uniquement).
+
+Une requête portant l'en-tête `X-Profil: 1` ou le paramètre `?_profil=1`,
+envoyée par un membre du staff (session ou JWT, vérifié ici car DRF n'a pas
+encore authentifié la requête), est exécutée sous cProfile. Le profil est
+enregistré dans PORTFOLIO_PROFILS_DIR sous un identifiant renvoyé dans
+l'en-tête X-Profil-Id :
+- <id>.json : requête, arbre d'appels résumé et requêtes SQL avec leur durée ;
+- <id>.prof : statistiques pstats complètes (snakeviz, python -m pstats).
+
+Sans le drapeau, le middleware ne fait qu'une lecture d'en-tête et de query
+string ; un drapeau envoyé par un non-staff est ignoré.
+"""
+import cProfile
+import json
+import os
+import pstats
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+ENTETE = 'X-Profil'
+PARAMETRE = '_profil'
+# Fonctions conservées dans le résumé JSON, et appelées listées par fonction
+FONCTIONS_RESUMEES = 60
+APPELEES_PAR_FONCTION = 8
+
+
+def dossier_profils():
+    return str(getattr(settings, 'PORTFOLIO_PROFILS_DIR', settings.BASE_DIR / 'profils'))
+
+
+def _chemin(profil_id, extension):
+    # Identifiants hexadécimaux uniquement : pas de traversée de répertoire
+    if not profil_id or any(c not in '0123456789abcdef' for c in profil_id):
+        return None
+    return os.path.join(dossier_profils(), f'{profil_id}.{extension}')
+
+
+def chemin_profil(profil_id):
+    chemin = _chemin(profil_id, 'json')
+    return chemin if chemin and os.path.exists(chemin) else None
+
+
+def chemin_pstats(profil_id):
+    chemin = _chemin(profil_id, 'prof')
+    return chemin if chemin and os.path.exists(chemin) else None
+
+
+def lister_profils():
+    """Résumés des profils enregistrés, du plus récent au plus ancien"""
+    dossier = dossier_profils()
+    if not os.path.isdir(dossier):
+        return []
+    fichiers = sorted(
+        (entree for entree in os.scandir(dossier) if entree.name.endswith('.json')),
+        key=lambda entree: entree.stat().st_mtime,
+        reverse=True,
+    )
+    profils = []
+    for entree in fichiers:
+        try:
+            with open(entree.path, encoding='utf-8') as fichier:
+                profil = json.load(fichier)
+        except (OSError, ValueError):
+            continue
+        profils.append({
+            cle: profil.get(cle)
+            for cle in ('id', 'date', 'methode', 'chemin', 'statut', 'utilisateur', 'duree_ms', 'nb_requetes_sql')
+        })
+    return profils
+
+
+def _purger(dossier):
+    """Ne garder que les PORTFOLIO_PROFILS_MAX profils les plus récents"""
+    maximum = getattr(settings, 'PORTFOLIO_PROFILS_MAX', 50)
+    profils = sorted(
+        (entree for entree in os.scandir(dossier) if entree.name.endswith('.json')),
+        key=lambda entree: entree.stat().st_mtime,
+        reverse=True,
+    )
+    for entree in profils[maximum:]:
+        for extension in ('json', 'prof'):
+            try:
+                os.remove(os.path.join(dossier, f'{entree.name[:-5]}.{extension}'))
+            except FileNotFoundError:
+                pass
+
+
+def _nom_fonction(fonction):
+    fichier, ligne, nom = fonction
+    if fichier == '~':
+        return nom
+    return f'{fichier}:{ligne}({nom})'
+
+
+def resumer_appels(statistiques):
+    """Fonctions les plus coûteuses (temps cumulé) avec leurs principales appelées"""
+    appelees = defaultdict(list)
+    for fonction, (_, _, _, _, appelants) in statistiques.items():
+        for appelant, (_, _, _, cumule) in appelants.items():
+            appelees[appelant].append((cumule, fonction))
+
+    plus_couteuses = sorted(statistiques.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            'fonction': _nom_fonction(fonction),
+            'appels': appels,
+            'propre_ms': round(propre * 1000, 3),
+            'cumule_ms': round(cumule * 1000, 3),
+            'appelees': [
+                {'fonction': _nom_fonction(appelee), 'cumule_ms': round(duree * 1000, 3)}
+                for duree, appelee in sorted(appelees[fonction], reverse=True)[:APPELEES_PAR_FONCTION]
+            ],
+        }
+        for fonction, (_, appels, propre, cumule, _) in plus_couteuses[:FONCTIONS_RESUMEES]
+    ]
+
+
+def demande_profil(request):
+    return request.headers.get(ENTETE) == '1' or request.GET.get(PARAMETRE) == '1'
+
+
+def utilisateur_staff(request):
+    """Membre du staff de la session ou du jeton JWT de la requête, sinon None"""
+    utilisateur = getattr(request, 'user', None)
+    if utilisateur is None or not utilisateur.is_authenticated:
+        try:
+            resultat = JWTAuthentication().authenticate(request)
+        except (AuthenticationFailed, InvalidToken, TokenError):
+            return None
+        utilisateur = resultat[0] if resultat else None
+    if utilisateur is not None and utilisateur.is_active and utilisateur.is_staff:
+        return utilisateur
+    return None
+
+
+class ProfilageMiddleware:
+    """À placer après AuthenticationMiddleware (utilisateur de session)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not demande_profil(request):
+            return self.get_response(request)
+        utilisateur = utilisateur_staff(request)
+        if utilisateur is None:
+            return self.get_response(request)
+
+        requetes = []
+
+        def chronometrer_sql(execute, sql, params, many, context):
+            debut = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                requetes.append({'sql': sql, 'duree_ms': round((time.perf_counter() - debut) * 1000, 3)})
+
+        profileur = cProfile.Profile()
+        debut = time.perf_counter()
+        with connections['default'].execute_wrapper(chronometrer_sql):
+            profileur.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profileur.disable()
+        duree = time.perf_counter() - debut
+
+        profil_id = uuid.uuid4().hex
+        dossier = dossier_profils()
+        os.makedirs(dossier, exist_ok=True)
+        profileur.dump_stats(os.path.join(dossier, f'{profil_id}.prof'))
+        profil = {
+            'id': profil_id,
+            'date': timezone.now().isoformat(),
+            'methode': request.method,
+            'chemin': request.get_full_path(),
+            'statut': response.status_code,
+            'utilisateur': utilisateur.pk,
+            'duree_ms': round(duree * 1000, 3),
+            'nb_requetes_sql': len(requetes),
+            'duree_sql_ms': round(sum(requete['duree_ms'] for requete in requetes), 3),
+            'requetes_sql': requetes,
+            'appels': resumer_appels(pstats.Stats(profileur).stats),
+        }
+        temporaire = os.path.join(dossier, f'{profil_id}.tmp')
+        with open(temporaire, 'w', encoding='utf-8') as fichier:
+            json.dump(profil, fichier, ensure_ascii=False)
+        os.replace(temporaire, os.path.join(dossier, f'{profil_id}.json'))
+        _purger(dossier)
+
+        response['X-Profil-Id'] = profil_id
+        return response
@@ -0,0 +1,242 @@
+"""
+Index plein texte (SQLite FTS5) des portfolios publiés, compétences visibles et projets publics.
+
+Chaque objet indexé a un document (titre, contenu) dans la table virtuelle
+portfolio_recherche ; le rowid encode le type et l'identifiant de l'objet
+(rowid = id * 4 + code du type) pour que les mises à jour restent ponctuelles.
+L'index est tenu à jour par les signaux (voir signals.py) et peut être
+reconstruit avec la commande rebuild_search_index.
+
+Sur une base autre que SQLite (ou sans FTS5), index_disponible() renvoie False
+et PublicSearchAPIView revient aux filtres icontains.
+"""
+import html
+import re
+
+from django.db import connection, transaction
+
+from .models import Competence, Projet, Portfolio, lie_a_un_portfolio_publie
+
+TABLE = 'portfolio_recherche'
+
+TYPES = {
+    'portfolio': 1,
+    'competence': 2,
+    'projet': 3,
+}
+
+# Poids bm25 des colonnes (type_objet, objet_id, titre, contenu)
+POIDS_COLONNES = (0.0, 0.0, 10.0, 1.0)
+
+TAILLE_LOT = 500
+
+# Délimiteurs des termes trouvés dans l'extrait : caractères à usage privé,
+# remplacés par <mark> après échappement du texte indexé (saisi par les utilisateurs)
+DEBUT_TERME = '\ue000'
+FIN_TERME = '\ue001'
+
+_index_present = False
+
+
+def index_disponible():
+    """Vérifier que la table FTS5 existe sur la base courante"""
+    global _index_present
+    if _index_present:
+        return True
+    if connection.vendor != 'sqlite':
+        return False
+    _index_present = TABLE in connection.introspection.table_names()
+    return _index_present
+
+
+def _rowid(type_objet, objet_id):
+    return objet_id * 4 + TYPES[type_objet]
+
+
+# ============================================================================
+# DOCUMENTS
+# ============================================================================
+
+def _documents_portfolios(queryset):
+    for portfolio in queryset.filter(statut='publie').values_list(
+        'id_portfolio', 'titre', 'titre_professionnel', 'description', 'biographie'
+    ).iterator():
+        pk, titre, titre_professionnel, description, biographie = portfolio
+        yield (
+            _rowid('portfolio', pk), 'portfolio', pk,
+            f"{titre} {titre_professionnel}",
+            f"{description}\n{biographie}",
+        )
+
+
+def _documents_competences(queryset):
+    for pk, nom, description in queryset.filter(
+        lie_a_un_portfolio_publie(Competence), est_visible=True
+    ).values_list('id_competence', 'nom_competence', 'description').iterator():
+        yield (_rowid('competence', pk), 'competence', pk, nom, description)
+
+
+def _documents_projets(queryset):
+    for pk, titre, langage, description in queryset.filter(
+        lie_a_un_portfolio_publie(Projet), est_public=True
+    ).values_list('id_projet', 'titre_projet', 'langage_projet', 'description_projet').iterator():
+        yield (_rowid('projet', pk), 'projet', pk, titre, f"{langage}\n{description}")
+
+
+DOCUMENTS = {
+    'portfolio': (Portfolio, _documents_portfolios),
+    'competence': (Competence, _documents_competences),
+    'projet': (Projet, _documents_projets),
+}
+
+
+# ============================================================================
+# MISE À JOUR DE L'INDEX
+# ============================================================================
+
+def _par_lots(iterable, taille=TAILLE_LOT):
+    lot = []
+    for element in iterable:
+        lot.append(element)
+        if len(lot) >= taille:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
+
+
+def _reindexer(type_objet, ids):
+    """Remplacer les documents des objets `ids` d'un type (supprimés si non indexables)"""
+    ids = list(ids)
+    if not ids:
+        return
+    modele, documents = DOCUMENTS[type_objet]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for lot in _par_lots(ids):
+            cursor.execute(
+                f"DELETE FROM {TABLE} WHERE rowid IN ({', '.join(['%s'] * len(lot))})",
+                [_rowid(type_objet, pk) for pk in lot]
+            )
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (rowid, type_objet, objet_id, titre, contenu) "
+                f"VALUES (%s, %s, %s, %s, %s)",
+                list(documents(modele.objects.filter(pk__in=lot)))
+            )
+
+
+def indexer_portfolios(portfolio_ids):
+    """Réindexer des portfolios ainsi que leurs compétences et projets"""
+    if not index_disponible():
+        return
+    portfolio_ids = list(portfolio_ids)
+    _reindexer('portfolio', portfolio_ids)
+    for type_objet in ('competence', 'projet'):
+        through = getattr(Portfolio, type_objet + 's').through
+        _reindexer(type_objet, set(
+            through.objects.filter(portfolio_id__in=portfolio_ids)
+            .values_list(type_objet + '_id', flat=True)
+        ))
+
+
+def indexer_elements(elements):
+    """Réindexer des compétences/projets modifiés ou supprimés ({modèle: ids})"""
+    if not index_disponible():
+        return
+    for modele, ids in elements.items():
+        type_objet = modele._meta.model_name
+        if type_objet in DOCUMENTS:
+            _reindexer(type_objet, ids)
+
+
+def reconstruire_index():
+    """Vider puis reconstruire entièrement l'index ; retourne le nombre de documents"""
+    total = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        for type_objet, (modele, documents) in DOCUMENTS.items():
+            for lot in _par_lots(documents(modele.objects.all())):
+                cursor.executemany(
+                    f"INSERT INTO {TABLE} (rowid, type_objet, objet_id, titre, contenu) "
+                    f"VALUES (%s, %s, %s, %s, %s)",
+                    lot
+                )
+                total += len(lot)
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return total
+
+
+# ============================================================================
+# RECHERCHE
+# ============================================================================
+
+def expression_fts(query):
+    """
+    Convertir la saisie utilisateur en expression MATCH : chaque mot devient
+    un préfixe entre guillemets (pas de syntaxe FTS5 exposée)
+    """
+    mots = re.findall(r'\w+', query)
+    return ' '.join(f'"{mot}"*' for mot in mots)
+
+
+def extrait_html(extrait):
+    """Échapper l'extrait FTS5 puis baliser ses termes trouvés avec <mark>"""
+    if extrait is None:
+        return None
+    texte = html.escape(extrait)
+    return texte.replace(DEBUT_TERME, '<mark>').replace(FIN_TERME, '</mark>')
+
+
+def rechercher(query, type_objet=None, limite=None, apres=None):
+    """
+    Rechercher dans l'index. Retourne une liste de
+    (type_objet, objet_id, score, extrait) triée par pertinence (bm25),
+    l'extrait étant du HTML échappé où seuls les <mark> sont balisés.
+
+    `apres` = (score, objet_id) du dernier résultat déjà lu (type_objet requis) :
+    la lecture reprend juste après lui dans l'ordre (score, rowid).
+    """
+    expression = expression_fts(query)
+    if not expression:
+        return []
+
+    sql = (
+        f"SELECT type_objet, objet_id, bm25({TABLE}, {', '.join(map(str, POIDS_COLONNES))}) AS score, "
+        f"snippet({TABLE}, -1, '{DEBUT_TERME}', '{FIN_TERME}', '…', 16), rowid "
+        f"FROM {TABLE} WHERE {TABLE} MATCH %s"
+    )
+    params = [expression]
+    if type_objet:
+        sql += " AND type_objet = %s"
+        params.append(type_objet)
+    if apres is not None:
+        # bm25 n'est calculable qu'avec le MATCH : la position est filtrée autour
+        score, objet_id = apres
+        sql = f"SELECT * FROM ({sql}) WHERE score > %s OR (score = %s AND rowid > %s)"
+        params.extend([score, score, _rowid(type_objet, objet_id)])
+    sql += " ORDER BY score, rowid"
+    if limite is not None:
+        sql += " LIMIT %s"
+        params.append(limite)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            (type_resultat, objet_id, score, extrait_html(extrait))
+            for type_resultat, objet_id, score, extrait, _ in cursor.fetchall()
+        ]
+
+
+def compter(query):
+    """Nombre de résultats par type en une seule requête : {type_objet: nombre}"""
+    expression = expression_fts(query)
+    comptes = {type_objet: 0 for type_objet in TYPES}
+    if not expression:
+        return comptes
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT type_objet, COUNT(*) FROM {TABLE} WHERE {TABLE} MATCH %s GROUP BY type_objet",
+            [expression]
+        )
+        comptes.update(dict(cursor.fetchall()))
+    return comptes
@@ -0,0 +1,55 @@
+"""
+Inventaire des routes GET de l'API (benchmark_endpoints, tests de budget de requêtes).
+"""
+import re
+
+from django.urls import URLResolver
+
+# Modèles désignés par le paramètre `pk` d'une route, d'après son nom
+# (contact-detail, detail_utilisateur) ; un portfolio sinon
+MODELES_PK = ('contact', 'competence', 'projet', 'utilisateur')
+
+# Paramètres de requête des routes qui en attendent
+PARAMETRES_REQUETE = {
+    'portfolio-search': {'competence': 'Python'},
+    'portfolio_search': {'competence': 'Python'},
+    'public_search': {'q': 'python'},
+}
+
+
+def routes_get(motifs):
+    """(nom, noms des paramètres) des routes nommées qui acceptent GET"""
+    for motif in motifs:
+        if isinstance(motif, URLResolver):
+            yield from routes_get(motif.url_patterns)
+            continue
+        parametres = set(motif.pattern.regex.groupindex)
+        if not motif.name or 'format' in parametres:
+            continue
+        vue = motif.callback
+        actions = getattr(vue, 'actions', None)
+        if actions is not None:
+            accepte_get = 'get' in actions
+        else:
+            classe = getattr(vue, 'cls', getattr(vue, 'view_class', None))
+            accepte_get = hasattr(classe, 'get')
+        if accepte_get:
+            yield motif.name, parametres
+
+
+def parametres_route(nom, parametres, valeurs):
+    """
+    kwargs de reverse() pour une route, d'après {modèle: id} ; None si une
+    valeur manque
+    """
+    mots = re.split(r'[-_]', nom)
+    kwargs = {}
+    for parametre in parametres:
+        if parametre == 'pk':
+            modele = next((mot for mot in mots if mot in MODELES_PK), 'portfolio')
+        else:
+            modele = parametre.removesuffix('_id')
+        if valeurs.get(modele) is None:
+            return None
+        kwargs[parametre] = valeurs[modele]
+    return kwargs
@@ -1,9 +1,17 @@
+import os
+import re
+
+from django.core.validators import get_available_image_extensions
 from rest_framework import serializers
-from .models import Contact, Competence, Projet, Portfolio
+from .chronometrage import SerialisationMesureeMixin
+from .images import srcset
+from .models import Contact, Competence, Projet, Portfolio, Televersement
+from .signals import contenu_modifie
+from .televersements import CIBLES, taille_max
 from utilisateur.models import Utilisateur
 
 # Serializer pour l'utilisateur (simplifié)
-class UtilisateurSimpleSerializer(serializers.ModelSerializer):
+class UtilisateurSimpleSerializer(SerialisationMesureeMixin, serializers.ModelSerializer):
     nom_complet = serializers.SerializerMethodField()
     
     class Meta:
@@ -21,7 +29,7 @@ class UtilisateurSimpleSerializer(serializers.ModelSerializer):
         return str(obj)
 
 # Serializer pour Contact
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(SerialisationMesureeMixin, serializers.ModelSerializer):
     utilisateur = serializers.PrimaryKeyRelatedField(
         read_only=True,
         default=serializers.CurrentUserDefault()
@@ -45,7 +53,8 @@ class ContactSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         
         # Pour la création, vérifier que l'utilisateur ne dépasse pas la limite
-        if request and request.method == 'POST':
+        # (en masse, la limite est vérifiée une fois pour le lot : voir valider_lot)
+        if request and request.method == 'POST' and not self.context.get('en_masse'):
             user_contacts = Contact.objects.filter(utilisateur=request.user).count()
             if user_contacts >= 10:  # Limite à 10 contacts par utilisateur
                 raise serializers.ValidationError("Limite de 10 contacts atteinte")
@@ -54,11 +63,42 @@ class ContactSerializer(serializers.ModelSerializer):
             if data.get('est_principal', False):
                 # Désactiver les autres contacts principaux
                 Contact.objects.filter(utilisateur=request.user, est_principal=True).update(est_principal=False)
+                # update() n'émet pas de signal : marquer le portfolio comme modifié
+                contenu_modifie(
+                    Portfolio.objects.filter(utilisateur=request.user).values_list('id_portfolio', flat=True)
+                )
         
         return data
+    
+    @classmethod
+    def valider_lot(cls, donnees, utilisateur, instances=None):
+        """Vérifications portant sur tout le lot ; retourne {index: erreurs}"""
+        if instances is not None:
+            return {}
+        existants = Contact.objects.filter(utilisateur=utilisateur).count()
+        if existants + len(donnees) > 10:
+            message = f"Limite de 10 contacts atteinte ({existants} existants, {len(donnees)} demandés)"
+            return {index: {'non_field_errors': [message]} for index in range(len(donnees))}
+        return {}
+    
+    @classmethod
+    def preparer_lot(cls, objets, utilisateur):
+        """Un seul contact principal : le dernier du lot marqué principal"""
+        principaux = [objet for objet in objets if objet.est_principal]
+        if not principaux:
+            return
+        for objet in principaux[:-1]:
+            objet.est_principal = False
+        autres = Contact.objects.filter(utilisateur=utilisateur, est_principal=True)
+        if principaux[-1].pk:
+            autres = autres.exclude(pk=principaux[-1].pk)
+        if autres.update(est_principal=False):
+            contenu_modifie(
+                Portfolio.objects.filter(utilisateur=utilisateur).values_list('id_portfolio', flat=True)
+            )
 
 # Serializer pour Competence
-class CompetenceSerializer(serializers.ModelSerializer):
+class CompetenceSerializer(SerialisationMesureeMixin, serializers.ModelSerializer):
     utilisateur = serializers.PrimaryKeyRelatedField(
         read_only=True,
         default=serializers.CurrentUserDefault()
@@ -76,21 +116,59 @@ class CompetenceSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data['utilisateur'] = self.context['request'].user
         return super().create(validated_data)
+    
+    def get_validators(self):
+        # En masse, l'unicité (utilisateur, nom) est vérifiée en une requête : voir valider_lot
+        if self.context.get('en_masse'):
+            return []
+        return super().get_validators()
+    
+    @classmethod
+    def valider_lot(cls, donnees, utilisateur, instances=None):
+        """Noms en double dans le lot ou déjà utilisés par l'utilisateur ; retourne {index: erreurs}"""
+        noms = {
+            index: item['nom_competence']
+            for index, item in enumerate(donnees) if 'nom_competence' in item
+        }
+        existants = Competence.objects.filter(utilisateur=utilisateur, nom_competence__in=noms.values())
+        if instances:
+            existants = existants.exclude(pk__in=[instance.pk for instance in instances])
+        pris = set(existants.values_list('nom_competence', flat=True))
+        
+        erreurs = {}
+        vus = set()
+        for index, nom in noms.items():
+            if nom in pris or nom in vus:
+                erreurs[index] = {'nom_competence': [f"La compétence « {nom} » existe déjà"]}
+            vus.add(nom)
+        return erreurs
+
+# Variantes d'un champ image : {format: srcset}, None tant qu'elles ne sont pas générées
+class VariantesImageField(serializers.Field):
+    
+    def __init__(self, champ, **kwargs):
+        self.champ = champ
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+    
+    def to_representation(self, instance):
+        return srcset(instance, self.champ, self.context.get('request'))
 
 # Serializer pour Projet
-class ProjetSerializer(serializers.ModelSerializer):
+class ProjetSerializer(SerialisationMesureeMixin, serializers.ModelSerializer):
     utilisateur = serializers.PrimaryKeyRelatedField(
         read_only=True,
         default=serializers.CurrentUserDefault()
     )
+    image_projet_variantes = VariantesImageField('image_projet')
     
     class Meta:
         model = Projet
         fields = [
             'id_projet', 'titre_projet', 'description_projet', 'langage_projet',
             'utilisateur', 'lien_projet', 'lien_github', 'image_projet',
-            'technologies', 'date_realisation', 'date_ajout', 'est_public',
-            'est_termine', 'ordre'
+            'image_projet_variantes', 'technologies', 'date_realisation', 'date_ajout',
+            'est_public', 'est_termine', 'ordre'
         ]
         read_only_fields = ['id_projet', 'date_ajout']
     
@@ -99,11 +177,12 @@ class ProjetSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 # Serializer pour Portfolio (Liste)
-class PortfolioListSerializer(serializers.ModelSerializer):
+class PortfolioListSerializer(SerialisationMesureeMixin, serializers.ModelSerializer):
     utilisateur = UtilisateurSimpleSerializer(read_only=True)
     nombre_contacts = serializers.SerializerMethodField()
     nombre_competences = serializers.SerializerMethodField()
     nombre_projets = serializers.SerializerMethodField()
+    vue_count = serializers.SerializerMethodField()
     is_published = serializers.SerializerMethodField()
     
     class Meta:
@@ -116,24 +195,31 @@ class PortfolioListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
     
+    # Compteurs dénormalisés sur Portfolio (voir compteurs_contenu.py)
     def get_nombre_contacts(self, obj):
-        return obj.contacts.count()
+        return obj.nb_contacts
     
     def get_nombre_competences(self, obj):
-        return obj.competences.count()
+        return obj.nb_competences
     
     def get_nombre_projets(self, obj):
-        return obj.projets.count()
+        return obj.nb_projets
+    
+    def get_vue_count(self, obj):
+        return obj.get_vue_count()
     
     def get_is_published(self, obj):
         return obj.is_published()
 
 # Serializer pour Portfolio (Détail) - CORRIGÉ
-class PortfolioDetailSerializer(serializers.ModelSerializer):
+class PortfolioDetailSerializer(SerialisationMesureeMixin, serializers.ModelSerializer):
     utilisateur = UtilisateurSimpleSerializer(read_only=True)
     contacts = ContactSerializer(many=True, read_only=True)
     competences = CompetenceSerializer(many=True, read_only=True)
     projets = ProjetSerializer(many=True, read_only=True)
+    photo_profil_variantes = VariantesImageField('photo_profil')
+    photo_template_variantes = VariantesImageField('photo_template')
+    vue_count = serializers.SerializerMethodField()
     is_published = serializers.SerializerMethodField()
     can_be_published = serializers.SerializerMethodField()
     
@@ -142,6 +228,7 @@ class PortfolioDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id_portfolio', 'utilisateur', 'titre', 'slug', 'description',
             'titre_professionnel', 'biographie', 'photo_profil', 'photo_template',  # Ajouté photo_template
+            'photo_profil_variantes', 'photo_template_variantes',
             'statut', 'date_creation', 'date_modification', 'date_publication',
             'contacts', 'competences', 'projets', 'vue_count',
             'theme_couleur', 'layout_type', 'meta_description', 'meta_keywords',
@@ -155,29 +242,58 @@ class PortfolioDetailSerializer(serializers.ModelSerializer):
             'date_publication', 'vue_count', 'slug'
         ]
     
+    def get_vue_count(self, obj):
+        return obj.get_vue_count()
+    
     def get_is_published(self, obj):
         return obj.is_published()
     
     def get_can_be_published(self, obj):
         return obj.can_be_published()
 
+# Liste d'ids d'éléments de l'utilisateur, résolue en une seule requête
+class ElementsUtilisateurField(serializers.ListField):
+    child = serializers.IntegerField(min_value=1)
+    
+    def __init__(self, modele, libelle, **kwargs):
+        self.modele = modele
+        self.libelle = libelle
+        super().__init__(**kwargs)
+    
+    def to_internal_value(self, data):
+        ids = list(dict.fromkeys(super().to_internal_value(data)))
+        if not ids:
+            return []
+        
+        elements = self.modele.objects.filter(pk__in=ids)
+        request = self.context.get('request')
+        if request is not None:
+            elements = elements.filter(utilisateur_id=request.user.pk)
+        trouves = elements.in_bulk()
+        
+        # Tous les ids refusés sont signalés ensemble
+        refuses = [pk for pk in ids if pk not in trouves]
+        if refuses:
+            raise serializers.ValidationError(
+                f"{self.libelle} introuvables ou ne vous appartenant pas : "
+                + ", ".join(str(pk) for pk in refuses)
+            )
+        return [trouves[pk] for pk in ids]
+
 # Serializer pour créer/update Portfolio
-class PortfolioCreateUpdateSerializer(serializers.ModelSerializer):
-    contacts_ids = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Contact.objects.all(),
+class PortfolioCreateUpdateSerializer(SerialisationMesureeMixin, serializers.ModelSerializer):
+    contacts_ids = ElementsUtilisateurField(
+        Contact, 'Contacts',
         write_only=True,
         required=False
     )
-    competences_ids = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Competence.objects.all(),
+    competences_ids = ElementsUtilisateurField(
+        Competence, 'Compétences',
         write_only=True,
         required=False
     )
-    projets_ids = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Projet.objects.all(),
+    projets_ids = ElementsUtilisateurField(
+        Projet, 'Projets',
         write_only=True,
         required=False
     )
@@ -198,39 +314,6 @@ class PortfolioCreateUpdateSerializer(serializers.ModelSerializer):
             'photo_template': {'required': False, 'allow_null': True}
         }
     
-    def validate(self, data):
-        request = self.context.get('request')
-        
-        # Vérifier que les contacts/compétences/projets appartiennent à l'utilisateur
-        if request and request.user:
-            utilisateur = request.user
-            
-            # Vérifier les contacts
-            contacts_ids = data.get('contacts_ids', [])
-            for contact in contacts_ids:
-                if contact.utilisateur != utilisateur:
-                    raise serializers.ValidationError(
-                        f"Le contact {contact.id_contact} ne vous appartient pas"
-                    )
-            
-            # Vérifier les compétences
-            competences_ids = data.get('competences_ids', [])
-            for competence in competences_ids:
-                if competence.utilisateur != utilisateur:
-                    raise serializers.ValidationError(
-                        f"La compétence {competence.id_competence} ne vous appartient pas"
-                    )
-            
-            # Vérifier les projets
-            projets_ids = data.get('projets_ids', [])
-            for projet in projets_ids:
-                if projet.utilisateur != utilisateur:
-                    raise serializers.ValidationError(
-                        f"Le projet {projet.id_projet} ne vous appartient pas"
-                    )
-        
-        return data
-    
     def create(self, validated_data):
         # Extraire les IDs des relations
         contacts_ids = validated_data.pop('contacts_ids', [])
@@ -272,7 +355,7 @@ class PortfolioCreateUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 # Serializer pour publier un portfolio
-class PortfolioPublishSerializer(serializers.Serializer):
+class PortfolioPublishSerializer(SerialisationMesureeMixin, serializers.Serializer):
     statut = serializers.ChoiceField(choices=Portfolio.STATUT_CHOICES)
     
     def update(self, instance, validated_data):
@@ -299,12 +382,13 @@ class PortfolioPublishSerializer(serializers.Serializer):
                 )
         
         instance.statut = statut
+        # Le post_save régénère (ou supprime) le snapshot public après le commit
         instance.save()
         
         return instance
 
 # Serializer spécifique pour les mises à jour avec fichiers (FormData)
-class PortfolioUpdateWithFilesSerializer(serializers.ModelSerializer):
+class PortfolioUpdateWithFilesSerializer(SerialisationMesureeMixin, serializers.ModelSerializer):
     class Meta:
         model = Portfolio
         fields = [
@@ -318,4 +402,56 @@ class PortfolioUpdateWithFilesSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'photo_profil': {'required': False, 'allow_null': True},
             'photo_template': {'required': False, 'allow_null': True}
-        }
\ No newline at end of file
+        }
+
+# Serializer pour ouvrir un téléversement fragmenté
+class TeleversementSerializer(SerialisationMesureeMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Televersement
+        fields = [
+            'id_televersement', 'cible', 'objet_id', 'nom_fichier', 'taille',
+            'recu', 'sha256', 'date_creation'
+        ]
+        read_only_fields = ['id_televersement', 'recu', 'date_creation']
+        extra_kwargs = {
+            'objet_id': {'required': False}
+        }
+    
+    def validate_nom_fichier(self, value):
+        extension = os.path.splitext(value)[1][1:].lower()
+        if extension not in get_available_image_extensions():
+            raise serializers.ValidationError(f"Extension « {extension} » non prise en charge")
+        return os.path.basename(value)
+    
+    def validate_taille(self, value):
+        if value <= 0 or value > taille_max():
+            raise serializers.ValidationError(
+                f"La taille doit être comprise entre 1 et {taille_max()} octets"
+            )
+        return value
+    
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError("Empreinte SHA-256 invalide")
+        return value
+    
+    def validate(self, data):
+        utilisateur = self.context['request'].user
+        modele, _ = CIBLES[data['cible']]
+        
+        # Pour une photo de portfolio, la cible par défaut est le portfolio de l'utilisateur
+        if modele is Portfolio and data.get('objet_id') is None:
+            data['objet_id'] = Portfolio.objects.filter(utilisateur=utilisateur).values_list(
+                'id_portfolio', flat=True
+            ).first()
+        
+        if data.get('objet_id') is None or not modele.objects.filter(
+            pk=data['objet_id'], utilisateur=utilisateur
+        ).exists():
+            raise serializers.ValidationError({'objet_id': "Objet cible introuvable"})
+        return data
+    
+    def create(self, validated_data):
+        validated_data['utilisateur'] = self.context['request'].user
+        return super().create(validated_data)
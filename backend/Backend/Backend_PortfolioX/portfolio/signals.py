@@ -0,0 +1,302 @@
+"""
+Propagation des modifications de portfolio.
+
+Toute modification d'un portfolio, d'un de ses contacts/compétences/projets ou de
+leurs liaisons M2M marque les portfolios (et les éléments) concernés ; un
+changement d'élément recalcule aussi les compteurs de contenu et avance
+date_modification des portfolios liés. Les traitements enregistrés sont
+exécutés une seule fois par transaction, après le commit :
+- TRAITEMENTS reçoivent l'ensemble des ids de portfolios modifiés ;
+- TRAITEMENTS_ELEMENTS reçoivent {modèle: ids} des éléments modifiés ou supprimés.
+"""
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.utils import timezone
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Contact, Competence, Projet, Portfolio
+from .snapshots import reconstruire_snapshots
+from .export_statique import exporter_portfolios
+from .recherche import indexer_portfolios, indexer_elements
+from .cache import invalider_reponses
+from .compteurs_contenu import recalculer_compteurs
+from .images import CHAMPS_IMAGES, champs_a_traiter, planifier_traitement
+from .storage import ajuster_references
+
+# Fonctions appelées avec l'ensemble des ids de portfolios modifiés.
+# L'export (disque, le plus lent et le plus fragile) passe en dernier : l'index
+# et le cache des réponses sont à jour même s'il échoue.
+TRAITEMENTS = [
+    reconstruire_snapshots,
+    indexer_portfolios,
+    invalider_reponses,
+    exporter_portfolios,
+]
+
+# Fonctions appelées avec {modèle: ids} des éléments modifiés
+TRAITEMENTS_ELEMENTS = [
+    indexer_elements,
+]
+
+_en_attente = threading.local()
+
+
+def _etat_en_attente():
+    if not hasattr(_en_attente, 'portfolios'):
+        _en_attente.portfolios = set()
+        _en_attente.elements = set()
+    return _en_attente
+
+
+def _executer_traitements():
+    etat = _etat_en_attente()
+    portfolio_ids, etat.portfolios = etat.portfolios, set()
+    elements, etat.elements = etat.elements, set()
+
+    if portfolio_ids:
+        suspendus = getattr(_en_attente, 'traitements_suspendus', ())
+        for traitement in TRAITEMENTS:
+            if traitement not in suspendus:
+                traitement(portfolio_ids)
+
+    if elements:
+        par_modele = defaultdict(set)
+        for modele, pk in elements:
+            par_modele[modele].add(pk)
+        for traitement in TRAITEMENTS_ELEMENTS:
+            traitement(par_modele)
+
+
+def planifier_mise_a_jour(portfolio_ids=(), elements=()):
+    """
+    Marquer des portfolios et des éléments (couples (modèle, pk)) comme
+    modifiés ; ils sont traités après le commit
+    """
+    portfolio_ids = {pk for pk in portfolio_ids if pk is not None}
+    elements = {(modele, pk) for modele, pk in elements if pk is not None}
+    if not portfolio_ids and not elements:
+        return
+    etat = _etat_en_attente()
+    etat.portfolios.update(portfolio_ids)
+    etat.elements.update(elements)
+    transaction.on_commit(_executer_traitements)
+
+
+def contenu_modifie(portfolio_ids, elements=()):
+    """
+    Un élément de ces portfolios a changé : recalculer leurs compteurs et
+    avancer leur date_modification (validateurs ETag/Last-Modified) dans le
+    même UPDATE, puis planifier les traitements
+    """
+    portfolio_ids = [pk for pk in portfolio_ids if pk is not None]
+    recalculer_compteurs(portfolio_ids, date_modification=timezone.now())
+    planifier_mise_a_jour(portfolio_ids, elements)
+
+
+def portfolios_de(element):
+    """Ids des portfolios auxquels un contact/compétence/projet est lié"""
+    return list(element.portfolios.values_list('id_portfolio', flat=True))
+
+
+def portfolios_lies(modele, ids):
+    """Ids des portfolios liés à des éléments d'un même modèle (une requête)"""
+    nom = modele._meta.model_name
+    through = getattr(Portfolio, nom + 's').through
+    return set(
+        through.objects.filter(**{f'{nom}_id__in': list(ids)}).values_list('portfolio_id', flat=True)
+    )
+
+
+def _signaux_suspendus():
+    return getattr(_en_attente, 'suspendus', 0) > 0
+
+
+@contextmanager
+def signaux_elements_suspendus():
+    """
+    Ignorer les signaux des éléments dans ce bloc (opérations en masse) :
+    l'appelant appelle contenu_modifie une seule fois pour tout le lot
+    """
+    _en_attente.suspendus = getattr(_en_attente, 'suspendus', 0) + 1
+    try:
+        yield
+    finally:
+        _en_attente.suspendus -= 1
+
+
+@contextmanager
+def traitements_suspendus(*traitements):
+    """
+    Ne pas exécuter ces TRAITEMENTS pour les commits de ce bloc (chargement en
+    masse : l'appelant supprime les snapshots, régénérés à la première lecture)
+    """
+    precedents = getattr(_en_attente, 'traitements_suspendus', ())
+    _en_attente.traitements_suspendus = precedents + traitements
+    try:
+        yield
+    finally:
+        _en_attente.traitements_suspendus = precedents
+
+
+# ============================================================================
+# PORTFOLIO
+# ============================================================================
+
+@receiver(post_save, sender=Portfolio)
+def portfolio_enregistre(sender, instance, update_fields=None, **kwargs):
+    # Le compteur de vues ne fait pas partie du contenu publié
+    if update_fields and set(update_fields) <= {'vue_count'}:
+        return
+    planifier_mise_a_jour([instance.pk])
+
+
+@receiver(pre_delete, sender=Portfolio)
+def portfolio_avant_suppression(sender, instance, **kwargs):
+    # Les liaisons M2M disparaissent avec le portfolio : mémoriser les éléments
+    # indexés via ce portfolio pour les retirer de la recherche après la suppression
+    instance._elements_lies = [
+        (modele, pk)
+        for modele in (Competence, Projet)
+        for pk in getattr(instance, modele._meta.model_name + 's').values_list('pk', flat=True)
+    ]
+    instance._pk_supprime = instance.pk
+
+
+@receiver(post_delete, sender=Portfolio)
+def portfolio_supprime(sender, instance, **kwargs):
+    planifier_mise_a_jour(
+        [getattr(instance, '_pk_supprime', instance.pk)],
+        getattr(instance, '_elements_lies', [])
+    )
+
+
+# ============================================================================
+# CONTACTS, COMPÉTENCES ET PROJETS
+# ============================================================================
+
+@receiver(post_save, sender=Contact)
+@receiver(post_save, sender=Competence)
+@receiver(post_save, sender=Projet)
+def element_enregistre(sender, instance, created=False, **kwargs):
+    # Un élément nouvellement créé n'est encore lié à aucun portfolio
+    if created or _signaux_suspendus():
+        return
+    contenu_modifie(portfolios_de(instance), [(sender, instance.pk)])
+
+
+@receiver(pre_delete, sender=Contact)
+@receiver(pre_delete, sender=Competence)
+@receiver(pre_delete, sender=Projet)
+def element_avant_suppression(sender, instance, **kwargs):
+    if _signaux_suspendus():
+        return
+    # Les liaisons M2M disparaissent avec l'élément : les mémoriser avant
+    instance._portfolios_lies = portfolios_de(instance)
+    instance._pk_supprime = instance.pk
+
+
+@receiver(post_delete, sender=Contact)
+@receiver(post_delete, sender=Competence)
+@receiver(post_delete, sender=Projet)
+def element_supprime(sender, instance, **kwargs):
+    if _signaux_suspendus():
+        return
+    contenu_modifie(
+        getattr(instance, '_portfolios_lies', []),
+        [(sender, getattr(instance, '_pk_supprime', instance.pk))]
+    )
+
+
+@receiver(m2m_changed, sender=Portfolio.contacts.through)
+@receiver(m2m_changed, sender=Portfolio.competences.through)
+@receiver(m2m_changed, sender=Portfolio.projets.through)
+def liaisons_modifiees(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if not reverse:
+        # instance est le portfolio, pk_set contient des ids d'éléments de `model`
+        if action == 'pre_clear':
+            relation = sender._meta.get_field(model._meta.model_name)
+            instance._elements_lies = list(
+                sender.objects.filter(portfolio_id=instance.pk).values_list(relation.attname, flat=True)
+            )
+        elif action == 'post_clear':
+            elements = getattr(instance, '_elements_lies', [])
+            contenu_modifie([instance.pk], [(model, pk) for pk in elements])
+        elif action in ('post_add', 'post_remove'):
+            contenu_modifie([instance.pk], [(model, pk) for pk in pk_set or []])
+        return
+
+    # instance est l'élément, pk_set contient des ids de portfolios
+    element = [(type(instance), instance.pk)]
+    if action == 'pre_clear':
+        instance._portfolios_lies = portfolios_de(instance)
+    elif action == 'post_clear':
+        contenu_modifie(getattr(instance, '_portfolios_lies', []), element)
+    elif action in ('post_add', 'post_remove'):
+        contenu_modifie(pk_set or [], element)
+
+
+# ============================================================================
+# IMAGES
+# ============================================================================
+
+@receiver(post_save, sender=Portfolio)
+@receiver(post_save, sender=Projet)
+def images_enregistrees(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & set(CHAMPS_IMAGES[sender]):
+        return
+    if champs_a_traiter(instance):
+        # Après le commit : le thread de traitement doit voir l'image enregistrée
+        pk = instance.pk
+        transaction.on_commit(lambda: planifier_traitement(sender, pk))
+
+
+# ============================================================================
+# FICHIERS PARTAGÉS (références des blobs, voir storage.py)
+# ============================================================================
+
+def _noms_fichiers(instance):
+    """Noms des fichiers image chargés sur l'instance (les champs différés sont ignorés)"""
+    noms = {}
+    for champ in CHAMPS_IMAGES[type(instance)]:
+        if champ in instance.__dict__:
+            valeur = instance.__dict__[champ]
+            noms[champ] = getattr(valeur, 'name', valeur) or None
+    return noms
+
+
+@receiver(post_init, sender=Portfolio)
+@receiver(post_init, sender=Projet)
+def fichiers_charges(sender, instance, **kwargs):
+    instance._fichiers_initiaux = _noms_fichiers(instance)
+
+
+@receiver(post_save, sender=Portfolio)
+@receiver(post_save, sender=Projet)
+def fichiers_enregistres(sender, instance, created=False, update_fields=None, **kwargs):
+    initiaux = {} if created else instance._fichiers_initiaux
+    actuels = _noms_fichiers(instance)
+    deltas = Counter()
+    for champ, nom in actuels.items():
+        if update_fields and champ not in update_fields:
+            continue
+        if not created and champ not in initiaux:
+            # Champ différé au chargement : ancienne valeur inconnue
+            continue
+        if initiaux.get(champ) != nom:
+            deltas[initiaux.get(champ)] -= 1
+            deltas[nom] += 1
+    ajuster_references(deltas)
+    instance._fichiers_initiaux = actuels
+
+
+@receiver(post_delete, sender=Portfolio)
+@receiver(post_delete, sender=Projet)
+def fichiers_supprimes(sender, instance, **kwargs):
+    deltas = Counter()
+    for nom in _noms_fichiers(instance).values():
+        deltas[nom] -= 1
+    ajuster_references(deltas)
@@ -0,0 +1,82 @@
+"""
+Attribution des slugs de portfolio.
+
+Les slugs déjà pris pour une base (« base » et « base-N ») sont lus en une
+seule requête par plage sur l'index unique (base- < slug < base.), puis le
+plus petit suffixe libre est choisi en mémoire. Une collision concurrente
+reste possible entre la lecture et l'INSERT : Portfolio.save réessaie alors
+avec un nouveau slug (voir TENTATIVES).
+"""
+import re
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .models import Portfolio
+
+LONGUEUR_MAX = Portfolio._meta.get_field('slug').max_length
+
+# Place réservée au suffixe « -N » quand la base est trop longue
+LONGUEUR_SUFFIXE = 8
+
+TENTATIVES = 5
+
+BASES_PAR_REQUETE = 100
+
+
+def base_slug(portfolio):
+    """Slug de base d'un portfolio : prénom-nom-titre"""
+    base = slugify(f"{portfolio.utilisateur.prenom}-{portfolio.utilisateur.nom}-{portfolio.titre}")
+    return base[:LONGUEUR_MAX] or 'portfolio'
+
+
+def _racine(base):
+    """Préfixe auquel on ajoute « -N » sans dépasser la longueur maximale"""
+    return base[:LONGUEUR_MAX - LONGUEUR_SUFFIXE].rstrip('-')
+
+
+def _filtre_collisions(base):
+    racine = _racine(base)
+    return Q(slug=base) | Q(slug__gt=f'{racine}-', slug__lt=f'{racine}.')
+
+
+def _premier_libre(base, pris):
+    if base not in pris:
+        return base
+    racine = _racine(base)
+    motif = re.compile(rf'^{re.escape(racine)}-(\d+)$')
+    suffixes = {int(m.group(1)) for m in map(motif.match, pris) if m}
+    numero = 1
+    while numero in suffixes:
+        numero += 1
+    return f'{racine}-{numero}'
+
+
+def allouer_slugs(portfolios):
+    """
+    Attribuer un slug libre à chaque portfolio qui n'en a pas.
+    Une requête par groupe de BASES_PAR_REQUETE bases distinctes ; les
+    portfolios ne sont pas enregistrés.
+    """
+    a_traiter = [(portfolio, base_slug(portfolio)) for portfolio in portfolios if not portfolio.slug]
+    if not a_traiter:
+        return []
+
+    # Une requête par groupe de bases : SQLite limite la profondeur des expressions
+    bases = sorted({base for _, base in a_traiter})
+    pris = set()
+    for debut in range(0, len(bases), BASES_PAR_REQUETE):
+        filtre = Q()
+        for base in bases[debut:debut + BASES_PAR_REQUETE]:
+            filtre |= _filtre_collisions(base)
+        pris.update(Portfolio.objects.filter(filtre).values_list('slug', flat=True))
+
+    for portfolio, base in a_traiter:
+        portfolio.slug = _premier_libre(base, pris)
+        pris.add(portfolio.slug)
+    return [portfolio for portfolio, _ in a_traiter]
+
+
+def slug_deja_pris(portfolio):
+    """Le slug du portfolio appartient-il déjà à un autre portfolio ?"""
+    return Portfolio.objects.filter(slug=portfolio.slug).exclude(pk=portfolio.pk).exists()
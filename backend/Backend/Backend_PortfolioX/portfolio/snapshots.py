@@ -0,0 +1,69 @@
+"""
+Snapshots publics des portfolios publiés.
+
+Le document renvoyé par PortfolioPublicDataAPIView est sérialisé une fois
+(à la publication puis à chaque modification du portfolio ou de ses éléments)
+et stocké en JSON dans PortfolioSnapshot ; l'endpoint public sert ces octets tels quels.
+"""
+from rest_framework.renderers import JSONRenderer
+
+from .models import Portfolio, PortfolioSnapshot
+
+
+def construire_document(portfolio):
+    """Sérialiser le document public complet d'un portfolio en JSON (bytes)"""
+    from .serializers import (
+        ContactSerializer,
+        CompetenceSerializer,
+        ProjetSerializer,
+        PortfolioDetailSerializer,
+    )
+    
+    data = {
+        'portfolio': PortfolioDetailSerializer(portfolio).data,
+        'contacts': ContactSerializer(portfolio.contacts.all(), many=True).data,
+        'competences': CompetenceSerializer(portfolio.competences.filter(est_visible=True), many=True).data,
+        'projets': ProjetSerializer(portfolio.projets.filter(est_public=True), many=True).data,
+    }
+    return JSONRenderer().render(data)
+
+
+def reconstruire_snapshots(portfolio_ids):
+    """Régénérer les snapshots des portfolios publiés, supprimer ceux des autres"""
+    portfolio_ids = set(portfolio_ids)
+    if not portfolio_ids:
+        return
+    
+    publies = Portfolio.objects.select_related('utilisateur').filter(
+        id_portfolio__in=portfolio_ids,
+        statut='publie'
+    )
+    ids_publies = set()
+    for portfolio in publies:
+        PortfolioSnapshot.objects.update_or_create(
+            portfolio=portfolio,
+            defaults={'contenu': construire_document(portfolio)}
+        )
+        ids_publies.add(portfolio.pk)
+    
+    PortfolioSnapshot.objects.filter(
+        portfolio_id__in=portfolio_ids - ids_publies
+    ).delete()
+
+
+def obtenir_snapshot(portfolio_id):
+    """
+    Retourner le document public (bytes) d'un portfolio publié, ou None.
+    Le snapshot est généré à la volée s'il n'existe pas encore.
+    """
+    contenu = PortfolioSnapshot.objects.filter(
+        portfolio_id=portfolio_id,
+        portfolio__statut='publie'
+    ).values_list('contenu', flat=True).first()
+    if contenu is not None:
+        return bytes(contenu)
+    
+    if not Portfolio.objects.filter(id_portfolio=portfolio_id, statut='publie').exists():
+        return None
+    reconstruire_snapshots([portfolio_id])
+    return obtenir_snapshot(portfolio_id)
@@ -0,0 +1,97 @@
+"""
+Statistiques globales de la plateforme.
+
+Les compteurs sont calculés par agrégation conditionnelle (une requête par
+modèle) et stockés dans StatistiquesPlateforme. L'endpoint public lit cette
+ligne et ne recalcule que si elle est plus ancienne que
+PORTFOLIO_STATS_MAX_AGE secondes ; la commande refresh_platform_stats permet
+de la rafraîchir périodiquement (cron).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Contact, Competence, Projet, Portfolio, StatistiquesPlateforme
+
+AGE_MAX_PAR_DEFAUT = 300
+
+# Identifiant de l'unique ligne de StatistiquesPlateforme
+LIGNE_STATISTIQUES = 1
+
+
+def calculer_statistiques_plateforme():
+    """Calculer les statistiques globales (une requête par modèle)"""
+    portfolios = Portfolio.objects.aggregate(
+        total=Count('id_portfolio'),
+        publies=Count('id_portfolio', filter=Q(statut='publie')),
+        brouillons=Count('id_portfolio', filter=Q(statut='brouillon')),
+        archives=Count('id_portfolio', filter=Q(statut='archive')),
+        vues_total=Sum('vue_count'),
+    )
+    portfolios['vues_total'] = portfolios['vues_total'] or 0
+    
+    competences = Competence.objects.aggregate(
+        total=Count('id_competence'),
+        visibles=Count('id_competence', filter=Q(est_visible=True)),
+        **{
+            categorie: Count('id_competence', filter=Q(categorie=categorie, est_visible=True))
+            for categorie, _ in Competence.CATEGORIE_CHOICES
+        }
+    )
+    par_categorie = {
+        categorie: competences.pop(categorie)
+        for categorie, _ in Competence.CATEGORIE_CHOICES
+    }
+    competences['par_categorie'] = {
+        categorie: count for categorie, count in par_categorie.items() if count > 0
+    }
+    
+    projets = Projet.objects.aggregate(
+        total=Count('id_projet'),
+        publics=Count('id_projet', filter=Q(est_public=True)),
+        termines=Count('id_projet', filter=Q(est_termine=True)),
+    )
+    langages = Projet.objects.filter(est_public=True).values('langage_projet').annotate(
+        count=Count('id_projet')
+    ).order_by('-count')[:10]
+    projets['par_langage'] = {
+        langage['langage_projet']: langage['count'] for langage in langages
+    }
+    
+    contacts = Contact.objects.aggregate(
+        total=Count('id_contact'),
+        principaux=Count('id_contact', filter=Q(est_principal=True)),
+    )
+    
+    return {
+        'portfolios': portfolios,
+        'competences': competences,
+        'projets': projets,
+        'contacts': contacts,
+    }
+
+
+def rafraichir_statistiques_plateforme():
+    """Recalculer et enregistrer les statistiques globales"""
+    donnees = calculer_statistiques_plateforme()
+    StatistiquesPlateforme.objects.update_or_create(
+        pk=LIGNE_STATISTIQUES,
+        defaults={'donnees': donnees, 'date_calcul': timezone.now()}
+    )
+    return donnees
+
+
+def obtenir_statistiques_plateforme():
+    """Statistiques enregistrées, recalculées si plus anciennes que PORTFOLIO_STATS_MAX_AGE"""
+    age_max = getattr(settings, 'PORTFOLIO_STATS_MAX_AGE', AGE_MAX_PAR_DEFAUT)
+    limite = timezone.now() - timedelta(seconds=age_max)
+    
+    donnees = StatistiquesPlateforme.objects.filter(
+        pk=LIGNE_STATISTIQUES,
+        date_calcul__gte=limite
+    ).values_list('donnees', flat=True).first()
+    if donnees is not None:
+        return donnees
+    return rafraichir_statistiques_plateforme()
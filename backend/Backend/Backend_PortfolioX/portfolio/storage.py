@@ -0,0 +1,106 @@
+"""
+Stockage des médias adressé par contenu.
+
+Un fichier envoyé est nommé d'après le SHA-256 de son contenu et rangé dans
+des sous-dossiers tirés du hash : cas/ab/cd/abcd…<ext>. Deux envois identiques
+(ré-upload, duplication de portfolio) pointent vers le même fichier, stocké
+une seule fois, et aucun dossier ne dépasse quelques milliers d'entrées.
+
+Chaque fichier partagé a une ligne BlobMedia qui compte les champs image qui
+le référencent (tenue à jour par signals.py). Un blob qui n'est plus
+référencé n'est pas supprimé immédiatement : purge_media_blobs le supprime,
+avec ses variantes, après un délai de grâce (un envoi identique concurrent
+a pu le réutiliser entre-temps).
+
+Les noms déjà situés sous cas/ (variantes d'un blob, voir images.py) sont
+enregistrés tels quels. Les fichiers envoyés avant ce stockage restent servis
+à leur emplacement d'origine (repair_media_blobs --migrer les déplace).
+"""
+import hashlib
+import os
+from collections import Counter, defaultdict
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils import timezone
+
+PREFIXE = 'cas/'
+
+
+def adresse_par_contenu(nom):
+    """Le fichier est-il rangé dans l'espace adressé par contenu ?"""
+    return bool(nom) and nom.startswith(PREFIXE)
+
+
+def nom_blob(empreinte, nom_original):
+    extension = os.path.splitext(nom_original)[1].lower()
+    return f'{PREFIXE}{empreinte[:2]}/{empreinte[2:4]}/{empreinte}{extension}'
+
+
+def empreinte_contenu(contenu):
+    hachage = hashlib.sha256()
+    if hasattr(contenu, 'seek'):
+        contenu.seek(0)
+    for bloc in contenu.chunks():
+        hachage.update(bloc)
+    if hasattr(contenu, 'seek'):
+        contenu.seek(0)
+    return hachage.hexdigest()
+
+
+class StockageContenu(FileSystemStorage):
+
+    def save(self, name, content, max_length=None):
+        from .models import BlobMedia
+
+        if name is None:
+            name = content.name
+        if adresse_par_contenu(name):
+            return super().save(name, content, max_length)
+
+        cible = nom_blob(empreinte_contenu(content), name)
+        # Protéger le blob de la purge (jusqu'à ce que la référence soit comptée)
+        # avant de regarder le disque : une purge qui a déjà réservé la ligne
+        # bloque cette écriture jusqu'à la suppression du fichier, et le
+        # fichier est alors réécrit ; sinon la purge voit la ligne rafraîchie
+        BlobMedia.objects.bulk_create(
+            [BlobMedia(nom=cible, taille=content.size)], ignore_conflicts=True
+        )
+        BlobMedia.objects.filter(nom=cible).update(date_modification=timezone.now())
+        if not self.exists(cible):
+            cible = super().save(cible, content, max_length)
+        return cible
+
+    def supprimer_blob(self, nom):
+        """Supprimer le fichier d'un blob et ses variantes"""
+        dossier, fichier = os.path.split(nom)
+        racine = os.path.splitext(fichier)[0]
+        if self.exists(os.path.join(dossier, 'variantes')):
+            for variante in self.listdir(os.path.join(dossier, 'variantes'))[1]:
+                if variante.startswith(f'{racine}-'):
+                    self.delete(os.path.join(dossier, 'variantes', variante))
+        self.delete(nom)
+
+
+def ajuster_references(deltas):
+    """Appliquer {nom: delta} aux compteurs de références des blobs"""
+    from .models import BlobMedia
+
+    deltas = Counter({
+        nom: delta for nom, delta in deltas.items() if delta and adresse_par_contenu(nom)
+    })
+    if not deltas:
+        return
+
+    # Un UPDATE par valeur de delta distincte
+    par_delta = defaultdict(list)
+    for nom, delta in deltas.items():
+        par_delta[delta].append(nom)
+    maintenant = timezone.now()
+    BlobMedia.objects.bulk_create(
+        [BlobMedia(nom=nom) for nom in deltas], ignore_conflicts=True
+    )
+    for delta, noms in par_delta.items():
+        BlobMedia.objects.filter(nom__in=noms).update(
+            references=F('references') + delta, date_modification=maintenant
+        )
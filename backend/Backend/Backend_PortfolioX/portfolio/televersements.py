@@ -0,0 +1,199 @@
+"""
+Téléversement fragmenté et reprenable des images (photos de portfolio, images de projet).
+
+1. POST  /uploads/                       - ouvrir une session (cible, taille, nom du fichier)
+2. PUT   /uploads/<id>/?offset=<octets>  - envoyer un fragment (corps brut) à la suite des octets reçus
+3. POST  /uploads/<id>/finalize/         - vérifier et attacher le fichier au champ image
+
+Chaque fragment est lu par blocs depuis le flux de la requête et écrit dans
+un fichier temporaire propre à la requête (PORTFOLIO_UPLOAD_DIR) : la mémoire
+utilisée ne dépend pas de la taille du fichier. Il n'est recopié dans le
+fichier de la session qu'après avoir réservé sa plage d'octets : deux envois
+concurrents au même offset ne s'écrasent pas. Le SHA-256 est calculé au fil
+de l'écriture ; si le processus qui reçoit un fragment n'a pas l'état du
+précédent (autre worker, redémarrage), il est recalculé depuis le disque à la
+finalisation. Après une coupure, GET /uploads/<id>/ donne l'offset de reprise.
+La finalisation commence par supprimer la session : une seconde finalisation
+(nouvel essai, requête concurrente) reçoit 409 ou 404 au lieu de relire un
+fichier déjà déplacé.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from .models import Projet, Portfolio, Televersement
+
+# cible -> (modèle, champ image)
+CIBLES = {
+    'photo_profil': (Portfolio, 'photo_profil'),
+    'photo_template': (Portfolio, 'photo_template'),
+    'image_projet': (Projet, 'image_projet'),
+}
+
+TAILLE_BLOC = 64 * 1024
+TAILLE_MAX_PAR_DEFAUT = 20 * 1024 * 1024
+TAILLE_FRAGMENT_MAX_PAR_DEFAUT = 5 * 1024 * 1024
+EXPIRATION_PAR_DEFAUT = 24 * 3600
+
+# id de session -> (octets hachés, objet sha256) pour les sessions reçues par ce processus
+_hachages = {}
+_verrou = threading.Lock()
+
+
+class FragmentInvalide(Exception):
+    pass
+
+
+class FichierAssemble(File):
+    """Fichier temporaire déplacé (et non recopié) par FileSystemStorage"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def dossier():
+    chemin = Path(getattr(
+        settings, 'PORTFOLIO_UPLOAD_DIR', Path(tempfile.gettempdir()) / 'portfolio-televersements'
+    ))
+    chemin.mkdir(parents=True, exist_ok=True)
+    return chemin
+
+
+def taille_max():
+    return getattr(settings, 'PORTFOLIO_UPLOAD_TAILLE_MAX', TAILLE_MAX_PAR_DEFAUT)
+
+
+def taille_fragment_max():
+    return getattr(settings, 'PORTFOLIO_UPLOAD_TAILLE_FRAGMENT_MAX', TAILLE_FRAGMENT_MAX_PAR_DEFAUT)
+
+
+def chemin_fichier(televersement):
+    return dossier() / f'{televersement.pk.hex}.part'
+
+
+def _reprendre_hachage(televersement, offset):
+    with _verrou:
+        etat = _hachages.pop(televersement.pk, None)
+    if etat and etat[0] == offset:
+        return etat[1]
+    if offset == 0:
+        return hashlib.sha256()
+    return None
+
+
+def ouvrir(televersement):
+    """Créer le fichier temporaire vide d'une nouvelle session"""
+    chemin_fichier(televersement).touch()
+    with _verrou:
+        _hachages[televersement.pk] = (0, hashlib.sha256())
+
+
+def ecrire_fragment(televersement, offset, flux, longueur):
+    """
+    Écrire `longueur` octets lus dans `flux` à partir de `offset` ; retourne
+    True si la session a été avancée, False si un autre envoi l'a devancée
+    """
+    hachage = _reprendre_hachage(televersement, offset)
+    ecrits = 0
+    with tempfile.TemporaryFile(dir=dossier()) as fragment:
+        while ecrits < longueur:
+            bloc = flux.read(min(TAILLE_BLOC, longueur - ecrits))
+            if not bloc:
+                break
+            fragment.write(bloc)
+            if hachage is not None:
+                hachage.update(bloc)
+            ecrits += len(bloc)
+        if ecrits < longueur:
+            raise FragmentInvalide(f"Fragment incomplet : {ecrits} octets reçus sur {longueur}")
+
+        # Réserver la plage avant de l'écrire ; la réservation (verrou de ligne
+        # jusqu'au commit) est annulée si la recopie échoue
+        with transaction.atomic():
+            avance = Televersement.objects.filter(
+                pk=televersement.pk, recu=offset
+            ).update(recu=offset + longueur)
+            if avance:
+                fragment.seek(0)
+                with open(chemin_fichier(televersement), 'r+b') as fichier:
+                    fichier.seek(offset)
+                    shutil.copyfileobj(fragment, fichier, TAILLE_BLOC)
+                    fichier.truncate(offset + longueur)
+
+    if avance and hachage is not None:
+        with _verrou:
+            _hachages[televersement.pk] = (offset + longueur, hachage)
+    return bool(avance)
+
+
+def empreinte(televersement):
+    """SHA-256 du fichier assemblé (état en mémoire, sinon relecture par blocs)"""
+    with _verrou:
+        etat = _hachages.pop(televersement.pk, None)
+    if etat and etat[0] == televersement.taille:
+        return etat[1].hexdigest()
+
+    hachage = hashlib.sha256()
+    with open(chemin_fichier(televersement), 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(TAILLE_BLOC), b''):
+            hachage.update(bloc)
+    return hachage.hexdigest()
+
+
+def verifier_image(televersement):
+    try:
+        with Image.open(chemin_fichier(televersement)) as image:
+            image.verify()
+    except Exception:
+        raise FragmentInvalide("Le fichier envoyé n'est pas une image valide")
+
+
+def reserver_finalisation(televersement):
+    """
+    Supprimer la ligne d'une session complète avant de la finaliser : une seule
+    requête y parvient (nouvel essai du client, finalisations concurrentes) ;
+    le fichier reste à traiter puis à libérer par celle-ci
+    """
+    return bool(Televersement.objects.filter(
+        pk=televersement.pk, recu=televersement.taille
+    ).delete()[0])
+
+
+def attacher(televersement, instance):
+    """Attacher le fichier assemblé au champ image de `instance`"""
+    _, champ = CIBLES[televersement.cible]
+    nom = os.path.basename(televersement.nom_fichier)
+    with open(chemin_fichier(televersement), 'rb') as fichier:
+        getattr(instance, champ).save(nom, FichierAssemble(fichier, name=nom), save=False)
+    instance.save()
+
+
+def liberer(televersement):
+    """Oublier l'état en mémoire et le fichier d'une session"""
+    with _verrou:
+        _hachages.pop(televersement.pk, None)
+    chemin_fichier(televersement).unlink(missing_ok=True)
+
+
+def supprimer(televersement):
+    liberer(televersement)
+    televersement.delete()
+
+
+def purger_expires():
+    """Supprimer les sessions abandonnées et leurs fichiers"""
+    limite = timezone.now() - timedelta(
+        seconds=getattr(settings, 'PORTFOLIO_UPLOAD_EXPIRATION', EXPIRATION_PAR_DEFAUT)
+    )
+    for televersement in Televersement.objects.filter(date_creation__lt=limite):
+        supprimer(televersement)
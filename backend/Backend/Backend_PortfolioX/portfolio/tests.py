@@ -1,3 +1,1503 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from base64 import b64encode
+from collections import Counter
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from utilisateur.models import Utilisateur
+from . import urls as urls_portfolio
+from .compteurs import CompteurVues, compteur_vues
+from .duplication import dupliquer_portfolio
+from . import televersements
+from .images import traiter_images
+from .models import (
+    BlobMedia, Contact, Competence, Projet, Portfolio, PortfolioSnapshot, StatistiquesPlateforme, Televersement,
+)
+from .recherche import index_disponible, rechercher
+from .routes import PARAMETRES_REQUETE, parametres_route, routes_get
+from .serializers import PortfolioCreateUpdateSerializer
+from .snapshots import obtenir_snapshot
+from .statistiques import calculer_statistiques_plateforme, obtenir_statistiques_plateforme
+
+
+def creer_portfolio(numero, enfants=3, statut='publie'):
+    """Créer un utilisateur et son portfolio avec `enfants` éléments par relation"""
+    utilisateur = Utilisateur.objects.create_user(
+        email=f'utilisateur{numero}@exemple.fr',
+        nom=f'Nom{numero}',
+        prenom='Jean',
+    )
+    portfolio = Portfolio.objects.create(
+        utilisateur=utilisateur,
+        titre=f'Portfolio {numero}',
+        description='Description',
+        statut=statut,
+    )
+    for i in range(enfants):
+        portfolio.contacts.add(Contact.objects.create(
+            type_contact='email',
+            valeur_contact=f'contact{i}@exemple.fr',
+            utilisateur=utilisateur,
+            est_principal=i % 2 == 0,
+            ordre=enfants - i,
+        ))
+        portfolio.competences.add(Competence.objects.create(
+            nom_competence=f'Competence {i}',
+            niveau_competence='avance',
+            categorie='backend' if i % 2 else 'frontend',
+            utilisateur=utilisateur,
+            est_visible=i % 3 != 0,
+            ordre=i,
+        ))
+        portfolio.projets.add(Projet.objects.create(
+            titre_projet=f'Projet {i}',
+            description_projet='Description',
+            langage_projet='Python',
+            utilisateur=utilisateur,
+            est_public=i % 4 != 1,
+            ordre=enfants - i,
+        ))
+    return portfolio
+
+
+# Les tests de requêtes SQL mesurent les vues elles-mêmes, sans le cache des réponses
+@override_settings(PORTFOLIO_CACHE_TIMEOUT=0)
+class PublicPortfoliosAPIViewTests(TestCase):
+    url = '/api/portfolio/portfolios/public/all/'
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def compter_requetes(self):
+        with CaptureQueriesContext(connection) as contexte:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(contexte.captured_queries), response.json()
+
+    def test_apercus_identiques_aux_requetes_par_portfolio(self):
+        portfolio = creer_portfolio(1, enfants=8)
+
+        _, data = self.compter_requetes()
+        resultat = data['results'][0]
+
+        attendu = {
+            'contacts_principaux': [c.pk for c in portfolio.contacts.filter(est_principal=True)[:3]],
+            'competences_visibles': [c.pk for c in portfolio.competences.filter(est_visible=True)[:5]],
+            'projets_publics': [p.pk for p in portfolio.projets.filter(est_public=True)[:3]],
+        }
+        self.assertEqual([c['id_contact'] for c in resultat['contacts_principaux']], attendu['contacts_principaux'])
+        self.assertEqual([c['id_competence'] for c in resultat['competences_visibles']], attendu['competences_visibles'])
+        self.assertEqual([p['id_projet'] for p in resultat['projets_publics']], attendu['projets_publics'])
+        self.assertEqual(resultat['nombre_projets'], 8)
+
+    def test_nombre_de_requetes_constant_par_page(self):
+        creer_portfolio(1)
+        creer_portfolio(2)
+        requetes_petite_page, data = self.compter_requetes()
+        self.assertEqual(len(data['results']), 2)
+
+        for numero in range(3, 13):
+            creer_portfolio(numero, enfants=6)
+        requetes_page_pleine, data = self.compter_requetes()
+        self.assertEqual(len(data['results']), 12)
+
+        self.assertEqual(requetes_petite_page, requetes_page_pleine)
+
+
+@override_settings(PORTFOLIO_CACHE_TIMEOUT=0)
+class KeysetPaginationTests(TestCase):
+    url = '/api/portfolio/public-contacts/'
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_pages_enchainees_sans_doublon_ni_comptage(self):
+        for numero in range(1, 4):
+            creer_portfolio(numero, enfants=5)
+        attendu = [c['id_contact'] for c in self.client.get(self.url, {'page_size': 100}).json()['results']]
+
+        obtenus = []
+        suivant = f'{self.url}?pagination=cursor&page_size=4'
+        while suivant:
+            with CaptureQueriesContext(connection) as contexte:
+                data = self.client.get(suivant).json()
+            self.assertEqual(len(contexte.captured_queries), 1)
+            self.assertNotIn('count', data)
+            obtenus += [c['id_contact'] for c in data['results']]
+            suivant = data['next']
+
+        self.assertEqual(obtenus, attendu)
+
+    def test_curseur_invalide(self):
+        response = self.client.get(self.url, {'cursor': 'invalide'})
+        self.assertEqual(response.status_code, 404)
+
+        nul = b64encode(json.dumps([None, 1]).encode('ascii')).decode('ascii')
+        response = self.client.get('/api/portfolio/portfolios/published/', {'cursor': nul})
+        self.assertEqual(response.status_code, 404)
+
+    def test_portfolios_publies_stables_si_modifies_entre_deux_pages(self):
+        portfolios = [creer_portfolio(numero, enfants=0) for numero in range(1, 5)]
+        url = '/api/portfolio/portfolios/published/'
+        premiere = self.client.get(url, {'pagination': 'cursor', 'page_size': 2}).json()
+
+        # Modifier un portfolio de la page suivante ne le fait pas remonter
+        portfolios[1].titre = 'Modifié'
+        portfolios[1].save()
+        seconde = self.client.get(premiere['next']).json()
+
+        obtenus = [p['id_portfolio'] for p in premiere['results'] + seconde['results']]
+        self.assertEqual(obtenus, [p.pk for p in reversed(portfolios)])
+
+
+@override_settings(PORTFOLIO_CACHE_TIMEOUT=0)
+class RechercheTests(TestCase):
+    url = '/api/portfolio/public/search/'
+
+    def setUp(self):
+        if not index_disponible():
+            self.skipTest("Index FTS5 indisponible sur cette base")
+        self.client = APIClient()
+
+    def publier(self, numero, **champs):
+        with self.captureOnCommitCallbacks(execute=True):
+            portfolio = creer_portfolio(numero, enfants=0)
+            for champ, valeur in champs.items():
+                setattr(portfolio, champ, valeur)
+            portfolio.save()
+        return portfolio
+
+    def ids_trouves(self, query):
+        return [objet_id for _, objet_id, _, _ in rechercher(query, type_objet='portfolio')]
+
+    def test_titre_classe_avant_contenu(self):
+        dans_contenu = self.publier(1, description='Spécialiste kubernetes')
+        dans_titre = self.publier(2, titre='Kubernetes en production')
+
+        self.assertEqual(self.ids_trouves('kubernetes'), [dans_titre.pk, dans_contenu.pk])
+
+    def test_index_mis_a_jour_par_les_signaux(self):
+        portfolio = self.publier(1, titre='Architecte cloud')
+        self.assertEqual(self.ids_trouves('architecte'), [portfolio.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            portfolio.titre = 'Développeur mobile'
+            portfolio.save()
+        self.assertEqual(self.ids_trouves('architecte'), [])
+        self.assertEqual(self.ids_trouves('mobile'), [portfolio.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            portfolio.statut = 'brouillon'
+            portfolio.save()
+        self.assertEqual(self.ids_trouves('mobile'), [])
+
+    def test_curseur_par_cle_sur_score_et_id(self):
+        # Scores égaux : l'ordre est départagé par l'identifiant
+        attendus = [self.publier(numero, titre='Data engineer').pk for numero in range(1, 6)]
+
+        obtenus = []
+        suivant = f'{self.url}?q=data&type=portfolios&limit=2'
+        while suivant:
+            data = self.client.get(suivant).json()
+            obtenus += [p['id_portfolio'] for p in data['results']]
+            suivant = data['next']
+
+        self.assertEqual(obtenus, attendus)
+
+    def test_curseur_sans_type_refuse(self):
+        for numero in range(1, 4):
+            self.publier(numero, titre='Data engineer')
+        suivant = self.client.get(self.url, {'q': 'data', 'limit': 1}).json()['next']['portfolios']
+        curseur = suivant.split('cursor=')[1]
+
+        sans_type = self.client.get(self.url, {'q': 'data', 'cursor': curseur})
+        autre_type = self.client.get(self.url, {'q': 'data', 'type': 'projets', 'cursor': curseur})
+        sans_type_dans_curseur = self.client.get(self.url, {
+            'q': 'data', 'type': 'portfolios', 'cursor': 'eyJvIjogMX0=',  # {"o": 1}
+        })
+
+        self.assertEqual(sans_type.status_code, 404)
+        self.assertEqual(autre_type.status_code, 404)
+        self.assertEqual(sans_type_dans_curseur.status_code, 404)
+
+    def test_suppression_retire_les_elements_de_la_recherche(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            portfolio = creer_portfolio(1)
+        recherche = self.client.get(self.url, {'q': 'competence'}).json()
+        self.assertEqual(recherche['counts']['competences'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            portfolio.delete()
+
+        recherche = self.client.get(self.url, {'q': 'competence'}).json()
+        self.assertEqual(recherche['counts']['competences'], 0)
+        self.assertEqual(recherche['competences'], [])
+        self.assertEqual(self.client.get(self.url, {'q': 'projet'}).json()['counts']['projets'], 0)
+
+    def test_extrait_echappe(self):
+        self.publier(1, description='<img src=x onerror=alert(1)> django & "rest"')
+
+        response = self.client.get(self.url, {'q': 'django', 'type': 'portfolios'})
+
+        self.assertEqual(response.status_code, 200)
+        extrait = response.json()['results'][0]['extrait']
+        self.assertNotIn('<img', extrait)
+        self.assertIn('&lt;img src=x onerror=alert(1)&gt;', extrait)
+        self.assertIn('<mark>django</mark> &amp; &quot;rest&quot;', extrait)
+
+
+class CacheReponsesPubliquesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio = creer_portfolio(1)
+        self.url = f'/api/portfolio/portfolios/{self.portfolio.pk}/public-projets/'
+
+    def test_visite_repetee_sans_requete_sql(self):
+        premiere = self.client.get(self.url)
+        self.assertEqual(premiere['X-Cache'], 'MISS')
+
+        with CaptureQueriesContext(connection) as contexte:
+            seconde = self.client.get(self.url)
+        self.assertEqual(seconde['X-Cache'], 'HIT')
+        self.assertEqual(len(contexte.captured_queries), 0)
+        self.assertEqual(seconde.content, premiere.content)
+
+    def test_modification_invalide_les_reponses(self):
+        self.client.get(self.url)
+        self.client.get('/api/portfolio/public-projets/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            projet = self.portfolio.projets.filter(est_public=True).first()
+            projet.titre_projet = 'Nouveau titre'
+            projet.save()
+
+        for url in (self.url, '/api/portfolio/public-projets/'):
+            response = self.client.get(url)
+            self.assertEqual(response['X-Cache'], 'MISS')
+            self.assertContains(response, 'Nouveau titre')
+
+    def test_modification_d_un_brouillon_conserve_les_listes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            brouillon = creer_portfolio(2, statut='brouillon')
+        self.client.get('/api/portfolio/public-projets/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            brouillon.titre = 'Toujours en brouillon'
+            brouillon.save()
+        self.assertEqual(self.client.get('/api/portfolio/public-projets/')['X-Cache'], 'HIT')
+
+    def test_depublication_invalide_les_listes(self):
+        self.client.get('/api/portfolio/public-projets/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio.statut = 'brouillon'
+            self.portfolio.save()
+
+        response = self.client.get('/api/portfolio/public-projets/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['count'], 0)
+
+    def test_requete_authentifiee_hors_cache(self):
+        self.client.force_authenticate(self.portfolio.utilisateur)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer jeton')
+        self.assertNotIn('X-Cache', response)
+
+
+# Le document est lu dans le snapshot, sans le cache des réponses
+@override_settings(PORTFOLIO_CACHE_TIMEOUT=0)
+class SnapshotsTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio = creer_portfolio(1)
+        self.url = f'/api/portfolio/portfolios/{self.portfolio.pk}/public-data/'
+
+    def document(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_snapshot_construit_a_la_publication(self):
+        self.assertTrue(PortfolioSnapshot.objects.filter(portfolio=self.portfolio).exists())
+        with CaptureQueriesContext(connection) as contexte:
+            self.document()
+        self.assertEqual(len(contexte.captured_queries), 2)
+
+    def test_modification_d_un_element_reconstruit_le_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            projet = self.portfolio.projets.filter(est_public=True).first()
+            projet.titre_projet = 'Nouveau titre'
+            projet.save()
+
+        self.assertIn('Nouveau titre', [p['titre_projet'] for p in self.document()['projets']])
+
+    def test_modification_des_liaisons_reconstruit_le_snapshot(self):
+        projet = self.portfolio.projets.filter(est_public=True).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio.projets.remove(projet)
+
+        self.assertNotIn(projet.pk, [p['id_projet'] for p in self.document()['projets']])
+
+    def test_depublication_supprime_le_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio.statut = 'brouillon'
+            self.portfolio.save()
+
+        self.assertFalse(PortfolioSnapshot.objects.filter(portfolio=self.portfolio).exists())
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_nouveau_contact_principal_reconstruit_le_snapshot(self):
+        principal = self.portfolio.contacts.filter(est_principal=True).first()
+        self.client.force_authenticate(self.portfolio.utilisateur)
+
+        # ContactSerializer.validate retire l'ancien contact principal par update()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/portfolio/contacts/', {
+                'type_contact': 'email', 'valeur_contact': 'nouveau@exemple.fr', 'est_principal': True,
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        self.client.force_authenticate(None)
+        contacts = {c['id_contact']: c for c in self.document()['contacts']}
+        self.assertFalse(contacts[principal.pk]['est_principal'])
+
+
+# Vues cumulées en mémoire comme en production : pas d'UPDATE par consultation
+@override_settings(PORTFOLIO_VUES_FLUSH_INTERVAL=3600)
+class RequetesConditionnellesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.portfolio = creer_portfolio(1)
+
+    def tearDown(self):
+        compteur_vues.vider()
+
+    def test_detail_non_modifie_puis_modifie(self):
+        url = f'/api/portfolio/portfolios/{self.portfolio.pk}/'
+        response = self.client.get(url)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as contexte:
+            non_modifie = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(non_modifie.status_code, 304)
+        self.assertEqual(len(contexte.captured_queries), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            projet = self.portfolio.projets.first()
+            projet.titre_projet = 'Nouveau titre'
+            projet.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_cache_control_par_action(self):
+        publies = self.client.get('/api/portfolio/portfolios/published/')
+        projets = self.client.get(f'/api/portfolio/portfolios/{self.portfolio.pk}/projets-publics/')
+        self.client.force_authenticate(self.portfolio.utilisateur)
+        le_mien = self.client.get('/api/portfolio/portfolios/my_portfolio/')
+        liste = self.client.get('/api/portfolio/portfolios/')
+
+        self.assertEqual(publies['Cache-Control'], 'public, max-age=60')
+        self.assertEqual(projets['Cache-Control'], 'public, max-age=60')
+        self.assertEqual(le_mien['Cache-Control'], 'private, no-cache')
+        self.assertNotIn('Cache-Control', liste)
+
+    def test_donnees_publiques_if_modified_since(self):
+        url = f'/api/portfolio/portfolios/{self.portfolio.pk}/public-data/'
+        response = self.client.get(url)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+
+        non_modifie = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(non_modifie.status_code, 304)
+        self.assertEqual(non_modifie['ETag'], response['ETag'])
+
+
+
+class CompteurVuesTests(TestCase):
+
+    def setUp(self):
+        self.portfolio = creer_portfolio(1, enfants=0)
+
+    def compteur_differe(self):
+        compteur = CompteurVues(intervalle=3600)
+        self.addCleanup(lambda: compteur._minuterie and compteur._minuterie.cancel())
+        return compteur
+
+    def test_vues_cumulees_puis_ecrites_en_une_fois(self):
+        compteur = self.compteur_differe()
+        compteur.incrementer(self.portfolio.pk)
+        compteur.incrementer(self.portfolio.pk, 2)
+        self.assertEqual(compteur.en_attente(self.portfolio.pk), 3)
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.vue_count, 0)
+
+        with CaptureQueriesContext(connection) as contexte:
+            compteur.vider()
+        self.assertEqual(len(contexte.captured_queries), 1)
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.vue_count, 3)
+        self.assertEqual(compteur.en_attente(self.portfolio.pk), 0)
+
+    @override_settings(PORTFOLIO_VUES_FLUSH_INTERVAL=3600)
+    def test_get_vue_count_inclut_les_vues_en_attente(self):
+        self.addCleanup(compteur_vues.vider)
+        self.portfolio.increment_vue_count()
+        self.assertEqual(self.portfolio.get_vue_count(), 1)
+        compteur_vues.vider()
+        self.portfolio.refresh_from_db()
+        self.assertEqual((self.portfolio.vue_count, self.portfolio.get_vue_count()), (1, 1))
+
+    def test_instance_perimee_n_ecrase_pas_les_vues(self):
+        perimee = Portfolio.objects.get(pk=self.portfolio.pk)
+        compteur = self.compteur_differe()
+        compteur.incrementer(self.portfolio.pk, 5)
+        compteur.vider()
+
+        perimee.titre = 'Nouveau titre'
+        perimee.save()
+        self.portfolio.refresh_from_db()
+        self.assertEqual((self.portfolio.titre, self.portfolio.vue_count), ('Nouveau titre', 5))
+
+    def test_echec_d_ecriture_reprogramme_la_minuterie(self):
+        compteur = self.compteur_differe()
+        compteur.incrementer(self.portfolio.pk)
+        compteur._minuterie.cancel()
+        with patch.object(compteur, '_appliquer', side_effect=RuntimeError('base verrouillée')), \
+                self.assertLogs('portfolio.compteurs', 'ERROR'):
+            compteur._flush_periodique()
+        self.assertEqual(compteur.en_attente(self.portfolio.pk), 1)
+        self.assertIsNotNone(compteur._minuterie)
+
+class StatistiquesPlateformeTests(TestCase):
+
+    def statistiques_par_requete(self):
+        """Document de l'ancienne vue : une requête par compteur"""
+        return {
+            'portfolios': {
+                'total': Portfolio.objects.count(),
+                'publies': Portfolio.objects.filter(statut='publie').count(),
+                'brouillons': Portfolio.objects.filter(statut='brouillon').count(),
+                'archives': Portfolio.objects.filter(statut='archive').count(),
+                'vues_total': sum(Portfolio.objects.values_list('vue_count', flat=True)),
+            },
+            'competences': {
+                'total': Competence.objects.count(),
+                'visibles': Competence.objects.filter(est_visible=True).count(),
+                'par_categorie': {
+                    categorie: Competence.objects.filter(categorie=categorie, est_visible=True).count()
+                    for categorie, _ in Competence.CATEGORIE_CHOICES
+                    if Competence.objects.filter(categorie=categorie, est_visible=True).exists()
+                },
+            },
+            'projets': {
+                'total': Projet.objects.count(),
+                'publics': Projet.objects.filter(est_public=True).count(),
+                'termines': Projet.objects.filter(est_termine=True).count(),
+                'par_langage': {
+                    langage['langage_projet']: langage['count']
+                    for langage in Projet.objects.filter(est_public=True).values('langage_projet').annotate(
+                        count=Count('id_projet')
+                    ).order_by('-count')[:10]
+                },
+            },
+            'contacts': {
+                'total': Contact.objects.count(),
+                'principaux': Contact.objects.filter(est_principal=True).count(),
+            },
+        }
+
+    def test_document_identique_aux_requetes_par_compteur(self):
+        creer_portfolio(1, enfants=4)
+        creer_portfolio(2, enfants=2, statut='brouillon')
+        creer_portfolio(3, enfants=0, statut='archive')
+        Portfolio.objects.filter(titre='Portfolio 1').update(vue_count=7)
+
+        with CaptureQueriesContext(connection) as contexte:
+            donnees = calculer_statistiques_plateforme()
+
+        self.assertEqual(donnees, self.statistiques_par_requete())
+        # Catégories sans compétence visible absentes
+        self.assertEqual(set(donnees['competences']['par_categorie']), {'frontend', 'backend'})
+        self.assertEqual(len(contexte.captured_queries), 5)
+
+    @override_settings(PORTFOLIO_STATS_MAX_AGE=300)
+    def test_recalcul_apres_age_maximal(self):
+        creer_portfolio(1, enfants=0)
+        self.assertEqual(obtenir_statistiques_plateforme()['portfolios']['total'], 1)
+
+        creer_portfolio(2, enfants=0)
+        with CaptureQueriesContext(connection) as contexte:
+            self.assertEqual(obtenir_statistiques_plateforme()['portfolios']['total'], 1)
+        self.assertEqual(len(contexte.captured_queries), 1)
+
+        StatistiquesPlateforme.objects.update(date_calcul=timezone.now() - timedelta(seconds=301))
+        self.assertEqual(obtenir_statistiques_plateforme()['portfolios']['total'], 2)
+
+        creer_portfolio(3, enfants=0)
+        call_command('refresh_platform_stats', stdout=StringIO())
+        self.assertEqual(obtenir_statistiques_plateforme()['portfolios']['total'], 3)
+
+
+class AttributionSlugTests(TestCase):
+
+    def creer(self, numero, titre='Portfolio'):
+        utilisateur = Utilisateur.objects.create_user(
+            email=f'dupont{numero}@exemple.fr', nom='Dupont', prenom='Jean'
+        )
+        return Portfolio.objects.create(utilisateur=utilisateur, titre=titre)
+
+    def test_plus_petit_suffixe_libre_en_une_requete(self):
+        slugs = [self.creer(numero).slug for numero in range(4)]
+        self.assertEqual(slugs, [
+            'jean-dupont-portfolio', 'jean-dupont-portfolio-1',
+            'jean-dupont-portfolio-2', 'jean-dupont-portfolio-3',
+        ])
+
+        Portfolio.objects.filter(slug='jean-dupont-portfolio-1').delete()
+        with CaptureQueriesContext(connection) as contexte:
+            portfolio = self.creer(10)
+        self.assertEqual(portfolio.slug, 'jean-dupont-portfolio-1')
+        requetes_slug = [q for q in contexte.captured_queries if q['sql'].startswith('SELECT "portfolio_portfolio"."slug"')]
+        self.assertEqual(len(requetes_slug), 1)
+
+    def test_titre_long_tronque_avec_suffixe(self):
+        premier = self.creer(1, titre='x' * 300)
+        second = self.creer(2, titre='x' * 300)
+        self.assertEqual(len(premier.slug), 200)
+        self.assertLessEqual(len(second.slug), 200)
+        self.assertTrue(second.slug.endswith('-1'))
+
+
+class CompteursContenuTests(TestCase):
+
+    def verifier(self, portfolio):
+        portfolio.refresh_from_db()
+        self.assertEqual(portfolio.nb_contacts, portfolio.contacts.count())
+        self.assertEqual(portfolio.nb_contacts_principaux, portfolio.contacts.filter(est_principal=True).count())
+        self.assertEqual(portfolio.nb_competences, portfolio.competences.count())
+        self.assertEqual(portfolio.nb_competences_visibles, portfolio.competences.filter(est_visible=True).count())
+        self.assertEqual(portfolio.nb_projets, portfolio.projets.count())
+        self.assertEqual(portfolio.nb_projets_publics, portfolio.projets.filter(est_public=True).count())
+
+    def test_compteurs_suivent_elements_et_liaisons(self):
+        portfolio = creer_portfolio(1, enfants=4)
+        self.verifier(portfolio)
+
+        projet = portfolio.projets.filter(est_public=True).first()
+        projet.est_public = False
+        projet.save()
+        self.verifier(portfolio)
+
+        portfolio.competences.clear()
+        portfolio.contacts.first().delete()
+        self.verifier(portfolio)
+        self.assertFalse(portfolio.can_be_published())
+
+    def test_instance_perimee_n_ecrase_pas_les_compteurs(self):
+        portfolio = creer_portfolio(1, enfants=2)
+        perimee = Portfolio.objects.get(pk=portfolio.pk)
+        portfolio.projets.clear()
+
+        perimee.titre = 'Nouveau titre'
+        perimee.save()
+        self.verifier(portfolio)
+
+
+class DuplicationTests(TestCase):
+
+    def dupliquer(self, source, numero):
+        utilisateur = Utilisateur.objects.create_user(
+            email=f'copie{numero}@exemple.fr', nom='Copie', prenom='Jean'
+        )
+        source = Portfolio.objects.get(pk=source.pk)
+        with CaptureQueriesContext(connection) as contexte:
+            copie = dupliquer_portfolio(source, utilisateur)
+        return copie, len(contexte.captured_queries)
+
+    def test_copie_complete_et_fichiers_partages(self):
+        source = creer_portfolio(1, enfants=4)
+        Projet.objects.filter(portfolios=source).update(image_projet='projets/capture.png')
+
+        copie, _ = self.dupliquer(source, 1)
+
+        self.assertEqual(copie.statut, 'brouillon')
+        self.assertEqual(copie.nb_projets, 4)
+        self.assertEqual(
+            list(copie.projets.values_list('titre_projet', 'image_projet')),
+            list(source.projets.values_list('titre_projet', 'image_projet')),
+        )
+        self.assertFalse(copie.contacts.filter(pk__in=source.contacts.all()).exists())
+
+    def test_nombre_de_requetes_independant_du_nombre_d_elements(self):
+        _, requetes_petit = self.dupliquer(creer_portfolio(1, enfants=2), 1)
+        _, requetes_grand = self.dupliquer(creer_portfolio(2, enfants=30), 2)
+        self.assertEqual(requetes_petit, requetes_grand)
+
+
+class OperationsEnMasseTests(TestCase):
+
+    def setUp(self):
+        self.portfolio = creer_portfolio(1, enfants=3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.portfolio.utilisateur)
+
+    def creer_competences(self, nombre):
+        lot = [
+            {'nom_competence': f'Nouvelle {i}', 'niveau_competence': 'debutant'}
+            for i in range(nombre)
+        ]
+        with CaptureQueriesContext(connection) as contexte:
+            response = self.client.post('/api/portfolio/competences/bulk/', lot, format='json')
+        return response, len(contexte.captured_queries)
+
+    def test_creation_en_nombre_de_requetes_constant(self):
+        response, requetes_petit = self.creer_competences(2)
+        self.assertEqual(response.status_code, 201)
+        Competence.objects.filter(nom_competence__startswith='Nouvelle').delete()
+
+        response, requetes_grand = self.creer_competences(60)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['resultats']), 60)
+        self.assertEqual(requetes_petit, requetes_grand)
+
+    def test_lot_invalide_rien_n_est_enregistre(self):
+        lot = [
+            {'nom_competence': 'Competence 0', 'niveau_competence': 'avance'},
+            {'nom_competence': 'Doublon', 'niveau_competence': 'avance'},
+            {'nom_competence': 'Doublon', 'niveau_competence': 'avance'},
+        ]
+        response = self.client.post('/api/portfolio/competences/bulk/', lot, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [resultat['statut'] for resultat in response.data['resultats']],
+            ['invalide', 'valide', 'invalide'],
+        )
+        self.assertFalse(Competence.objects.filter(nom_competence='Doublon').exists())
+
+    def test_limite_de_contacts_sur_le_lot(self):
+        lot = [{'type_contact': 'email', 'valeur_contact': f'lot{i}@exemple.fr'} for i in range(8)]
+        response = self.client.post('/api/portfolio/contacts/bulk/', lot, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.portfolio.contacts.count(), 3)
+
+    def test_modification_et_suppression_mettent_a_jour_les_compteurs(self):
+        projets = list(self.portfolio.projets.values_list('id_projet', flat=True))
+        lot = [{'id_projet': pk, 'est_public': False} for pk in projets]
+        response = self.client.patch('/api/portfolio/projets/bulk/', lot, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.nb_projets_publics, 0)
+
+        contacts = list(self.portfolio.contacts.values_list('id_contact', flat=True))
+        response = self.client.delete('/api/portfolio/contacts/bulk/', contacts[:2], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.nb_contacts, 1)
+
+    def test_elements_d_un_autre_utilisateur_introuvables(self):
+        autre = creer_portfolio(2, enfants=1)
+        ids = [autre.contacts.get().pk, self.portfolio.contacts.first().pk]
+        response = self.client.delete('/api/portfolio/contacts/bulk/', ids, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['resultats'][0]['statut'], 'invalide')
+        self.assertEqual(Contact.objects.filter(pk__in=ids).count(), 2)
+
+
+class ElementsUtilisateurFieldTests(TestCase):
+
+    def valider(self, portfolio, projets):
+        request = APIRequestFactory().patch('/')
+        request.user = portfolio.utilisateur
+        serializer = PortfolioCreateUpdateSerializer(
+            portfolio, data={'projets_ids': projets}, partial=True, context={'request': request}
+        )
+        with CaptureQueriesContext(connection) as contexte:
+            valide = serializer.is_valid()
+        return serializer, valide, len(contexte.captured_queries)
+
+    def test_une_requete_quel_que_soit_le_nombre_d_ids(self):
+        portfolio = creer_portfolio(1, enfants=40)
+        ids = list(Projet.objects.filter(utilisateur=portfolio.utilisateur).values_list('pk', flat=True))
+
+        _, valide, requetes = self.valider(portfolio, ids)
+        self.assertTrue(valide)
+        self.assertEqual(requetes, 1)
+
+    def test_ids_etrangers_et_inconnus_signales_ensemble(self):
+        portfolio = creer_portfolio(1, enfants=1)
+        etranger = creer_portfolio(2, enfants=1).projets.get().pk
+
+        serializer, valide, _ = self.valider(portfolio, [portfolio.projets.get().pk, etranger, 99999])
+        self.assertFalse(valide)
+        self.assertIn(f'{etranger}, 99999', str(serializer.errors['projets_ids']))
+
+
+MEDIA_TEST = tempfile.mkdtemp()
+
+
+class MediaTemporaireTestCase(TestCase):
+    """Les fichiers écrits sous MEDIA_TEST sont supprimés après la classe"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEST, ignore_errors=True)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEST, PORTFOLIO_IMAGE_LARGEURS=[320, 640], PORTFOLIO_IMAGE_FORMATS=['webp'])
+class VariantesImagesTests(MediaTemporaireTestCase):
+
+    def image(self, largeur, hauteur):
+        tampon = BytesIO()
+        Image.new('RGB', (largeur, hauteur), 'red').save(tampon, format='JPEG')
+        return SimpleUploadedFile('capture.jpg', tampon.getvalue(), content_type='image/jpeg')
+
+    def test_variantes_generees_apres_le_commit(self):
+        portfolio = creer_portfolio(1, enfants=1)
+        projet = portfolio.projets.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            projet.image_projet = self.image(1000, 500)
+            projet.save()
+
+        projet.refresh_from_db()
+        formats = projet.variantes_images['image_projet']['formats']
+        self.assertEqual(sorted(formats['webp']), ['320', '640'])
+        with Image.open(projet.image_projet.storage.path(formats['webp']['320'])) as variante:
+            self.assertEqual(variante.size, (320, 160))
+
+        srcset = self.client.get(f'/api/portfolio/projets/{projet.pk}/').json()['image_projet_variantes']
+        self.assertIn('320w', srcset['webp'])
+
+    def test_pas_d_agrandissement_et_instance_perimee(self):
+        portfolio = creer_portfolio(1, enfants=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            portfolio.photo_profil = self.image(400, 400)
+            portfolio.save()
+            perimee = Portfolio.objects.get(pk=portfolio.pk)
+
+        # Une instance chargée avant le traitement n'efface pas les variantes
+        perimee.titre = 'Nouveau titre'
+        perimee.save()
+        portfolio.refresh_from_db()
+        largeurs = portfolio.variantes_images['photo_profil']['formats']['webp']
+        self.assertEqual(sorted(largeurs, key=int), ['320', '400'])
+        self.assertEqual(traiter_images(Portfolio, portfolio.pk), 0)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEST, PORTFOLIO_UPLOAD_DIR=MEDIA_TEST + '/televersements',
+                   PORTFOLIO_UPLOAD_TAILLE_FRAGMENT_MAX=4096)
+class TeleversementFragmenteTests(MediaTemporaireTestCase):
+
+    def setUp(self):
+        self.portfolio = creer_portfolio(1, enfants=1)
+        self.projet = self.portfolio.projets.get()
+        self.client = APIClient()
+        self.client.force_authenticate(self.portfolio.utilisateur)
+
+        tampon = BytesIO()
+        Image.effect_noise((200, 200), 50).convert('RGB').save(tampon, format='PNG')
+        self.contenu = tampon.getvalue()
+
+    def ouvrir(self, **donnees):
+        response = self.client.post('/api/portfolio/uploads/', {
+            'cible': 'image_projet', 'objet_id': self.projet.pk, 'nom_fichier': 'capture.png',
+            'taille': len(self.contenu), 'sha256': hashlib.sha256(self.contenu).hexdigest(), **donnees,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return f"/api/portfolio/uploads/{response.data['id_televersement']}/"
+
+    def envoyer(self, url, offset, taille=4096):
+        return self.client.put(
+            f'{url}?offset={offset}', self.contenu[offset:offset + taille],
+            content_type='application/octet-stream'
+        )
+
+    def test_envoi_reprise_et_finalisation(self):
+        url = self.ouvrir()
+        self.assertEqual(self.envoyer(url, 0).status_code, 200)
+        # Fragment déjà reçu : le serveur indique où reprendre
+        response = self.envoyer(url, 0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['recu'], 4096)
+
+        # Reprise par un autre processus : l'empreinte est recalculée depuis le disque
+        televersements._hachages.clear()
+        offset = self.client.get(url).data['recu']
+        while offset < len(self.contenu):
+            offset = self.envoyer(url, offset).data['recu']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{url}finalize/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['sha256'], hashlib.sha256(self.contenu).hexdigest())
+        self.projet.refresh_from_db()
+        with self.projet.image_projet.open('rb') as fichier:
+            self.assertEqual(fichier.read(), self.contenu)
+        self.assertIn('webp', self.projet.variantes_images['image_projet']['formats'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_envoi_devance_n_ecrase_pas_le_fragment_recu(self):
+        url = self.ouvrir()
+        self.assertEqual(self.envoyer(url, 0).status_code, 200)
+        televersement = Televersement.objects.get()
+
+        avance = televersements.ecrire_fragment(televersement, 0, BytesIO(b'x' * 4096), 4096)
+
+        self.assertFalse(avance)
+        with open(televersements.chemin_fichier(televersement), 'rb') as fichier:
+            self.assertEqual(fichier.read(), self.contenu[:4096])
+
+    def test_finalisation_repetee(self):
+        url = self.ouvrir()
+        offset = 0
+        while offset < len(self.contenu):
+            offset = self.envoyer(url, offset).data['recu']
+        televersement = Televersement.objects.get()
+
+        # Finalisation concurrente : la ligne est réservée par une seule requête
+        self.assertTrue(televersements.reserver_finalisation(televersement))
+        self.assertFalse(televersements.reserver_finalisation(televersement))
+        Televersement.objects.bulk_create([televersement])
+        with patch('portfolio.views.reserver_finalisation', return_value=False):
+            self.assertEqual(self.client.post(f'{url}finalize/').status_code, 409)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(f'{url}finalize/').status_code, 200)
+        # Nouvel essai du client après un délai dépassé
+        self.assertEqual(self.client.post(f'{url}finalize/').status_code, 404)
+
+    def test_empreinte_differente_et_cible_etrangere(self):
+        url = self.ouvrir(sha256='0' * 64)
+        offset = 0
+        while offset < len(self.contenu):
+            offset = self.envoyer(url, offset).data['recu']
+        self.assertEqual(self.client.post(f'{url}finalize/').status_code, 400)
+
+        autre = creer_portfolio(2, enfants=1).projets.get()
+        response = self.client.post('/api/portfolio/uploads/', {
+            'cible': 'image_projet', 'objet_id': autre.pk, 'nom_fichier': 'x.png', 'taille': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEST, PORTFOLIO_IMAGE_LARGEURS=[320], PORTFOLIO_IMAGE_FORMATS=['webp'])
+class StockageContenuTests(MediaTemporaireTestCase):
+
+    def setUp(self):
+        tampon = BytesIO()
+        Image.new('RGB', (640, 480), 'green').save(tampon, format='PNG')
+        self.contenu = tampon.getvalue()
+
+    def envoyer(self, projet, contenu=None, nom='capture.png'):
+        with self.captureOnCommitCallbacks(execute=True):
+            projet.image_projet = SimpleUploadedFile(nom, contenu or self.contenu)
+            projet.save()
+        return projet.image_projet.name
+
+    def references(self, nom):
+        return BlobMedia.objects.get(nom=nom).references
+
+    def test_fichiers_identiques_stockes_une_fois(self):
+        portfolio = creer_portfolio(1, enfants=2)
+        premier, second = portfolio.projets.all()
+
+        nom = self.envoyer(premier)
+        self.assertEqual(self.envoyer(second, nom='autre-nom.PNG'), nom)
+        self.assertRegex(nom, r'^cas/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(self.references(nom), 2)
+        self.assertEqual(len(default_storage.listdir(nom.rsplit('/', 1)[0])[1]), 1)
+
+        # Les variantes du blob partagé sont réutilisées
+        second.refresh_from_db()
+        premier.refresh_from_db()
+        self.assertEqual(second.variantes_images['image_projet'], premier.variantes_images['image_projet'])
+
+        copie = dupliquer_portfolio(portfolio, Utilisateur.objects.create_user(
+            email='copie@exemple.fr', nom='Copie', prenom='Jean'
+        ))
+        self.assertEqual(self.references(nom), 4)
+        copie.delete()
+        Projet.objects.filter(utilisateur__email='copie@exemple.fr').delete()
+        self.assertEqual(self.references(nom), 2)
+
+    def test_blob_orphelin_purge_avec_ses_variantes(self):
+        projet = creer_portfolio(1, enfants=1).projets.get()
+        nom = self.envoyer(projet)
+        variante = Projet.objects.get(pk=projet.pk).variantes_images['image_projet']['formats']['webp']['320']
+
+        tampon = BytesIO()
+        Image.new('RGB', (10, 10), 'blue').save(tampon, format='PNG')
+        self.envoyer(projet, tampon.getvalue())
+        self.assertEqual(self.references(nom), 0)
+
+        call_command('purge_media_blobs', delai=3600, stdout=StringIO())
+        self.assertTrue(default_storage.exists(nom))
+        call_command('purge_media_blobs', delai=-1, stdout=StringIO())
+        self.assertFalse(default_storage.exists(nom))
+        self.assertFalse(default_storage.exists(variante))
+        self.assertFalse(BlobMedia.objects.filter(nom=nom).exists())
+
+    def test_envoi_identique_pendant_la_purge_conserve_le_fichier(self):
+        projet = creer_portfolio(1, enfants=1).projets.get()
+        nom = self.envoyer(projet)
+        with self.captureOnCommitCallbacks(execute=True):
+            projet.image_projet = None
+            projet.save()
+        BlobMedia.objects.filter(nom=nom).update(
+            date_modification=timezone.now() - timedelta(hours=2)
+        )
+
+        # La purge passe juste après la vérification de présence du fichier
+        exists = default_storage.exists
+
+        def exists_puis_purge(name):
+            present = exists(name)
+            call_command('purge_media_blobs', delai=3600, stdout=StringIO())
+            return present
+
+        with patch.object(default_storage, 'exists', side_effect=exists_puis_purge):
+            self.assertEqual(default_storage.save('capture.png', SimpleUploadedFile('capture.png', self.contenu)), nom)
+
+        self.assertTrue(os.path.exists(default_storage.path(nom)))
+        self.assertTrue(BlobMedia.objects.filter(nom=nom).exists())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEST)
+class DistributionMediasTests(MediaTemporaireTestCase):
+
+    def setUp(self):
+        self.contenu = bytes(range(256)) * 4
+        self.nom = default_storage.save('capture.png', SimpleUploadedFile('capture.png', self.contenu))
+
+    def test_plage_et_cache_immutable(self):
+        response = self.client.get(f'/media/{self.nom}', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.contenu[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.contenu)}')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get(f'/media/{self.nom}', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(
+            self.client.get(f'/media/{self.nom}', HTTP_RANGE='bytes=5000-').status_code, 416
+        )
+
+    @override_settings(PORTFOLIO_MEDIA_SENDFILE='x-accel-redirect')
+    def test_transfert_delegue_au_serveur_frontal(self):
+        response = self.client.get(f'/media/{self.nom}')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.nom}')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEST, PORTFOLIO_EXPORT_DIR=os.path.join(MEDIA_TEST, 'export'),
+                   PORTFOLIO_IMAGE_LARGEURS=[320], PORTFOLIO_IMAGE_FORMATS=['webp'])
+class ExportStatiqueTests(MediaTemporaireTestCase):
+
+    def setUp(self):
+        self.portfolio = creer_portfolio(1, enfants=1)
+        tampon = BytesIO()
+        Image.new('RGB', (800, 400), 'blue').save(tampon, format='PNG')
+        projet = self.portfolio.projets.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            projet.image_projet = SimpleUploadedFile('capture.png', tampon.getvalue())
+            projet.save()
+        self.export = os.path.join(MEDIA_TEST, 'export', Portfolio.objects.get().slug)
+
+    def exporter(self, *args):
+        sortie = StringIO()
+        call_command('export_static_site', '--workers', '0', *args, stdout=sortie)
+        return sortie.getvalue()
+
+    def test_export_puis_reconstruction_des_seuls_portfolios_modifies(self):
+        self.assertIn('1 exportés', self.exporter())
+
+        with open(os.path.join(self.export, 'data.json')) as fichier:
+            projet = json.load(fichier)['projets'][0]
+        self.assertTrue(projet['image_projet'].startswith('media/cas/'))
+        self.assertIn('media/cas/', projet['image_projet_variantes']['webp'])
+        copie = os.path.join(self.export, projet['image_projet'])
+        self.assertEqual(os.stat(copie).st_ino, os.stat(os.path.join(MEDIA_TEST, projet['image_projet'][6:])).st_ino)
+        with open(os.path.join(self.export, 'index.html')) as fichier:
+            html = fichier.read()
+        self.assertIn('Portfolio 1', html)
+        self.assertIn(f'src="{projet["image_projet"]}"', html)
+
+        self.assertIn('Tous les exports sont à jour', self.exporter())
+        with self.captureOnCommitCallbacks(execute=True):
+            Portfolio.objects.get().save()
+        self.assertIn('1 exportés', self.exporter())
+
+    @override_settings(PORTFOLIO_EXPORT_AUTO=True)
+    def test_depublication_retire_l_export(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Portfolio.objects.get().save()
+        self.assertTrue(os.path.isfile(os.path.join(self.export, 'index.html')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            portfolio = Portfolio.objects.get()
+            portfolio.statut = 'brouillon'
+            portfolio.save()
+        self.assertFalse(os.path.exists(self.export))
+
+    @override_settings(PORTFOLIO_EXPORT_AUTO=True)
+    def test_echec_d_export_journalise_sans_bloquer_les_autres_traitements(self):
+        portfolio = Portfolio.objects.get()
+        with patch('portfolio.export_statique.exporter_portfolio', side_effect=OSError("disque plein")), \
+                self.assertLogs('portfolio.export_statique', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                portfolio.titre = 'Photographe animalier'
+                portfolio.save()
+
+        self.assertEqual(json.loads(obtenir_snapshot(portfolio.pk))['portfolio']['titre'], 'Photographe animalier')
+        if index_disponible():
+            self.assertEqual(
+                [objet_id for _, objet_id, _, _ in rechercher('animalier', type_objet='portfolio')],
+                [portfolio.pk]
+            )
+
+
+class ChargementEnMasseTests(MediaTemporaireTestCase):
+
+    def charger(self, *args, **kwargs):
+        sortie = StringIO()
+        call_command('load_portfolio_data', *args, stdout=sortie, **kwargs)
+        return sortie.getvalue()
+
+    def test_fixture_initiale_rechargeable(self):
+        Utilisateur.objects.create_user(email='admin@exemple.fr', nom='Admin', prenom='Jean')
+        for _ in range(2):
+            sortie = self.charger('--utilisateur', 'admin@exemple.fr')
+        self.assertEqual(Competence.objects.count(), 6)
+        self.assertEqual(Projet.objects.count(), 3)
+        self.assertEqual(Contact.objects.count(), 4)
+        self.assertIn('templates : 3 enregistrements ignorés', sortie)
+
+        with self.assertRaises(CommandError):
+            self.charger()
+
+    def test_ndjson_par_lots_avec_liaisons(self):
+        lignes = [
+            {'type': 'utilisateur', 'email': 'marie@exemple.fr', 'nom': 'Durand', 'prenom': 'Marie'},
+            *({'type': 'projet', 'id_projet': 10 + i, 'utilisateur': 'marie@exemple.fr',
+               'titre_projet': f'Projet {i}', 'description_projet': 'Description',
+               'langage_projet': 'Python', 'est_public': i != 2} for i in range(3)),
+            {'type': 'portfolio', 'utilisateur': 'marie@exemple.fr', 'titre': 'Mon portfolio',
+             'statut': 'publie', 'projets': [10, 11, 12]},
+            {'type': 'competence', 'utilisateur': 'marie@exemple.fr',
+             'nom_competence': 'Django', 'niveau_competence': 'expert'},
+        ]
+        chemin = os.path.join(MEDIA_TEST, 'donnees.ndjson')
+        os.makedirs(MEDIA_TEST, exist_ok=True)
+        with open(chemin, 'w', encoding='utf-8') as fichier:
+            fichier.write('\n'.join(json.dumps(ligne) for ligne in lignes))
+
+        # Blocs de lecture minuscules : les enregistrements sont coupés entre deux blocs
+        with patch('portfolio.chargement.TAILLE_BLOC', 7), self.captureOnCommitCallbacks(execute=True):
+            self.charger(chemin, '--batch-size', '2')
+        portfolio = Portfolio.objects.get()
+        self.assertEqual(portfolio.slug, 'marie-durand-mon-portfolio')
+        self.assertEqual((portfolio.nb_projets, portfolio.nb_projets_publics), (3, 2))
+        self.assertIsNotNone(portfolio.date_publication)
+        self.assertIn(b'Projet 0', obtenir_snapshot(portfolio.pk))
+        self.assertEqual(Competence.objects.get().utilisateur, portfolio.utilisateur)
+
+        # Rechargement : mise à jour, pas de doublons ; liaisons remplacées
+        lignes[4]['projets'] = [10]
+        lignes[1]['titre_projet'] = 'Projet renommé'
+        with open(chemin, 'w', encoding='utf-8') as fichier:
+            fichier.write('\n'.join(json.dumps(ligne) for ligne in lignes[:5]))
+        self.charger(chemin)
+        portfolio.refresh_from_db()
+        self.assertEqual(list(portfolio.projets.values_list('titre_projet', flat=True)), ['Projet renommé'])
+        self.assertEqual((Projet.objects.count(), portfolio.nb_projets), (3, 1))
+
+        # Projet d'un autre utilisateur
+        autre = creer_portfolio(2, enfants=1).projets.get()
+        with open(chemin, 'w', encoding='utf-8') as fichier:
+            fichier.write(json.dumps({**lignes[4], 'projets': [autre.pk]}))
+        with self.assertRaisesMessage(CommandError, str(autre.pk)):
+            self.charger(chemin)
+
+        # Projet existant réattribué : refusé, il reste lié au portfolio de son utilisateur
+        with open(chemin, 'w', encoding='utf-8') as fichier:
+            fichier.write(json.dumps({**lignes[1], 'utilisateur': autre.utilisateur.email}))
+        with self.assertRaisesMessage(CommandError, 'appartenant à un autre utilisateur : 10'):
+            self.charger(chemin)
+        self.assertEqual(Projet.objects.get(pk=10).utilisateur, portfolio.utilisateur)
+
+    def test_champs_image_ignores(self):
+        utilisateur = Utilisateur.objects.create_user(email='marie@exemple.fr', nom='Durand', prenom='Marie')
+        blob = 'cas/ab/cd/' + 'ab' * 32 + '.png'
+        chemin = os.path.join(MEDIA_TEST, 'images.ndjson')
+        os.makedirs(MEDIA_TEST, exist_ok=True)
+        with open(chemin, 'w', encoding='utf-8') as fichier:
+            fichier.write('\n'.join(json.dumps(ligne) for ligne in [
+                {'type': 'projet', 'id_projet': 10, 'utilisateur': utilisateur.email, 'titre_projet': 'Projet',
+                 'description_projet': 'Description', 'langage_projet': 'Python', 'image_projet': blob},
+                {'type': 'portfolio', 'utilisateur': utilisateur.email, 'titre': 'Portfolio',
+                 'photo_profil': blob, 'variantes_images': {'photo_profil': {}}},
+            ]))
+
+        self.charger(chemin)
+
+        self.assertFalse(Projet.objects.get().image_projet)
+        portfolio = Portfolio.objects.get()
+        self.assertFalse(portfolio.photo_profil)
+        self.assertEqual(portfolio.variantes_images, {})
+        self.assertFalse(BlobMedia.objects.exists())
+
+    def test_statut_charge_sur_un_portfolio_existant(self):
+        portfolio = creer_portfolio(1, enfants=0, statut='brouillon')
+        chemin = os.path.join(MEDIA_TEST, 'statut.ndjson')
+        os.makedirs(MEDIA_TEST, exist_ok=True)
+
+        def charger_statut(statut):
+            with open(chemin, 'w', encoding='utf-8') as fichier:
+                fichier.write(json.dumps({
+                    'type': 'portfolio', 'utilisateur': portfolio.utilisateur.email, 'statut': statut,
+                }))
+            self.charger(chemin)
+            portfolio.refresh_from_db()
+
+        charger_statut('publie')
+        self.assertEqual(portfolio.statut, 'publie')
+        publication = portfolio.date_publication
+        self.assertIsNotNone(publication)
+
+        # Rechargement publié : la date de première publication est conservée
+        charger_statut('publie')
+        self.assertEqual(portfolio.date_publication, publication)
+
+        charger_statut('brouillon')
+        self.assertIsNone(portfolio.date_publication)
+
+
+class DonneesSynthetiquesEtBenchmarkTests(TestCase):
+
+    def test_generation_puis_mesure_des_endpoints(self):
+        call_command('generate_synthetic_data', '--echelle', '12', '--batch-size', '5', stdout=StringIO())
+        self.assertEqual(Portfolio.objects.count(), 12)
+        portfolio = Portfolio.objects.filter(statut='publie').order_by('-nb_projets', '-nb_competences', 'pk').first()
+        self.assertEqual(portfolio.nb_projets, portfolio.projets.count())
+        self.assertTrue(portfolio.slug)
+
+        sortie = StringIO()
+        call_command(
+            'benchmark_endpoints', '--repetitions', '3', '--echauffement', '0',
+            '--routes', 'portfolio_public_data', 'portfolio-detail', 'contact-detail',
+            stdout=sortie, stderr=StringIO(),
+        )
+        rapport = json.loads(sortie.getvalue())
+        self.assertEqual(rapport['donnees']['portfolio_de_reference'], portfolio.pk)
+        mesures = {(mesure['route'], mesure['acces']): mesure for mesure in rapport['resultats']}
+        self.assertEqual(len(mesures), 6)
+        donnees = mesures['portfolio_public_data', 'anonyme']
+        self.assertEqual(donnees['statut'], 200)
+        self.assertEqual(donnees['url'], f'/api/portfolio/portfolios/{portfolio.pk}/public-data/')
+        self.assertGreater(donnees['octets'], 0)
+        self.assertLessEqual(donnees['p50_ms'], donnees['p99_ms'])
+
+
+
+@override_settings(PORTFOLIO_TIMING_TAUX=1, PORTFOLIO_CACHE_TIMEOUT=0)
+class ChronometrageTests(TestCase):
+
+    def setUp(self):
+        self.portfolio = creer_portfolio(1)
+        self.client = APIClient()
+
+    def etapes(self, response):
+        return {
+            entree.split(';')[0]: entree for entree in response['Server-Timing'].split(', ')
+        }
+
+    def test_retrieve_detaille_les_etapes(self):
+        with self.assertLogs('portfolio.chronometrage', 'INFO') as journal, \
+                CaptureQueriesContext(connection) as contexte:
+            response = self.client.get(f'/api/portfolio/portfolios/{self.portfolio.pk}/')
+        self.assertEqual(response.status_code, 200)
+        etapes = self.etapes(response)
+        self.assertEqual(list(etapes), ['total', 'vue', 'auth', 'sql', 'serialisation', 'rendu'])
+        self.assertIn(f'desc="{len(contexte.captured_queries)} requetes"', etapes['sql'])
+
+        ligne = json.loads(journal.records[0].getMessage())
+        self.assertEqual(ligne['vue'], 'portfolio:portfolio-detail')
+        self.assertEqual(ligne['statut'], 200)
+        self.assertEqual(ligne['requetes_sql'], len(contexte.captured_queries))
+        self.assertLessEqual(ligne['sql_ms'], ligne['total_ms'])
+
+    def test_reponse_sans_rendu_drf(self):
+        with self.assertLogs('portfolio.chronometrage', 'INFO'):
+            response = self.client.get(
+                f'/api/portfolio/portfolios/{self.portfolio.pk}/public-data/',
+                HTTP_ORIGIN='http://localhost:5173',
+            )
+        self.assertEqual(response.status_code, 200)
+        etapes = self.etapes(response)
+        self.assertLessEqual({'total', 'vue', 'auth', 'sql'}, set(etapes))
+        self.assertNotIn('rendu', etapes)
+        self.assertEqual(response['Timing-Allow-Origin'], 'http://localhost:5173')
+
+    @override_settings(PORTFOLIO_TIMING_TAUX=0)
+    def test_requete_non_echantillonnee(self):
+        with self.assertNoLogs('portfolio.chronometrage'):
+            response = self.client.get(f'/api/portfolio/portfolios/{self.portfolio.pk}/')
+        self.assertFalse(response.has_header('Server-Timing'))
+        with patch('portfolio.chronometrage.chronometrer') as chronometrer:
+            self.client.get(f'/api/portfolio/portfolios/{self.portfolio.pk}/')
+        chronometrer.assert_not_called()
+
+
+@override_settings(PORTFOLIO_PROFILS_DIR=os.path.join(MEDIA_TEST, 'profils'), PORTFOLIO_CACHE_TIMEOUT=0)
+class ProfilageTests(MediaTemporaireTestCase):
+    dossier = os.path.join(MEDIA_TEST, 'profils')
+
+    def setUp(self):
+        shutil.rmtree(self.dossier, ignore_errors=True)
+        self.portfolio = creer_portfolio(1)
+        self.admin = Utilisateur.objects.create_superuser(email='admin@exemple.fr', nom='Admin', prenom='Jean')
+        self.url = f'/api/portfolio/portfolios/{self.portfolio.pk}/'
+
+    def jeton(self, utilisateur):
+        return f'Bearer {RefreshToken.for_user(utilisateur).access_token}'
+
+    def test_profil_d_une_requete_du_staff(self):
+        response = APIClient().get(self.url, HTTP_X_PROFIL='1', HTTP_AUTHORIZATION=self.jeton(self.admin))
+        self.assertEqual(response.status_code, 200)
+        profil_id = response['X-Profil-Id']
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        liste = client.get('/api/portfolio/admin/profils/').json()
+        self.assertEqual([profil['id'] for profil in liste], [profil_id])
+        self.assertEqual(liste[0]['chemin'], self.url)
+
+        profil = client.get(f'/api/portfolio/admin/profils/{profil_id}/').json()
+        self.assertEqual(profil['nb_requetes_sql'], len(profil['requetes_sql']))
+        self.assertTrue(all('duree_ms' in requete for requete in profil['requetes_sql']))
+        self.assertTrue(any('retrieve' in appel['fonction'] for appel in profil['appels']))
+
+        telechargement = client.get(f'/api/portfolio/admin/profils/{profil_id}/pstats/')
+        self.assertEqual(telechargement.status_code, 200)
+        self.assertIn(f'{profil_id}.prof', telechargement['Content-Disposition'])
+        self.assertEqual(client.get('/api/portfolio/admin/profils/inconnu/').status_code, 404)
+
+    def test_drapeau_ignore_hors_staff(self):
+        proprietaire = self.portfolio.utilisateur
+        response = APIClient().get(
+            self.url, {'_profil': '1'}, HTTP_AUTHORIZATION=self.jeton(proprietaire)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('X-Profil-Id'))
+        self.assertFalse(APIClient().get(self.url).has_header('X-Profil-Id'))
+        self.assertFalse(os.path.exists(self.dossier) and os.listdir(self.dossier))
+
+        client = APIClient()
+        client.force_authenticate(proprietaire)
+        self.assertEqual(client.get('/api/portfolio/admin/profils/').status_code, 403)
+
+    @override_settings(PORTFOLIO_PROFILS_MAX=1)
+    def test_seuls_les_derniers_profils_sont_conserves(self):
+        for _ in range(2):
+            profil_id = APIClient().get(
+                self.url, HTTP_X_PROFIL='1', HTTP_AUTHORIZATION=self.jeton(self.admin)
+            )['X-Profil-Id']
+        self.assertEqual(sorted(os.listdir(self.dossier)), [f'{profil_id}.json', f'{profil_id}.prof'])
+
+# ==================== BUDGET DE REQUÊTES PAR ROUTE ====================
+
+class RetourArriere(Exception):
+    """Annule les données créées pour une mesure"""
+
+
+def normaliser_sql(sql):
+    """Requête sans ses valeurs, pour regrouper les répétitions d'un même motif"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    return re.sub(r'\b\d+\b', '?', sql)
+
+
+class BudgetRequetesMixin:
+    """
+    Chaque route GET du module `urls` est appelée, en anonyme puis authentifié,
+    avec 1 puis 50 éléments par relation : le nombre de requêtes doit tenir
+    dans son budget, ne pas grandir avec les données, et la réponse doit avoir
+    le statut attendu (une erreur ne mesure aucun travail de la vue).
+    """
+    urls = None
+    espace = ''
+    # {nom de route: (nombre maximal de requêtes, statut anonyme, statut authentifié)}
+    budgets = {}
+    # Routes réservées au staff : appelées avec un administrateur
+    routes_admin = set()
+    # {nom de route: raison} des routes non mesurables ici
+    routes_ignorees = {}
+    tailles = (1, 50)
+
+    def mesurer_routes(self, enfants):
+        """{(route, accès): (statut, requêtes SQL capturées)} avec `enfants` éléments par relation"""
+        mesures = {}
+        try:
+            # Mesurer les vues elles-mêmes, sans le cache des réponses, avec les
+            # vues cumulées en mémoire comme en production
+            with override_settings(PORTFOLIO_CACHE_TIMEOUT=0, PORTFOLIO_VUES_FLUSH_INTERVAL=3600), \
+                    transaction.atomic():
+                with self.captureOnCommitCallbacks(execute=True):
+                    portfolios = [creer_portfolio(numero, enfants) for numero in (1, 2, 3)]
+                    # Premier élément de chaque relation visible, quelle que soit la taille
+                    competence = portfolios[0].competences.order_by('pk').first()
+                    competence.est_visible = True
+                    competence.save()
+                    admin = Utilisateur.objects.create_superuser(
+                        email='admin@exemple.fr', nom='Admin', prenom='Budget',
+                    )
+                portfolio = portfolios[0]
+                valeurs = {
+                    'portfolio': portfolio.pk,
+                    'contact': portfolio.contacts.order_by('pk').first().pk,
+                    'competence': competence.pk,
+                    'projet': portfolio.projets.order_by('pk').first().pk,
+                    'utilisateur': portfolio.utilisateur_id,
+                }
+                for nom, parametres in routes_get(self.urls.urlpatterns):
+                    if nom in self.routes_ignorees:
+                        continue
+                    url = reverse(self.espace + nom, kwargs=parametres_route(nom, parametres, valeurs))
+                    for acces in ('anonyme', 'authentifie'):
+                        client = APIClient(raise_request_exception=False)
+                        if acces == 'authentifie':
+                            client.force_authenticate(admin if nom in self.routes_admin else portfolio.utilisateur)
+                        donnees = PARAMETRES_REQUETE.get(nom, {})
+                        # Premier appel : snapshots et caches paresseux
+                        client.get(url, donnees)
+                        with CaptureQueriesContext(connection) as contexte:
+                            response = client.get(url, donnees)
+                        mesures[nom, acces] = (
+                            response.status_code, [requete['sql'] for requete in contexte.captured_queries]
+                        )
+                compteur_vues.vider()
+                raise RetourArriere
+        except RetourArriere:
+            pass
+        return mesures
+
+    def rapport(self, petites, grandes):
+        """Requêtes apparues ou répétées avec plus de données (toutes sinon)"""
+        avant = Counter(map(normaliser_sql, petites))
+        apres = Counter(map(normaliser_sql, grandes))
+        lignes = [
+            f'  {nombre}× (contre {avant[sql]}) {sql}'
+            for sql, nombre in apres.items() if nombre > avant[sql]
+        ]
+        return '\n'.join(lignes or [f'  {sql}' for sql in grandes])
+
+    def test_inventaire_des_routes(self):
+        routes = {nom for nom, _ in routes_get(self.urls.urlpatterns)}
+        self.assertEqual(routes - set(self.routes_ignorees), set(self.budgets))
+
+    def test_budget_de_requetes(self):
+        petites, grandes = (self.mesurer_routes(enfants) for enfants in self.tailles)
+        for (nom, acces), (statut, requetes) in grandes.items():
+            with self.subTest(route=nom, acces=acces):
+                maximum, statut_anonyme, statut_authentifie = self.budgets[nom]
+                attendu = statut_anonyme if acces == 'anonyme' else statut_authentifie
+                self.assertEqual(petites[nom, acces][0], attendu, f'{nom} ({acces}) avec {self.tailles[0]} élément')
+                self.assertEqual(statut, attendu, f'{nom} ({acces}) avec {self.tailles[1]} éléments')
+                initiales = petites[nom, acces][1]
+                self.assertLessEqual(
+                    len(requetes), len(initiales),
+                    f'{nom} ({acces}) : {len(initiales)} requêtes avec {self.tailles[0]} élément, '
+                    f'{len(requetes)} avec {self.tailles[1]}\n{self.rapport(initiales, requetes)}'
+                )
+                self.assertLessEqual(
+                    len(requetes), maximum,
+                    f'{nom} ({acces}) : {len(requetes)} requêtes pour un budget de '
+                    f'{maximum}\n{self.rapport(initiales, requetes)}'
+                )
+
+
+class BudgetRequetesPortfolioTests(BudgetRequetesMixin, TestCase):
+    urls = urls_portfolio
+    espace = 'portfolio:'
+    routes_admin = {'cache_stats', 'profils'}
+    routes_ignorees = {
+        'my_portfolio': 'masquée par portfolios/<pk>/ du routeur (404)',
+        'competences_par_categorie': 'masquée par competences/<pk>/ du routeur (404)',
+        'televersement_detail': 'session de téléversement (uuid) propre à son auteur',
+        'profil_detail': 'profil enregistré sur disque par ProfilageMiddleware',
+        'profil_pstats': 'profil enregistré sur disque par ProfilageMiddleware',
+    }
+    budgets = {
+        'contact-list': (2, 200, 200),
+        'contact-portfolio-contacts': (2, 200, 200),
+        'contact-principaux': (2, 200, 200),
+        'contact-detail': (1, 200, 200),
+        'competence-list': (2, 200, 200),
+        'competence-par-categorie': (1, 200, 200),
+        'competence-detail': (1, 200, 200),
+        'projet-list': (2, 200, 200),
+        'projet-publics': (2, 200, 200),
+        'projet-detail': (1, 200, 200),
+        'portfolio-list': (2, 200, 200),
+        'portfolio-my-portfolio': (6, 401, 200),
+        'portfolio-published': (2, 200, 200),
+        'portfolio-search': (1, 200, 200),
+        'portfolio-detail': (5, 200, 200),
+        'portfolio-competences-publics': (2, 200, 200),
+        'portfolio-contacts-publics': (2, 200, 200),
+        'portfolio-projets-publics': (2, 200, 200),
+        'portfolio-stats': (3, 200, 200),
+        'api-root': (0, 200, 200),
+        'published_portfolios': (2, 200, 200),
+        'portfolio_search': (1, 200, 200),
+        'portfolio_stats': (3, 200, 200),
+        'contacts_principaux': (2, 200, 200),
+        'projets_publics': (2, 200, 200),
+        'portfolio_public_contacts': (2, 200, 200),
+        'portfolio_public_competences': (2, 200, 200),
+        'portfolio_public_projets': (2, 200, 200),
+        'portfolio_public_data': (2, 200, 200),
+        'public_portfolios_all': (5, 200, 200),
+        'portfolio_contacts_publics': (2, 200, 200),
+        'portfolio_competences_publics': (2, 200, 200),
+        'portfolio_projets_publics': (2, 200, 200),
+        'portfolio_contacts': (2, 200, 200),
+        'public_competences_list': (2, 200, 200),
+        'public_competences_by_category': (1, 200, 200),
+        'public_competence_detail': (1, 200, 200),
+        'public_projets_list': (2, 200, 200),
+        'public_projets_by_language': (1, 200, 200),
+        'public_projet_detail': (1, 200, 200),
+        'public_contacts_list': (2, 200, 200),
+        'public_contact_detail': (1, 200, 200),
+        'public_portfolio_stats': (1, 200, 200),
+        'public_platform_stats': (1, 200, 200),
+        'public_search': (5, 200, 200),
+        'cache_stats': (0, 401, 200),
+        'profils': (0, 401, 200),
+    }
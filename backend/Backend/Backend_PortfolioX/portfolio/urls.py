@@ -229,6 +229,46 @@ urlpatterns = [
     path('public/search/', 
          views.PublicSearchAPIView.as_view(), 
          name='public_search'),
+    
+    # ==========================================================================
+    # TÉLÉVERSEMENTS FRAGMENTÉS (authentifié)
+    # ==========================================================================
+    
+    # POST - Ouvrir un téléversement
+    path('uploads/', 
+         views.TeleversementAPIView.as_view(), 
+         name='televersement'),
+    
+    # GET/PUT/DELETE - État, envoi d'un fragment (?offset=), abandon
+    path('uploads/<uuid:pk>/', 
+         views.TeleversementDetailAPIView.as_view(), 
+         name='televersement_detail'),
+    
+    # POST - Vérifier et attacher le fichier assemblé
+    path('uploads/<uuid:pk>/finalize/', 
+         views.TeleversementFinalisationAPIView.as_view(), 
+         name='televersement_finalisation'),
+    
+    # ==========================================================================
+    # ADMINISTRATION
+    # ==========================================================================
+    
+    # GET - Compteurs du cache des réponses publiques (staff)
+    path('admin/cache-stats/', 
+         views.CacheStatsAPIView.as_view(), 
+         name='cache_stats'),
+    
+    path('admin/profils/', 
+         views.ProfilsAPIView.as_view(), 
+         name='profils'),
+    
+    path('admin/profils/<str:profil_id>/', 
+         views.ProfilDetailAPIView.as_view(), 
+         name='profil_detail'),
+    
+    path('admin/profils/<str:profil_id>/pstats/', 
+         views.ProfilPstatsAPIView.as_view(), 
+         name='profil_pstats'),
 ]
 
 # ==========================================================================
@@ -249,6 +289,7 @@ CONTACTS:
   ACTIONS PERSONNALISÉES:
   GET    /api/portfolio/contacts/principaux/ - Contacts principaux (public)
   GET    /api/portfolio/contacts/portfolio/{portfolio_id}/ - Contacts d'un portfolio spécifique (public)
+  POST/PATCH/DELETE /api/portfolio/contacts/bulk/ - Créer/modifier/supprimer un lot (authentifié, tout ou rien)
 
 COMPÉTENCES:
   GET    /api/portfolio/competences/       - Liste toutes les compétences (public pour portfolios publiés)
@@ -260,6 +301,7 @@ COMPÉTENCES:
 
   ACTIONS PERSONNALISÉES:
   GET    /api/portfolio/competences/par-categorie/ - Compétences par catégorie (public)
+  POST/PATCH/DELETE /api/portfolio/competences/bulk/ - Créer/modifier/supprimer un lot (authentifié, tout ou rien)
 
 PROJETS:
   GET    /api/portfolio/projets/           - Liste tous les projets (public pour portfolios publiés)
@@ -271,6 +313,7 @@ PROJETS:
 
   ACTIONS PERSONNALISÉES:
   GET    /api/portfolio/projets/publics/   - Projets publics seulement (public)
+  POST/PATCH/DELETE /api/portfolio/projets/bulk/ - Créer/modifier/supprimer un lot (authentifié, tout ou rien)
 
 PORTFOLIOS (CRUD STANDARD):
   GET    /api/portfolio/portfolios/        - Liste tous les portfolios (public pour publiés)
@@ -317,6 +360,40 @@ ENDPOINTS PUBLICS SUPPLÉMENTAIRES:
   GET    /api/portfolio/public/portfolio/{id}/stats/                 - Statistiques d'un portfolio (public)
   GET    /api/portfolio/public/platform-stats/                       - Statistiques globales de la plateforme (public)
   GET    /api/portfolio/public/search/                               - Recherche globale (public)
+         ?q=terme&limit=10                                           - Première page de chaque type + lien `next` par type
+         ?q=terme&type=projets&cursor=...                            - Page suivante d'un type (portfolios, competences, projets)
+
+TÉLÉVERSEMENTS FRAGMENTÉS (authentifié, reprenables):
+  POST   /api/portfolio/uploads/                                     - Ouvrir : {cible, objet_id?, nom_fichier, taille, sha256?}
+                                                                       cible = photo_profil | photo_template | image_projet
+  GET    /api/portfolio/uploads/{id}/                                - État de la session (`recu` = offset de reprise)
+  PUT    /api/portfolio/uploads/{id}/?offset=N                       - Envoyer un fragment (corps brut, N = octets déjà reçus)
+  POST   /api/portfolio/uploads/{id}/finalize/                       - Vérifier (taille, SHA-256, image) et attacher au champ cible
+  DELETE /api/portfolio/uploads/{id}/                                - Abandonner
+
+ADMINISTRATION (staff):
+  GET    /api/portfolio/admin/cache-stats/                           - Hits/misses du cache des réponses publiques
+  DELETE /api/portfolio/admin/cache-stats/                           - Remettre les compteurs à zéro
+  GET    /api/portfolio/admin/profils/                               - Profils de requêtes enregistrés
+  GET    /api/portfolio/admin/profils/{id}/                          - Arbre d'appels résumé et requêtes SQL d'un profil
+  GET    /api/portfolio/admin/profils/{id}/pstats/                   - Statistiques pstats complètes (snakeviz)
+
+PROFILAGE (staff):
+  En-tête X-Profil: 1 ou ?_profil=1 : la requête est exécutée sous cProfile et
+  l'identifiant du profil est renvoyé dans l'en-tête X-Profil-Id
+
+CACHE:
+  Les GET anonymes des endpoints publics sont mis en cache (en-tête X-Cache: HIT/MISS)
+  et invalidés à chaque modification d'un portfolio ou de ses éléments
+  portfolios/{id}/, portfolios/my_portfolio/ et portfolios/{id}/public-data/ envoient
+  ETag/Last-Modified et répondent 304 à If-None-Match/If-Modified-Since
+  Cache-Control : private, no-cache sur portfolios/{id}/ et portfolios/my_portfolio/ ;
+  public, max-age=60 sur portfolios/{id}/public-data/ et les actions publiques du ViewSet
+
+CHRONOMÉTRAGE:
+  Une requête sur PORTFOLIO_TIMING_TAUX reçoit un en-tête Server-Timing (total, vue, auth,
+  sql, serialisation, rendu), visible dans l'onglet réseau des outils de développement,
+  et une ligne JSON dans le journal portfolio.chronometrage
 
 FILTRES DISPONIBLES:
   Contacts: ?type=email, ?principal=true, ?search=terme
@@ -340,6 +417,8 @@ PAGINATION:
   Toutes les listes sont paginées (12 éléments par page)
   Modifier avec ?page_size=20
   Maximum: 100 éléments par page
+  Pagination par curseur (sans total) sur portfolios/published/, public-competences/,
+  public-projets/ et public-contacts/ : ?pagination=cursor puis suivre le lien `next`
 
 PERMISSIONS:
   Contacts/Compétences/Projets: 
@@ -1,19 +1,53 @@
 # portfolio/views.py
+import binascii
+import json
+from base64 import b64decode, b64encode
+
 from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied, ValidationError
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import PermissionDenied, ValidationError, NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.views import APIView
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import FileResponse, HttpResponse
 from django.db.models import Q
 from django.db import transaction
 from django.utils import timezone
 from django.db import models
 
-from .models import Contact, Competence, Projet, Portfolio
+from .models import (
+    Contact, Competence, Projet, Portfolio, PortfolioSnapshot, Televersement, lie_a_un_portfolio_publie
+)
+from .apercus import charger_apercus
+from .snapshots import obtenir_snapshot
+from .duplication import dupliquer_portfolio
+from .en_masse import OperationsEnMasseMixin
+from .statistiques import obtenir_statistiques_plateforme
+from .cache import CacheReponsePubliqueMixin, statistiques_cache, reinitialiser_statistiques
+from .chronometrage import AuthentificationMesureeMixin
+from .conditionnel import ReponseConditionnelleMixin, etag
+from .compteurs import compteur_vues
+from .profilage import chemin_profil, chemin_pstats, lister_profils
+from .recherche import index_disponible, rechercher, compter as compter_resultats
+from .televersements import (
+    CIBLES,
+    FragmentInvalide,
+    attacher,
+    ecrire_fragment,
+    empreinte,
+    liberer,
+    ouvrir,
+    purger_expires,
+    reserver_finalisation,
+    supprimer,
+    taille_fragment_max,
+    verifier_image,
+)
 from .serializers import (
     ContactSerializer,
     CompetenceSerializer,
@@ -22,7 +56,8 @@ from .serializers import (
     PortfolioDetailSerializer,
     PortfolioCreateUpdateSerializer,
     PortfolioPublishSerializer,
-    PortfolioUpdateWithFilesSerializer
+    PortfolioUpdateWithFilesSerializer,
+    TeleversementSerializer
 )
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -30,6 +65,106 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+class KeysetPagination(BasePagination):
+    """
+    Pagination par clé (keyset) : le curseur opaque contient les valeurs de tri
+    du dernier élément de la page, la page suivante est lue avec un WHERE sur
+    ces valeurs. Pas d'OFFSET ni de COUNT : la page 5000 coûte autant que la page 1.
+    
+    `ordering` doit être un tri total (terminer par la clé primaire).
+    Activée par ?pagination=cursor (ou la présence de ?cursor=).
+    """
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    
+    def __init__(self, ordering):
+        self.ordering = tuple(ordering)
+    
+    @classmethod
+    def est_demandee(cls, request):
+        return (
+            request.query_params.get('pagination') == 'cursor'
+            or cls.cursor_query_param in request.query_params
+        )
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.filtre_apres(position))
+        
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+    
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+    
+    def champs(self):
+        for champ in self.ordering:
+            yield champ.lstrip('-'), champ.startswith('-')
+    
+    def filtre_apres(self, position):
+        """(a, b, c) > (x, y, z) dans l'ordre de tri, exprimé champ par champ"""
+        filtre = Q()
+        egalites = {}
+        for (champ, descendant), valeur in zip(self.champs(), position):
+            comparaison = 'lt' if descendant else 'gt'
+            filtre |= Q(**egalites, **{f'{champ}__{comparaison}': valeur})
+            egalites[champ] = valeur
+        return filtre
+    
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            valeurs = json.loads(b64decode(encoded.encode('ascii')))
+            # Pas de NULL dans une clé : `champ__lt=None` n'est pas un filtre valide
+            if len(valeurs) != len(self.ordering) or None in valeurs:
+                raise ValueError
+            return [
+                model._meta.get_field(champ).to_python(valeur)
+                for (champ, _), valeur in zip(self.champs(), valeurs)
+            ]
+        except (TypeError, ValueError, UnicodeError, binascii.Error, DjangoValidationError):
+            raise NotFound("Curseur invalide")
+    
+    def encode_cursor(self, instance):
+        valeurs = []
+        for champ, _ in self.champs():
+            valeur = getattr(instance, instance._meta.get_field(champ).attname)
+            valeurs.append(valeur.isoformat() if hasattr(valeur, 'isoformat') else valeur)
+        return b64encode(json.dumps(valeurs).encode('ascii')).decode('ascii')
+    
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = replace_query_param(self.request.build_absolute_uri(), 'pagination', 'cursor')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+def choisir_paginateur(request, pagination_class, keyset_ordering):
+    """Pagination par clé si le client la demande, sinon pagination par numéro de page"""
+    if KeysetPagination.est_demandee(request):
+        return KeysetPagination(keyset_ordering)
+    return pagination_class()
+
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
@@ -47,7 +182,7 @@ class PortfolioPermissions(permissions.BasePermission):
             return True
         return obj.utilisateur == request.user
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(AuthentificationMesureeMixin, OperationsEnMasseMixin, viewsets.ModelViewSet):
     serializer_class = ContactSerializer
     pagination_class = StandardResultsSetPagination
 
@@ -98,7 +233,7 @@ class ContactViewSet(viewsets.ModelViewSet):
         except Portfolio.DoesNotExist:
             return Response({"error": "Portfolio non trouvé ou non publié"}, status=404)
 
-class CompetenceViewSet(viewsets.ModelViewSet):
+class CompetenceViewSet(AuthentificationMesureeMixin, OperationsEnMasseMixin, viewsets.ModelViewSet):
     serializer_class = CompetenceSerializer
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -137,9 +272,11 @@ class CompetenceViewSet(viewsets.ModelViewSet):
             result[categorie].append(serializer.data)
         return Response(result)
 
-class ProjetViewSet(viewsets.ModelViewSet):
+class ProjetViewSet(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, OperationsEnMasseMixin, viewsets.ModelViewSet):
     serializer_class = ProjetSerializer
     pagination_class = StandardResultsSetPagination
+    cache_actions = {'publics'}
+    cache_kwargs_portfolio = ()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['titre_projet', 'description_projet', 'langage_projet']
     filterset_fields = ['langage_projet', 'est_public', 'est_termine']
@@ -174,7 +311,7 @@ class ProjetViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(projets, many=True)
         return Response(serializer.data)
 
-class PortfolioViewSet(viewsets.ModelViewSet):
+class PortfolioViewSet(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, ReponseConditionnelleMixin, viewsets.ModelViewSet):
     queryset = Portfolio.objects.all()
     permission_classes = [PortfolioPermissions]
     pagination_class = StandardResultsSetPagination
@@ -182,6 +319,14 @@ class PortfolioViewSet(viewsets.ModelViewSet):
     search_fields = ['titre', 'description', 'titre_professionnel', 'biographie']
     filterset_fields = ['statut', 'layout_type']
     ordering_fields = ['date_creation', 'date_modification', 'vue_count', 'titre']
+    cache_actions = {'published', 'search', 'contacts_publics', 'competences_publics', 'projets_publics'}
+    cache_control_actions = {
+        # Revalidation systématique (ETag) : brouillons privés et compteur de vues
+        'retrieve': {'private': True, 'no_cache': True},
+        'my_portfolio': {'private': True, 'no_cache': True},
+        # Réponses publiques identiques pour tous les clients (cache_actions)
+        **{action: {'public': True, 'max_age': 60} for action in cache_actions},
+    }
     
     # AJOUT IMPORTANT : Accepter FormData
     parser_classes = [MultiPartParser, FormParser, JSONParser]
@@ -230,11 +375,31 @@ class PortfolioViewSet(viewsets.ModelViewSet):
         return queryset.distinct()
     
     def retrieve(self, request, *args, **kwargs):
+        # Validateurs lus sans charger le portfolio ; 304 seulement si l'accès est certain
+        try:
+            validateurs = self.get_queryset().filter(pk=kwargs['pk']).values_list(
+                'date_modification', 'statut', 'utilisateur_id'
+            ).first()
+        except (TypeError, ValueError):
+            validateurs = None
+        if validateurs:
+            date_modification, statut, utilisateur_id = validateurs
+            if statut == 'publie' or utilisateur_id == request.user.pk:
+                validateur = etag(kwargs['pk'], date_modification)
+                response = self.reponse_non_modifiee(request, validateur, date_modification)
+                if response is not None:
+                    if statut == 'publie':
+                        compteur_vues.incrementer(int(kwargs['pk']))
+                    return response
+        
         instance = self.get_object()
         if instance.is_published():
             instance.increment_vue_count()
         serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        response = Response(serializer.data)
+        return self.appliquer_validateurs(
+            response, etag(instance.pk, instance.date_modification), instance.date_modification
+        )
     
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -284,15 +449,27 @@ class PortfolioViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
     
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_portfolio(self, request):
+        validateurs = Portfolio.objects.filter(utilisateur=request.user).values_list(
+            'id_portfolio', 'date_modification'
+        ).first()
+        if validateurs:
+            response = self.reponse_non_modifiee(request, etag(*validateurs), validateurs[1])
+            if response is not None:
+                return response
+        
         try:
             portfolio = Portfolio.objects.get(utilisateur=request.user)
             serializer = PortfolioDetailSerializer(
                 portfolio,
                 context={'request': request}
             )
-            return Response(serializer.data)
+            return self.appliquer_validateurs(
+                Response(serializer.data),
+                etag(portfolio.pk, portfolio.date_modification),
+                portfolio.date_modification
+            )
         except Portfolio.DoesNotExist:
             return Response(
                 {'message': 'Aucun portfolio trouvé pour cet utilisateur'},
@@ -326,7 +503,7 @@ class PortfolioViewSet(viewsets.ModelViewSet):
         portfolio = self.get_object()
         stats = {
             'general': {
-                'vues': portfolio.vue_count,
+                'vues': portfolio.get_vue_count(),
                 'statut': portfolio.get_statut_display(),
                 'date_creation': portfolio.date_creation,
                 'date_modification': portfolio.date_modification,
@@ -334,12 +511,12 @@ class PortfolioViewSet(viewsets.ModelViewSet):
                 'jours_actif': (timezone.now() - portfolio.date_creation).days if portfolio.date_creation else 0
             },
             'contenu': {
-                'contacts': portfolio.contacts.count(),
-                'contacts_principaux': portfolio.contacts.filter(est_principal=True).count(),
-                'competences': portfolio.competences.count(),
-                'competences_visibles': portfolio.competences.filter(est_visible=True).count(),
-                'projets': portfolio.projets.count(),
-                'projets_publics': portfolio.projets.filter(est_public=True).count()
+                'contacts': portfolio.nb_contacts,
+                'contacts_principaux': portfolio.nb_contacts_principaux,
+                'competences': portfolio.nb_competences,
+                'competences_visibles': portfolio.nb_competences_visibles,
+                'projets': portfolio.nb_projets,
+                'projets_publics': portfolio.nb_projets_publics
             },
             'competences_par_categorie': {},
             'projets_par_langage': {}
@@ -363,15 +540,20 @@ class PortfolioViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def published(self, request):
-        portfolios = Portfolio.objects.filter(statut='publie')
-        page = self.paginate_queryset(portfolios)
+        portfolios = Portfolio.objects.select_related('utilisateur').filter(statut='publie')
+        # Clé stable : date_modification change à chaque sauvegarde et ferait
+        # sauter ou répéter des portfolios entre deux pages
+        paginator = choisir_paginateur(
+            request, self.pagination_class, ('-date_publication', '-id_portfolio')
+        )
+        page = paginator.paginate_queryset(portfolios, request, view=self)
         if page is not None:
             serializer = PortfolioListSerializer(
                 page,
                 many=True,
                 context={'request': request}
             )
-            return self.get_paginated_response(serializer.data)
+            return paginator.get_paginated_response(serializer.data)
         serializer = PortfolioListSerializer(
             portfolios,
             many=True,
@@ -388,68 +570,8 @@ class PortfolioViewSet(viewsets.ModelViewSet):
         if Portfolio.objects.filter(utilisateur=request.user).exists():
             raise ValidationError("Vous avez déjà un portfolio")
         
-        new_portfolio = Portfolio.objects.create(
-            utilisateur=request.user,
-            titre=f"{portfolio.titre} (Copie)",
-            description=portfolio.description,
-            titre_professionnel=portfolio.titre_professionnel,
-            biographie=portfolio.biographie,
-            statut='brouillon',
-            theme_couleur=portfolio.theme_couleur,
-            layout_type=portfolio.layout_type,
-            meta_description=portfolio.meta_description,
-            meta_keywords=portfolio.meta_keywords,
-            afficher_photo=portfolio.afficher_photo,
-            afficher_competences=portfolio.afficher_competences,
-            afficher_projets=portfolio.afficher_projets,
-            afficher_contacts=portfolio.afficher_contacts,
-            afficher_formations=portfolio.afficher_formations,
-            afficher_experiences=portfolio.afficher_experiences,
-            formations=portfolio.formations,
-            experiences=portfolio.experiences,
-            langues=portfolio.langues,
-            certifications=portfolio.certifications,
-            interets=portfolio.interets
-        )
-        
-        for contact in portfolio.contacts.all():
-            new_contact = Contact.objects.create(
-                type_contact=contact.type_contact,
-                valeur_contact=contact.valeur_contact,
-                utilisateur=request.user,
-                est_principal=contact.est_principal,
-                ordre=contact.ordre
-            )
-            new_portfolio.contacts.add(new_contact)
-        
-        for competence in portfolio.competences.all():
-            new_competence = Competence.objects.create(
-                nom_competence=competence.nom_competence,
-                niveau_competence=competence.niveau_competence,
-                categorie=competence.categorie,
-                utilisateur=request.user,
-                annees_experience=competence.annees_experience,
-                description=competence.description,
-                est_visible=competence.est_visible,
-                ordre=competence.ordre
-            )
-            new_portfolio.competences.add(new_competence)
-        
-        for projet in portfolio.projets.all():
-            new_projet = Projet.objects.create(
-                titre_projet=projet.titre_projet,
-                description_projet=projet.description_projet,
-                langage_projet=projet.langage_projet,
-                utilisateur=request.user,
-                lien_projet=projet.lien_projet,
-                lien_github=projet.lien_github,
-                technologies=projet.technologies,
-                date_realisation=projet.date_realisation,
-                est_public=projet.est_public,
-                est_termine=projet.est_termine,
-                ordre=projet.ordre
-            )
-            new_portfolio.projets.add(new_projet)
+        # Copie en masse des éléments et des liaisons (voir duplication.py)
+        new_portfolio = dupliquer_portfolio(portfolio, request.user)
         
         return Response(
             PortfolioDetailSerializer(new_portfolio, context={'request': request}).data,
@@ -533,7 +655,7 @@ class PortfolioViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        queryset = Portfolio.objects.filter(statut='publie')
+        queryset = Portfolio.objects.select_related('utilisateur').filter(statut='publie')
         competence = request.query_params.get('competence', None)
         if competence:
             queryset = queryset.filter(competences__nom_competence__icontains=competence)
@@ -550,7 +672,8 @@ class PortfolioViewSet(viewsets.ModelViewSet):
         if categorie:
             queryset = queryset.filter(competences__categorie=categorie)
         
-        page = self.paginate_queryset(queryset.distinct())
+        queryset = queryset.distinct()
+        page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = PortfolioListSerializer(
                 page,
@@ -560,7 +683,7 @@ class PortfolioViewSet(viewsets.ModelViewSet):
             return self.get_paginated_response(serializer.data)
         
         serializer = PortfolioListSerializer(
-            queryset.distinct(),
+            queryset,
             many=True,
             context={'request': request}
         )
@@ -648,7 +771,7 @@ class PortfolioViewSet(viewsets.ModelViewSet):
 # VUES PUBLIQUES POUR LES DONNÉES DE PORTFOLIO
 # ============================================================================
 
-class PortfolioPublicContactsAPIView(APIView):
+class PortfolioPublicContactsAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer les contacts d'un portfolio publié
     """
@@ -672,7 +795,7 @@ class PortfolioPublicContactsAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class PortfolioPublicCompetencesAPIView(APIView):
+class PortfolioPublicCompetencesAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer les compétences d'un portfolio publié
     """
@@ -696,7 +819,7 @@ class PortfolioPublicCompetencesAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class PortfolioPublicProjetsAPIView(APIView):
+class PortfolioPublicProjetsAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer les projets d'un portfolio publié
     """
@@ -720,39 +843,38 @@ class PortfolioPublicProjetsAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class PortfolioPublicDataAPIView(APIView):
+class PortfolioPublicDataAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, ReponseConditionnelleMixin, APIView):
     """
     Vue publique pour récupérer toutes les données d'un portfolio publié
+    (servies depuis le snapshot pré-calculé, voir snapshots.py)
     """
     permission_classes = [permissions.AllowAny]
+    cache_control = {'public': True, 'max_age': 60}
     
     def get(self, request, portfolio_id):
-        try:
-            portfolio = Portfolio.objects.get(
-                id_portfolio=portfolio_id,
-                statut='publie'
-            )
-            
-            contacts = portfolio.contacts.all()
-            competences = portfolio.competences.filter(est_visible=True)
-            projets = portfolio.projets.filter(est_public=True)
-            
-            data = {
-                'portfolio': PortfolioDetailSerializer(portfolio).data,
-                'contacts': ContactSerializer(contacts, many=True).data,
-                'competences': CompetenceSerializer(competences, many=True).data,
-                'projets': ProjetSerializer(projets, many=True).data,
-            }
-            
-            return Response(data)
-            
-        except Portfolio.DoesNotExist:
+        date_generation = PortfolioSnapshot.objects.filter(
+            portfolio_id=portfolio_id,
+            portfolio__statut='publie'
+        ).values_list('date_generation', flat=True).first()
+        if date_generation:
+            validateur = etag(portfolio_id, date_generation)
+            response = self.reponse_non_modifiee(request, validateur, date_generation)
+            if response is not None:
+                return response
+        
+        contenu = obtenir_snapshot(portfolio_id)
+        if contenu is None:
             return Response(
                 {"error": "Portfolio non trouvé ou non publié"},
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        response = HttpResponse(contenu, content_type='application/json')
+        if date_generation:
+            self.appliquer_validateurs(response, validateur, date_generation)
+        return response
 
-class PublicPortfoliosAPIView(APIView):
+class PublicPortfoliosAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer tous les portfolios publiés avec leurs données
     """
@@ -760,29 +882,28 @@ class PublicPortfoliosAPIView(APIView):
     pagination_class = StandardResultsSetPagination
     
     def get(self, request):
-        portfolios = Portfolio.objects.filter(statut='publie')
+        portfolios = Portfolio.objects.select_related('utilisateur').filter(statut='publie')
         
         paginator = self.pagination_class()
         page = paginator.paginate_queryset(portfolios, request)
         
         if page is not None:
+            # Aperçus chargés en une requête par relation pour toute la page
+            apercus = charger_apercus(page)
             data = []
             for portfolio in page:
                 portfolio_data = PortfolioListSerializer(portfolio).data
                 
-                contacts_principaux = portfolio.contacts.filter(est_principal=True)[:3]
                 portfolio_data['contacts_principaux'] = ContactSerializer(
-                    contacts_principaux, many=True
+                    apercus['contacts'].get(portfolio.pk, []), many=True
                 ).data
                 
-                competences_visibles = portfolio.competences.filter(est_visible=True)[:5]
                 portfolio_data['competences_visibles'] = CompetenceSerializer(
-                    competences_visibles, many=True
+                    apercus['competences'].get(portfolio.pk, []), many=True
                 ).data
                 
-                projets_publics = portfolio.projets.filter(est_public=True)[:3]
                 portfolio_data['projets_publics'] = ProjetSerializer(
-                    projets_publics, many=True
+                    apercus['projets'].get(portfolio.pk, []), many=True
                 ).data
                 
                 data.append(portfolio_data)
@@ -800,18 +921,19 @@ class PublicPortfoliosAPIView(APIView):
 # ENDPOINTS PUBLICS SUPPLÉMENTAIRES POUR LES COMPÉTENCES ET PROJETS
 # ============================================================================
 
-class PublicCompetencesListAPIView(APIView):
+class PublicCompetencesListAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer toutes les compétences visibles des portfolios publiés
     """
     permission_classes = [permissions.AllowAny]
     pagination_class = StandardResultsSetPagination
+    keyset_ordering = ('categorie', 'ordre', 'nom_competence', 'id_competence')
     
     def get(self, request):
         competences = Competence.objects.filter(
-            portfolios__statut='publie',
+            lie_a_un_portfolio_publie(Competence),
             est_visible=True
-        ).distinct()
+        )
         
         categorie = request.query_params.get('categorie', None)
         if categorie:
@@ -828,8 +950,8 @@ class PublicCompetencesListAPIView(APIView):
                 Q(description__icontains=search)
             )
         
-        paginator = self.pagination_class()
-        page = paginator.paginate_queryset(competences, request)
+        paginator = choisir_paginateur(request, self.pagination_class, self.keyset_ordering)
+        page = paginator.paginate_queryset(competences, request, view=self)
         
         if page is not None:
             serializer = CompetenceSerializer(page, many=True)
@@ -838,7 +960,7 @@ class PublicCompetencesListAPIView(APIView):
         serializer = CompetenceSerializer(competences, many=True)
         return Response(serializer.data)
 
-class PublicCompetencesByCategoryAPIView(APIView):
+class PublicCompetencesByCategoryAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer les compétences groupées par catégorie
     """
@@ -861,7 +983,7 @@ class PublicCompetencesByCategoryAPIView(APIView):
         
         return Response(result)
 
-class PublicCompetenceDetailAPIView(APIView):
+class PublicCompetenceDetailAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer les détails d'une compétence spécifique
     """
@@ -884,18 +1006,19 @@ class PublicCompetenceDetailAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class PublicProjetsListAPIView(APIView):
+class PublicProjetsListAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer tous les projets publics des portfolios publiés
     """
     permission_classes = [permissions.AllowAny]
     pagination_class = StandardResultsSetPagination
+    keyset_ordering = ('ordre', '-date_ajout', '-id_projet')
     
     def get(self, request):
         projets = Projet.objects.filter(
-            portfolios__statut='publie',
+            lie_a_un_portfolio_publie(Projet),
             est_public=True
-        ).distinct()
+        )
         
         langage = request.query_params.get('langage', None)
         if langage:
@@ -913,8 +1036,8 @@ class PublicProjetsListAPIView(APIView):
                 Q(langage_projet__icontains=search)
             )
         
-        paginator = self.pagination_class()
-        page = paginator.paginate_queryset(projets, request)
+        paginator = choisir_paginateur(request, self.pagination_class, self.keyset_ordering)
+        page = paginator.paginate_queryset(projets, request, view=self)
         
         if page is not None:
             serializer = ProjetSerializer(page, many=True)
@@ -923,7 +1046,7 @@ class PublicProjetsListAPIView(APIView):
         serializer = ProjetSerializer(projets, many=True)
         return Response(serializer.data)
 
-class PublicProjetsByLanguageAPIView(APIView):
+class PublicProjetsByLanguageAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer les projets groupés par langage
     """
@@ -946,7 +1069,7 @@ class PublicProjetsByLanguageAPIView(APIView):
         
         return Response(result)
 
-class PublicProjetDetailAPIView(APIView):
+class PublicProjetDetailAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer les détails d'un projet spécifique
     """
@@ -969,17 +1092,18 @@ class PublicProjetDetailAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class PublicContactsListAPIView(APIView):
+class PublicContactsListAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer tous les contacts des portfolios publiés
     """
     permission_classes = [permissions.AllowAny]
     pagination_class = StandardResultsSetPagination
+    keyset_ordering = ('ordre', 'date_ajout', 'id_contact')
     
     def get(self, request):
         contacts = Contact.objects.filter(
-            portfolios__statut='publie'
-        ).distinct()
+            lie_a_un_portfolio_publie(Contact)
+        )
         
         type_contact = request.query_params.get('type', None)
         if type_contact:
@@ -996,8 +1120,8 @@ class PublicContactsListAPIView(APIView):
                 Q(type_contact__icontains=search)
             )
         
-        paginator = self.pagination_class()
-        page = paginator.paginate_queryset(contacts, request)
+        paginator = choisir_paginateur(request, self.pagination_class, self.keyset_ordering)
+        page = paginator.paginate_queryset(contacts, request, view=self)
         
         if page is not None:
             serializer = ContactSerializer(page, many=True)
@@ -1006,7 +1130,7 @@ class PublicContactsListAPIView(APIView):
         serializer = ContactSerializer(contacts, many=True)
         return Response(serializer.data)
 
-class PublicContactDetailAPIView(APIView):
+class PublicContactDetailAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer les détails d'un contact spécifique
     """
@@ -1032,7 +1156,7 @@ class PublicContactDetailAPIView(APIView):
 # ENDPOINTS PUBLICS POUR LES STATISTIQUES
 # ============================================================================
 
-class PublicPortfolioStatsAPIView(APIView):
+class PublicPortfolioStatsAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer les statistiques d'un portfolio publié
     """
@@ -1047,7 +1171,7 @@ class PublicPortfolioStatsAPIView(APIView):
             
             stats = {
                 'general': {
-                    'vues': portfolio.vue_count,
+                    'vues': portfolio.get_vue_count(),
                     'statut': portfolio.get_statut_display(),
                     'date_creation': portfolio.date_creation,
                     'date_modification': portfolio.date_modification,
@@ -1055,12 +1179,12 @@ class PublicPortfolioStatsAPIView(APIView):
                     'jours_actif': (timezone.now() - portfolio.date_creation).days if portfolio.date_creation else 0
                 },
                 'contenu': {
-                    'contacts': portfolio.contacts.count(),
-                    'contacts_principaux': portfolio.contacts.filter(est_principal=True).count(),
-                    'competences': portfolio.competences.count(),
-                    'competences_visibles': portfolio.competences.filter(est_visible=True).count(),
-                    'projets': portfolio.projets.count(),
-                    'projets_publics': portfolio.projets.filter(est_public=True).count()
+                    'contacts': portfolio.nb_contacts,
+                    'contacts_principaux': portfolio.nb_contacts_principaux,
+                    'competences': portfolio.nb_competences,
+                    'competences_visibles': portfolio.nb_competences_visibles,
+                    'projets': portfolio.nb_projets,
+                    'projets_publics': portfolio.nb_projets_publics
                 }
             }
             
@@ -1072,86 +1196,215 @@ class PublicPortfolioStatsAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class PublicPlatformStatsAPIView(APIView):
+class PublicPlatformStatsAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour récupérer les statistiques globales de la plateforme
+    (lues dans StatistiquesPlateforme, voir statistiques.py)
     """
     permission_classes = [permissions.AllowAny]
     
     def get(self, request):
-        stats = {
-            'portfolios': {
-                'total': Portfolio.objects.count(),
-                'publies': Portfolio.objects.filter(statut='publie').count(),
-                'brouillons': Portfolio.objects.filter(statut='brouillon').count(),
-                'archives': Portfolio.objects.filter(statut='archive').count(),
-                'vues_total': Portfolio.objects.aggregate(total_vues=models.Sum('vue_count'))['total_vues'] or 0,
-            },
-            'competences': {
-                'total': Competence.objects.count(),
-                'visibles': Competence.objects.filter(est_visible=True).count(),
-                'par_categorie': {},
-            },
-            'projets': {
-                'total': Projet.objects.count(),
-                'publics': Projet.objects.filter(est_public=True).count(),
-                'termines': Projet.objects.filter(est_termine=True).count(),
-                'par_langage': {},
-            },
-            'contacts': {
-                'total': Contact.objects.count(),
-                'principaux': Contact.objects.filter(est_principal=True).count(),
-            }
-        }
-        
-        for categorie, _ in Competence.CATEGORIE_CHOICES:
-            count = Competence.objects.filter(categorie=categorie, est_visible=True).count()
-            if count > 0:
-                stats['competences']['par_categorie'][categorie] = count
-        
-        langages = Projet.objects.filter(est_public=True).values('langage_projet').annotate(
-            count=models.Count('id_projet')
-        ).order_by('-count')[:10]
-        
-        for langage in langages:
-            stats['projets']['par_langage'][langage['langage_projet']] = langage['count']
-        
-        return Response(stats)
+        return Response(obtenir_statistiques_plateforme())
 
 # ============================================================================
 # ENDPOINTS PUBLICS POUR LA RECHERCHE
 # ============================================================================
 
-class PublicSearchAPIView(APIView):
+class SearchCursorPagination:
+    """
+    Pagination par clé d'un type de résultat de la recherche globale : le
+    curseur opaque nomme son type et contient (score bm25, id) du dernier
+    résultat lu. Pas d'OFFSET ni de COUNT.
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 10
+    max_limit = 50
+    
+    def __init__(self, request, type_resultat=None):
+        self.request = request
+        self.limit = self.get_limit()
+        self.apres = self.decode_cursor(type_resultat)
+    
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get(self.limit_query_param, self.default_limit))
+        except (TypeError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+    
+    def decode_cursor(self, type_resultat):
+        """Position (score, id) après laquelle reprendre, None pour la première page"""
+        encoded = self.request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')))
+            type_curseur = cursor['t']
+            score = None if cursor['s'] is None else float(cursor['s'])
+            objet_id = int(cursor['i'])
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound("Curseur invalide")
+        # Un curseur ne vaut que pour le type qu'il nomme, demandé par ?type=
+        if type_curseur != type_resultat:
+            raise NotFound("Curseur invalide")
+        return score, objet_id
+    
+    def get_next_link(self, type_resultat, dernier):
+        if dernier is None:
+            return None
+        score, objet_id = dernier
+        cursor = b64encode(
+            json.dumps({'t': type_resultat, 's': score, 'i': objet_id}).encode('ascii')
+        ).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, 'type', type_resultat)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+class PublicSearchAPIView(AuthentificationMesureeMixin, CacheReponsePubliqueMixin, APIView):
     """
     Vue publique pour la recherche globale dans les portfolios publiés
+    (index plein texte FTS5 classé par bm25, voir recherche.py).
+    
+    Sans paramètre `type`, renvoie la première page de chaque type de résultat
+    et un lien `next` par type ; avec `type=<portfolios|competences|projets>`
+    et `cursor`, renvoie la page suivante de ce type uniquement.
     """
     permission_classes = [permissions.AllowAny]
-    pagination_class = StandardResultsSetPagination
+    
+    # type de résultat -> type d'objet indexé
+    types_resultats = {
+        'portfolios': 'portfolio',
+        'competences': 'competence',
+        'projets': 'projet',
+    }
     
     def get(self, request):
         query = request.query_params.get('q', '')
         if not query:
             return Response({"error": "Paramètre de recherche 'q' requis"}, status=400)
         
-        portfolios = Portfolio.objects.filter(
-            statut='publie'
-        ).filter(
-            Q(titre__icontains=query) |
-            Q(description__icontains=query) |
-            Q(titre_professionnel__icontains=query) |
-            Q(biographie__icontains=query)
-        ).distinct()
+        type_resultat = request.query_params.get('type')
+        if type_resultat is not None and type_resultat not in self.types_resultats:
+            return Response(
+                {"error": "Paramètre 'type' invalide (portfolios, competences ou projets)"},
+                status=400
+            )
         
-        competences = Competence.objects.filter(
-            portfolios__statut='publie',
-            est_visible=True
-        ).filter(
-            Q(nom_competence__icontains=query) |
-            Q(description__icontains=query)
-        ).distinct()
+        pagination = SearchCursorPagination(request, type_resultat)
+        if type_resultat is not None:
+            results, dernier = self.page(query, type_resultat, pagination)
+            return Response({
+                'results': results,
+                'next': pagination.get_next_link(type_resultat, dernier),
+            })
         
-        projets = Projet.objects.filter(
+        data = {'next': {}}
+        for type_resultat in self.types_resultats:
+            results, dernier = self.page(query, type_resultat, pagination)
+            data[type_resultat] = results
+            data['next'][type_resultat] = pagination.get_next_link(type_resultat, dernier)
+        data['counts'] = self.compter(query)
+        
+        return Response(data)
+    
+    def page(self, query, type_resultat, pagination):
+        """
+        Résultats sérialisés d'une page d'un type, et position (score, id)
+        de son dernier résultat s'il existe une page suivante
+        """
+        if index_disponible():
+            trouves = rechercher(
+                query,
+                type_objet=self.types_resultats[type_resultat],
+                limite=pagination.limit + 1,
+                apres=pagination.apres
+            )
+            has_next = len(trouves) > pagination.limit
+            trouves = trouves[:pagination.limit]
+            dernier = (trouves[-1][2], trouves[-1][1]) if has_next else None
+            objets = self.charger(
+                self.get_queryset(type_resultat),
+                [(objet_id, extrait) for _, objet_id, _, extrait in trouves]
+            )
+        else:
+            queryset = self.filtrer_sans_index(type_resultat, query).order_by('pk')
+            if pagination.apres is not None:
+                queryset = queryset.filter(pk__gt=pagination.apres[1])
+            objets = list(queryset[:pagination.limit + 1])
+            has_next = len(objets) > pagination.limit
+            objets = objets[:pagination.limit]
+            dernier = (None, objets[-1].pk) if has_next else None
+        
+        return self.serialiser(type_resultat, objets), dernier
+    
+    def compter(self, query):
+        if index_disponible():
+            comptes = compter_resultats(query)
+            counts = {
+                type_resultat: comptes[type_objet]
+                for type_resultat, type_objet in self.types_resultats.items()
+            }
+        else:
+            counts = {
+                type_resultat: self.filtrer_sans_index(type_resultat, query).count()
+                for type_resultat in self.types_resultats
+            }
+        counts['total'] = sum(counts.values())
+        return counts
+    
+    def get_queryset(self, type_resultat):
+        if type_resultat == 'portfolios':
+            return Portfolio.objects.select_related('utilisateur')
+        if type_resultat == 'competences':
+            return Competence.objects.all()
+        return Projet.objects.all()
+    
+    def charger(self, queryset, resultats):
+        """Charger les objets trouvés en conservant l'ordre de pertinence"""
+        objets = queryset.in_bulk([objet_id for objet_id, _ in resultats])
+        charges = []
+        for objet_id, extrait in resultats:
+            if objet_id in objets:
+                objet = objets[objet_id]
+                objet.extrait = extrait
+                charges.append(objet)
+        return charges
+    
+    def serialiser(self, type_resultat, objets):
+        serializer_class = {
+            'portfolios': PortfolioListSerializer,
+            'competences': CompetenceSerializer,
+            'projets': ProjetSerializer,
+        }[type_resultat]
+        data = serializer_class(objets, many=True).data
+        for element, objet in zip(data, objets):
+            if hasattr(objet, 'extrait'):
+                element['extrait'] = objet.extrait
+        return data
+    
+    def filtrer_sans_index(self, type_resultat, query):
+        """Recherche par icontains (bases sans FTS5)"""
+        if type_resultat == 'portfolios':
+            return Portfolio.objects.select_related('utilisateur').filter(
+                statut='publie'
+            ).filter(
+                Q(titre__icontains=query) |
+                Q(description__icontains=query) |
+                Q(titre_professionnel__icontains=query) |
+                Q(biographie__icontains=query)
+            ).distinct()
+        
+        if type_resultat == 'competences':
+            return Competence.objects.filter(
+                portfolios__statut='publie',
+                est_visible=True
+            ).filter(
+                Q(nom_competence__icontains=query) |
+                Q(description__icontains=query)
+            ).distinct()
+        
+        return Projet.objects.filter(
             portfolios__statut='publie',
             est_public=True
         ).filter(
@@ -1159,17 +1412,183 @@ class PublicSearchAPIView(APIView):
             Q(description_projet__icontains=query) |
             Q(langage_projet__icontains=query)
         ).distinct()
+
+
+# ============================================================================
+# TÉLÉVERSEMENTS FRAGMENTÉS
+# ============================================================================
+
+class TeleversementAPIView(AuthentificationMesureeMixin, APIView):
+    """
+    Ouvrir un téléversement fragmenté d'image (voir televersements.py)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        purger_expires()
+        serializer = TeleversementSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        televersement = serializer.save()
+        ouvrir(televersement)
+        return Response(
+            {**serializer.data, 'taille_fragment_max': taille_fragment_max()},
+            status=status.HTTP_201_CREATED
+        )
+
+class TeleversementDetailAPIView(AuthentificationMesureeMixin, APIView):
+    """
+    GET : état de la session (offset de reprise), PUT : envoyer un fragment
+    (corps brut, ?offset=), DELETE : abandonner
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_object(self, pk):
+        return get_object_or_404(Televersement, pk=pk, utilisateur=self.request.user)
+    
+    def get(self, request, pk):
+        return Response(TeleversementSerializer(self.get_object(pk)).data)
+    
+    def put(self, request, pk):
+        televersement = self.get_object(pk)
+        try:
+            offset = int(request.query_params.get('offset', ''))
+            longueur = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response(
+                {"error": "Le paramètre offset doit être un entier"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        results = {
-            'portfolios': PortfolioListSerializer(portfolios, many=True).data,
-            'competences': CompetenceSerializer(competences, many=True).data,
-            'projets': ProjetSerializer(projets, many=True).data,
-            'counts': {
-                'portfolios': portfolios.count(),
-                'competences': competences.count(),
-                'projets': projets.count(),
-                'total': portfolios.count() + competences.count() + projets.count()
-            }
-        }
+        if offset != televersement.recu:
+            return Response(
+                {"error": "Offset inattendu, reprendre à partir des octets reçus", "recu": televersement.recu},
+                status=status.HTTP_409_CONFLICT
+            )
+        if longueur > taille_fragment_max():
+            return Response(
+                {"error": f"Un fragment ne peut pas dépasser {taille_fragment_max()} octets"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        if longueur <= 0 or offset + longueur > televersement.taille:
+            return Response(
+                {"error": "Fragment vide ou dépassant la taille annoncée"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Le corps est lu par blocs depuis le flux, jamais chargé en entier
+        try:
+            avance = ecrire_fragment(televersement, offset, request.stream, longueur)
+        except FragmentInvalide as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not avance:
+            televersement.refresh_from_db()
+            return Response(
+                {"error": "Un autre envoi a déjà écrit ce fragment", "recu": televersement.recu},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response({"recu": offset + longueur, "taille": televersement.taille})
+    
+    def delete(self, request, pk):
+        supprimer(self.get_object(pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class TeleversementFinalisationAPIView(AuthentificationMesureeMixin, APIView):
+    """
+    Vérifier le fichier assemblé (taille, SHA-256, image valide) et
+    l'attacher au champ image cible
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, pk):
+        televersement = get_object_or_404(Televersement, pk=pk, utilisateur=request.user)
+        if televersement.recu != televersement.taille:
+            return Response(
+                {"error": "Téléversement incomplet", "recu": televersement.recu},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        modele, champ = CIBLES[televersement.cible]
+        instance = get_object_or_404(modele, pk=televersement.objet_id, utilisateur=request.user)
+        if not reserver_finalisation(televersement):
+            return Response(
+                {"error": "Téléversement déjà finalisé par une autre requête"},
+                status=status.HTTP_409_CONFLICT
+            )
         
-        return Response(results)
\ No newline at end of file
+        # La session est close quelle que soit l'issue : son fichier est libéré
+        try:
+            sha256 = empreinte(televersement)
+            if televersement.sha256 and sha256 != televersement.sha256:
+                return Response(
+                    {"error": "Le SHA-256 du fichier reçu ne correspond pas à celui annoncé", "sha256": sha256},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                verifier_image(televersement)
+            except FragmentInvalide as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            attacher(televersement, instance)
+        finally:
+            liberer(televersement)
+        
+        return Response({
+            'cible': televersement.cible,
+            'objet_id': televersement.objet_id,
+            'sha256': sha256,
+            'url': request.build_absolute_uri(getattr(instance, champ).url),
+        })
+
+
+# ============================================================================
+# CACHE DES RÉPONSES PUBLIQUES (ADMINISTRATION)
+# ============================================================================
+
+class CacheStatsAPIView(AuthentificationMesureeMixin, APIView):
+    """
+    Compteurs de hits/misses du cache des réponses publiques (staff).
+    DELETE remet les compteurs à zéro.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response(statistiques_cache())
+    
+    def delete(self, request):
+        reinitialiser_statistiques()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# ============================================================================
+# PROFILS DE REQUÊTES (ADMINISTRATION, voir profilage.py)
+# ============================================================================
+
+class ProfilsAPIView(AuthentificationMesureeMixin, APIView):
+    """Profils enregistrés, du plus récent au plus ancien (staff)"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(lister_profils())
+
+
+class ProfilDetailAPIView(AuthentificationMesureeMixin, APIView):
+    """Profil complet : arbre d'appels résumé et requêtes SQL (staff)"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, profil_id):
+        chemin = chemin_profil(profil_id)
+        if chemin is None:
+            raise NotFound("Profil introuvable")
+        with open(chemin, encoding='utf-8') as fichier:
+            return HttpResponse(fichier.read(), content_type='application/json')
+
+
+class ProfilPstatsAPIView(AuthentificationMesureeMixin, APIView):
+    """Téléchargement des statistiques pstats d'un profil (staff)"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, profil_id):
+        chemin = chemin_pstats(profil_id)
+        if chemin is None:
+            raise NotFound("Profil introuvable")
+        return FileResponse(open(chemin, 'rb'), as_attachment=True, filename=f'{profil_id}.prof')
@@ -1,3 +1,28 @@
 from django.test import TestCase
 
-# Create your tests here.
+from portfolio.tests import BudgetRequetesMixin
+from . import urls as urls_utilisateur
+
+
+class BudgetRequetesUtilisateurTests(BudgetRequetesMixin, TestCase):
+    urls = urls_utilisateur
+    routes_admin = {'liste_utilisateurs', 'detail_utilisateur', 'utilisateurs_list', 'utilisateur_detail'}
+    routes_ignorees = {
+        'user_portfolios': 'la vue lit request.user.portfolios, absent du modèle (400)',
+        'api_user_portfolios': 'la vue lit request.user.portfolios, absent du modèle (400)',
+    }
+    budgets = {
+        'deconnexion': (0, 200, 200),
+        'verifier_token': (0, 401, 200),
+        'profil_utilisateur': (1, 401, 200),
+        'user_stats': (0, 401, 200),
+        'export_data': (0, 401, 200),
+        'liste_utilisateurs': (2, 401, 200),
+        'detail_utilisateur': (1, 401, 200),
+        'api_deconnexion': (0, 200, 200),
+        'user_profile': (0, 401, 200),
+        'api_user_stats': (0, 401, 200),
+        'api_export_data': (0, 401, 200),
+        'utilisateurs_list': (2, 401, 200),
+        'utilisateur_detail': (1, 401, 200),
+    }